@@ -0,0 +1,46 @@
+"""Compare BufferedCounter with incrementing an AtomicCounter directly.
+
+Run with ``python benchmarks/bench_buffered_counter.py``.
+"""
+from threading import Thread
+from time import perf_counter
+from typing import Callable
+
+from atomato import AtomicCounter
+from atomato import BufferedCounter
+
+
+OPERATIONS = 400_000
+THREAD_COUNTS = [1, 4]
+
+
+def run(inc: Callable[[], None], threads: int) -> float:
+    """Call `inc` OPERATIONS times spread over `threads` threads and return ops/s."""
+    per_thread = OPERATIONS // threads
+
+    def worker() -> None:
+        for _ in range(per_thread):
+            inc()
+
+    workers = [Thread(target=worker) for _ in range(threads)]
+    start = perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return per_thread * threads / (perf_counter() - start)
+
+
+def main() -> None:
+    """Print increments per second of both counters per thread count."""
+    for threads in THREAD_COUNTS:
+        atomic = AtomicCounter()
+        buffered = BufferedCounter(flush_every=1024, flush_interval=0.05)
+        print(f"{threads} thread(s)")
+        print(f"  AtomicCounter.inc   {run(atomic.inc, threads):>12,.0f} ops/s")
+        print(f"  BufferedCounter.inc {run(buffered.inc, threads):>12,.0f} ops/s")
+        assert atomic.value == buffered.close() == OPERATIONS
+
+
+if __name__ == "__main__":
+    main()
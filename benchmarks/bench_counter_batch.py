@@ -0,0 +1,86 @@
+"""Compare lock acquisitions and speed of AtomicCounter.batch() with plain increments.
+
+Run with ``python benchmarks/bench_counter_batch.py``.
+"""
+from threading import RLock
+from time import perf_counter
+from typing import Any
+
+from atomato import AtomicCounter
+from atomato import LockBackend
+
+
+OPERATIONS = 200_000
+BATCH_SIZES = [1, 10, 100, 1000]
+
+
+class CountingLock:
+    """Reentrant lock that counts its acquisitions."""
+
+    def __init__(self) -> None:
+        """Construct a `CountingLock` without acquisitions."""
+        self._lock = RLock()
+        self.acquisitions = 0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        """Acquire the lock like `threading.RLock.acquire` and count the acquisition."""
+        acquired = self._lock.acquire(blocking, timeout)
+        self.acquisitions += acquired
+        return acquired
+
+    def release(self) -> None:
+        """Release the lock."""
+        self._lock.release()
+
+    def _is_owned(self) -> bool:
+        return self._lock._is_owned()  # type: ignore
+
+    __enter__ = acquire
+
+    def __exit__(self, *args: Any) -> None:
+        self.release()
+
+
+class CountingLockBackend(LockBackend):
+    """Backend whose locks count their acquisitions."""
+
+    def lock(self) -> CountingLock:
+        """Return a new `CountingLock`."""
+        return CountingLock()
+
+
+def plain() -> None:
+    """Print acquisitions per operation and ops/s of unbatched increments."""
+    ctr = AtomicCounter(lock=CountingLockBackend())
+    start = perf_counter()
+    for _ in range(OPERATIONS):
+        ctr.inc()
+    elapsed = perf_counter() - start
+    per_op = ctr._ao._lock.acquisitions / OPERATIONS
+    print(f"{'inc()':<16}{per_op:>16.3f}{OPERATIONS / elapsed:>16,.0f}")
+
+
+def in_batches(size: int) -> None:
+    """Print acquisitions per operation and ops/s of increments in batches of `size`."""
+    ctr = AtomicCounter(lock=CountingLockBackend())
+    start = perf_counter()
+    for _ in range(OPERATIONS // size):
+        with ctr.batch() as b:
+            for _ in range(size):
+                b.inc()
+    elapsed = perf_counter() - start
+    assert ctr.value == OPERATIONS
+    per_op = ctr._ao._lock.acquisitions / OPERATIONS
+    print(f"{f'batch({size})':<16}{per_op:>16.3f}{OPERATIONS / elapsed:>16,.0f}")
+
+
+def main() -> None:
+    """Print lock acquisitions per operation and operations per second."""
+    print(f"{'mode':<16}{'acquisitions/op':>16}{'ops/s':>16}")
+    plain()
+    for size in BATCH_SIZES:
+        in_batches(size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Compare fan-out/fan-in rounds on AtomicCounter, CountDownLatch and CyclicBarrier.
+
+Every round a coordinator releases WORKERS persistent threads and waits until all of them
+finished. The AtomicCounter variant allocates a new counter per round, the way it was done
+before CountDownLatch existed.
+
+Run with ``python benchmarks/bench_latch_barrier.py``.
+"""
+from threading import Thread
+from time import perf_counter
+from typing import Callable
+from typing import List
+
+from atomato import AtomicCounter
+from atomato import AtomicInteger
+from atomato import CountDownLatch
+from atomato import CyclicBarrier
+
+
+ROUNDS = 2_000
+WORKERS = 8
+
+
+def run(worker: Callable[[], None], coordinator: Callable[[], None]) -> float:
+    """Run WORKERS worker threads alongside the coordinator and return the elapsed time."""
+    threads = [Thread(target=worker) for _ in range(WORKERS)]
+    start = perf_counter()
+    for t in threads:
+        t.start()
+    coordinator()
+    for t in threads:
+        t.join()
+    return perf_counter() - start
+
+
+def bench_atomic_counter() -> float:
+    """Fan in on a fresh `AtomicCounter` per round with `dec()` and `wait_equal(0)`."""
+    round_number = AtomicInteger(0)
+    done: List[AtomicCounter] = [AtomicCounter(0)]
+
+    def worker() -> None:
+        for r in range(1, ROUNDS + 1):
+            round_number.wait_equal(r)
+            done[0].dec()
+
+    def coordinator() -> None:
+        for r in range(1, ROUNDS + 1):
+            done[0] = AtomicCounter(WORKERS)
+            round_number.set(r)
+            done[0].wait_equal(0)
+
+    return run(worker, coordinator)
+
+
+def bench_count_down_latch() -> float:
+    """Fan in on one reused `CountDownLatch` that is re-armed every round."""
+    round_number = AtomicInteger(0)
+    latch = CountDownLatch(0)
+
+    def worker() -> None:
+        for r in range(1, ROUNDS + 1):
+            round_number.wait_equal(r)
+            latch.count_down()
+
+    def coordinator() -> None:
+        for r in range(1, ROUNDS + 1):
+            latch.reset(WORKERS)
+            round_number.set(r)
+            latch.wait()
+
+    return run(worker, coordinator)
+
+
+def bench_cyclic_barrier() -> float:
+    """Fan out and fan in on one `CyclicBarrier` shared by the workers and the coordinator."""
+    barrier = CyclicBarrier(WORKERS + 1)
+
+    def worker() -> None:
+        for _ in range(ROUNDS):
+            barrier.wait()
+            barrier.wait()
+
+    def coordinator() -> None:
+        worker()
+
+    return run(worker, coordinator)
+
+
+def main() -> None:
+    """Print rounds per second for every variant."""
+    benchmarks: List[Callable[[], float]] = [
+        bench_atomic_counter,
+        bench_count_down_latch,
+        bench_cyclic_barrier,
+    ]
+    for bench in benchmarks:
+        elapsed = bench()
+        print(f"{bench.__name__:<24} {ROUNDS / elapsed:>10,.0f} rounds/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Compare the lock backends of AtomicObject on AtomicCounter increments.
+
+Every backend runs the same amount of increments spread over 1, 2 and 4 threads.
+
+Run with ``python benchmarks/bench_lock_backends.py``.
+"""
+from threading import Thread
+from time import perf_counter
+from typing import List
+
+from atomato import AtomicCounter
+from atomato import LockBackend
+from atomato import PlainLockBackend
+from atomato import ProcessLockBackend
+from atomato import ReentrantLockBackend
+from atomato import SpinLockBackend
+
+
+OPERATIONS = 200_000
+THREAD_COUNTS = [1, 2, 4]
+BACKENDS: List[LockBackend] = [
+    ReentrantLockBackend(),
+    PlainLockBackend(),
+    SpinLockBackend(),
+    ProcessLockBackend(),
+]
+
+
+def bench(backend: LockBackend, threads: int) -> float:
+    """Increment one counter OPERATIONS times over `threads` threads and return ops/s."""
+    ctr = AtomicCounter(lock=backend)
+    per_thread = OPERATIONS // threads
+
+    def worker() -> None:
+        for _ in range(per_thread):
+            ctr.inc()
+
+    workers = [Thread(target=worker) for _ in range(threads)]
+    start = perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return per_thread * threads / (perf_counter() - start)
+
+
+def main() -> None:
+    """Print a matrix of increments per second per backend and thread count."""
+    print(f"{'backend':<36}" + "".join(f"{f'{n} thread(s)':>16}" for n in THREAD_COUNTS))
+    for backend in BACKENDS:
+        row = "".join(f"{bench(backend, n):>16,.0f}" for n in THREAD_COUNTS)
+        print(f"{repr(backend):<36}{row}")
+
+
+if __name__ == "__main__":
+    main()
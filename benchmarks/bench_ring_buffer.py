@@ -0,0 +1,110 @@
+"""Compare AtomicRingBuffer with queue.Queue and an AtomicObject wrapped deque.
+
+Run with ``python benchmarks/bench_ring_buffer.py``.
+"""
+from collections import deque
+from queue import Queue
+from threading import Thread
+from time import perf_counter
+from typing import Callable
+from typing import Deque
+from typing import List
+
+from atomato import AtomicObject
+from atomato import AtomicRingBuffer
+
+
+ITEMS = 200_000
+CAPACITY = 1024
+BATCH = 64
+
+
+def run(producer: Callable[[], None], consumer: Callable[[], None]) -> float:
+    """Run a producer and a consumer thread to completion and return the elapsed time."""
+    threads = [Thread(target=producer), Thread(target=consumer)]
+    start = perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return perf_counter() - start
+
+
+def bench_queue() -> float:
+    """Move ITEMS through a bounded `queue.Queue`, one item at a time."""
+    q: "Queue[int]" = Queue(CAPACITY)
+
+    def producer() -> None:
+        for i in range(ITEMS):
+            q.put(i)
+
+    def consumer() -> None:
+        for _ in range(ITEMS):
+            q.get()
+
+    return run(producer, consumer)
+
+
+def bench_atomic_object_deque() -> float:
+    """Move ITEMS through an `AtomicObject` wrapped deque, the pattern AtomicRingBuffer replaces."""
+    ao: AtomicObject[Deque[int]] = AtomicObject(deque())
+
+    def producer() -> None:
+        for i in range(ITEMS):
+            ao.set_by(lambda q: q.append(i))  # noqa: B023
+
+    def consumer() -> None:
+        for _ in range(ITEMS):
+            with ao:
+                ao.wait_for(lambda q: len(q) > 0)
+                ao.set_by(lambda q: q.popleft())
+
+    return run(producer, consumer)
+
+
+def bench_ring_buffer() -> float:
+    """Move ITEMS through an `AtomicRingBuffer`, one item at a time."""
+    rb: AtomicRingBuffer[int] = AtomicRingBuffer(CAPACITY)
+
+    def producer() -> None:
+        for i in range(ITEMS):
+            rb.put(i)
+
+    def consumer() -> None:
+        for _ in range(ITEMS):
+            rb.get()
+
+    return run(producer, consumer)
+
+
+def bench_ring_buffer_batched() -> float:
+    """Move ITEMS through an `AtomicRingBuffer` in batches of BATCH items."""
+    rb: AtomicRingBuffer[int] = AtomicRingBuffer(CAPACITY)
+
+    def producer() -> None:
+        for i in range(0, ITEMS, BATCH):
+            rb.put_many(range(i, min(i + BATCH, ITEMS)))
+
+    def consumer() -> None:
+        received = 0
+        while received < ITEMS:
+            received += len(rb.get_many(BATCH))
+
+    return run(producer, consumer)
+
+
+def main() -> None:
+    """Print items per second for every variant."""
+    benchmarks: List[Callable[[], float]] = [
+        bench_queue,
+        bench_atomic_object_deque,
+        bench_ring_buffer,
+        bench_ring_buffer_batched,
+    ]
+    for bench in benchmarks:
+        elapsed = bench()
+        print(f"{bench.__name__:<28} {ITEMS / elapsed:>12,.0f} items/s")
+
+
+if __name__ == "__main__":
+    main()
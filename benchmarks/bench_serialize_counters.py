@@ -0,0 +1,41 @@
+"""Compare dump_counters/load_counters with pickling a list of counters.
+
+Run with ``python benchmarks/bench_serialize_counters.py``.
+"""
+import pickle  # noqa: S403 - compared against, only loads its own data
+from time import perf_counter
+from typing import Callable
+from typing import List
+
+from atomato import AtomicCounter
+from atomato import dump_counters
+from atomato import load_counters
+
+
+COUNTERS = 100_000
+
+
+def timed(fn: Callable[[], object]) -> float:
+    """Call `fn` once and return the elapsed seconds."""
+    start = perf_counter()
+    fn()
+    return perf_counter() - start
+
+
+def main() -> None:
+    """Print size and dump/load times of both serializations."""
+    counters: List[AtomicCounter] = [AtomicCounter(i) for i in range(COUNTERS)]
+    pickled = pickle.dumps(counters)
+    dumped = dump_counters(counters)
+    print(f"{COUNTERS:,} counters")
+    print(f"  pickle        {len(pickled):>12,} bytes", end="")
+    print(f"  dump {timed(lambda: pickle.dumps(counters)):.3f}s", end="")
+    print(f"  load {timed(lambda: pickle.loads(pickled)):.3f}s")  # noqa: S301
+    print(f"  dump_counters {len(dumped):>12,} bytes", end="")
+    print(f"  dump {timed(lambda: dump_counters(counters)):.3f}s", end="")
+    print(f"  load {timed(lambda: load_counters(dumped)):.3f}s")
+    assert [c.value for c in load_counters(dumped)] == list(range(COUNTERS))
+
+
+if __name__ == "__main__":
+    main()
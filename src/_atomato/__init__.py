@@ -1,14 +1,88 @@
 """Internal Atomato package."""
 
+from .atomic_bitset import AtomicBitSet
+from .atomic_cache import AtomicCache
+from .atomic_cache import CacheStats
 from .atomic_counter import AtomicCounter
+from .atomic_counter import CounterBatch
+from .atomic_histogram import AtomicHistogram
+from .atomic_histogram import HistogramSnapshot
 from .atomic_integer import AtomicInteger
+from .atomic_lazy import AtomicLazy
+from .atomic_map import AtomicMap
 from .atomic_object import AtomicObject
+from .atomic_object import WaiterStats
+from .atomic_rate_meter import AtomicRateMeter
+from .atomic_ring_buffer import AtomicRingBuffer
 from .atomic_state import AtomicState
+from .buffered_counter import BufferedCounter
+from .count_down_latch import CountDownLatch
+from .cyclic_barrier import CyclicBarrier
+from .deadline import CancellationToken
+from .deadline import WaitCancelledError
+from .deadline import WaitOutcome
+from .deadline import WaitResult
+from .diagnostics import DiagnosticLockBackend
+from .diagnostics import LockOrderWarning
+from .diagnostics import LockWatchdog
+from .diagnostics import TrackedLock
+from .diagnostics import disable_lock_diagnostics
+from .diagnostics import dump_lock_diagnostics
+from .diagnostics import enable_lock_diagnostics
+from .durable_counter import DurableCounter
+from .durable_counter import DurableCounterStore
+from .lock_backend import LockBackend
+from .lock_backend import PlainLockBackend
+from .lock_backend import ProcessLockBackend
+from .lock_backend import ReentrantLockBackend
+from .lock_backend import SpinLock
+from .lock_backend import SpinLockBackend
+from .serialization import dump_counters
+from .serialization import load_counters
+from .snapshot import CounterGroup
+from .snapshot import snapshot
 
 
 __all__ = [
     "AtomicObject",
+    "WaiterStats",
     "AtomicCounter",
+    "CounterBatch",
+    "BufferedCounter",
+    "AtomicHistogram",
+    "HistogramSnapshot",
+    "AtomicRateMeter",
     "AtomicInteger",
     "AtomicState",
+    "AtomicBitSet",
+    "DurableCounter",
+    "DurableCounterStore",
+    "AtomicRingBuffer",
+    "AtomicMap",
+    "AtomicLazy",
+    "AtomicCache",
+    "CacheStats",
+    "CounterGroup",
+    "snapshot",
+    "dump_counters",
+    "load_counters",
+    "CountDownLatch",
+    "CyclicBarrier",
+    "CancellationToken",
+    "WaitOutcome",
+    "WaitResult",
+    "WaitCancelledError",
+    "LockBackend",
+    "PlainLockBackend",
+    "ProcessLockBackend",
+    "ReentrantLockBackend",
+    "SpinLock",
+    "SpinLockBackend",
+    "DiagnosticLockBackend",
+    "TrackedLock",
+    "LockOrderWarning",
+    "LockWatchdog",
+    "enable_lock_diagnostics",
+    "disable_lock_diagnostics",
+    "dump_lock_diagnostics",
 ]
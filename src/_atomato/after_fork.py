@@ -0,0 +1,55 @@
+import os
+from typing import Any
+from typing import Callable
+from typing import List
+from weakref import WeakValueDictionary
+
+
+# keyed by id, as atomato objects define __eq__ and are therefore not hashable
+_tracked: "WeakValueDictionary[int, Any]" = WeakValueDictionary()
+# process whose tracked objects are initialized, differs in a child until they are reinitialized
+_pid = os.getpid()
+# calls postponed by call_fork_safe until the tracked objects are reinitialized
+_deferred: List[Callable[[], None]] = []
+
+
+def track(obj: Any) -> None:
+    """Reinitialize the synchronization of `obj` in children created by `os.fork`.
+
+    After a fork only the forking thread exists in the child, so a lock that another thread held
+    at that moment would never be released. `obj._after_fork()` is called in the child to replace
+    such locks. The forking thread itself must not hold the lock of a tracked object.
+
+    Args:
+        obj: Object with an `_after_fork` method, tracked until it is garbage collected.
+    """
+    _tracked[id(obj)] = obj
+
+
+def call_fork_safe(fn: Callable[[], None]) -> None:
+    """Call `fn` now, or after the tracked objects are reinitialized if in a fresh fork child.
+
+    A child clears the thread-local data of its parent's other threads before the fork handlers
+    run, which calls the finalizers of thread-local objects. Such finalizers must pass their
+    locking work to this function, as those locks may still be held by a vanished thread.
+
+    Args:
+        fn: Function that takes the locks of tracked objects.
+    """
+    if os.getpid() == _pid:
+        fn()
+    else:
+        _deferred.append(fn)
+
+
+def _reinit_tracked() -> None:
+    global _pid
+    for obj in list(_tracked.values()):
+        obj._after_fork()
+    _pid = os.getpid()
+    while _deferred:
+        _deferred.pop(0)()
+
+
+if hasattr(os, "register_at_fork"):  # pragma: no branch
+    os.register_at_fork(after_in_child=_reinit_tracked)
@@ -0,0 +1,321 @@
+from threading import Condition
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import SupportsInt
+from typing import Tuple
+from typing import Union
+
+from .after_fork import track
+from .deadline import CancellationToken
+from .deadline import WaitResult
+from .deadline import wait_on
+from .lock_backend import LockBackend
+from .lock_backend import default_lock_backend
+
+
+Mask = Union[int, SupportsInt]
+
+
+class AtomicBitSet:
+    """AtomicBitSet stores many boolean flags in a single int in a threadsafe way.
+
+    All bits share one lock. Every wait gets its own condition on that lock together with the
+    mask it waits on, and a change only wakes the waits whose mask overlaps the changed bits, so
+    hundreds of flags need no more than one lock and a condition per blocked thread.
+
+    Masks may be plain ints or `enum.IntFlag` members.
+
+    Example::
+
+        class Ready(IntFlag):
+            DB = 1
+            CACHE = 2
+
+        ready = AtomicBitSet()
+        ready.set_bits(Ready.DB)
+        ready.wait_all_set(Ready.DB | Ready.CACHE, timeout=1.0)
+    """
+
+    _lock: Any
+    _bits: int
+    _waiters: List[Tuple[int, Condition]]
+    _lock_backend: LockBackend
+
+    def __init__(self, bits: Mask = 0, lock: Optional[LockBackend] = None):
+        """Construct an `AtomicBitSet`.
+
+        Args:
+            bits: Bits that are set initially.
+            lock: `LockBackend` that creates the lock, a reentrant `threading.RLock` if None.
+
+        Raises:
+            ValueError: if `bits` is negative.
+        """  # noqa: DAR402 - raised by _mask
+        self._bits = self._mask(bits)
+        self._lock_backend = lock if lock is not None else default_lock_backend()
+        self._init_sync()
+        track(self)
+
+    def _init_sync(self) -> None:
+        self._lock = self._lock_backend.lock()
+        self._waiters = []
+
+    def _after_fork(self) -> None:
+        if self._lock_backend.process_shared:
+            self._waiters = []
+        else:
+            self._init_sync()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the bits and lock backend, the lock and waiters are not pickled."""
+        return {"bits": self._bits, "lock_backend": self._lock_backend}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled AtomicBitSet with a new lock of its lock backend."""
+        self._bits = state["bits"]
+        self._lock_backend = state["lock_backend"]
+        self._init_sync()
+        track(self)
+
+    @staticmethod
+    def _mask(mask: Mask) -> int:
+        m = int(mask)
+        if m < 0:
+            raise ValueError(f"mask should not be negative, got {m}")
+        return m
+
+    def _update(self, fn: Callable[[int], int]) -> int:
+        """Replace the bits by `fn(bits)` and wake the waits on changed bits, return old bits."""
+        with self._lock:
+            old = self._bits
+            self._bits = fn(old)
+            changed = old ^ self._bits
+            if changed:
+                for mask, condition in self._waiters:
+                    if mask & changed:
+                        condition.notify_all()
+            return old
+
+    def set_bits(self, mask: Mask) -> int:
+        """Set all bits in `mask`.
+
+        Args:
+            mask: Bits to set.
+
+        Returns:
+            int: bits after setting.
+        """
+        m = self._mask(mask)
+        return self._update(lambda bits: bits | m) | m
+
+    def clear_bits(self, mask: Mask) -> int:
+        """Clear all bits in `mask`.
+
+        Args:
+            mask: Bits to clear.
+
+        Returns:
+            int: bits after clearing.
+        """
+        m = self._mask(mask)
+        return self._update(lambda bits: bits & ~m) & ~m
+
+    def test_and_set(self, mask: Mask) -> bool:
+        """Set all bits in `mask` and return whether any of them was set before.
+
+        For a single bit this is the classic test-and-set: only the caller that gets False
+        flipped the bit.
+
+        Args:
+            mask: Bits to set.
+
+        Returns:
+            bool: True if any bit in `mask` was already set.
+        """
+        m = self._mask(mask)
+        return bool(self._update(lambda bits: bits | m) & m)
+
+    def test_and_clear(self, mask: Mask) -> bool:
+        """Clear all bits in `mask` and return whether any of them was set before.
+
+        Args:
+            mask: Bits to clear.
+
+        Returns:
+            bool: True if any bit in `mask` was set.
+        """
+        m = self._mask(mask)
+        return bool(self._update(lambda bits: bits & ~m) & m)
+
+    def all_set(self, mask: Mask) -> bool:
+        """Return whether all bits in `mask` are set.
+
+        Args:
+            mask: Bits to test.
+
+        Returns:
+            bool: True if all bits in `mask` are set.
+        """
+        m = self._mask(mask)
+        return self.value & m == m
+
+    def any_set(self, mask: Mask) -> bool:
+        """Return whether any bit in `mask` is set.
+
+        Args:
+            mask: Bits to test.
+
+        Returns:
+            bool: True if any bit in `mask` is set.
+        """
+        return bool(self.value & self._mask(mask))
+
+    def popcount(self, mask: Optional[Mask] = None) -> int:
+        """Return amount of set bits, optionally only counting those in `mask`.
+
+        Args:
+            mask: Bits to count, all bits if None.
+
+        Returns:
+            int: amount of set bits.
+        """
+        bits = self.value
+        if mask is not None:
+            bits &= self._mask(mask)
+        return bits.bit_count()
+
+    @property
+    def value(self) -> int:
+        """Return the bits of AtomicBitSet as an int.
+
+        Returns:
+            int: bits of AtomicBitSet
+        """
+        with self._lock:
+            return self._bits
+
+    def _wait(
+        self,
+        mask: int,
+        satisfied: Callable[[int], bool],
+        timeout: Optional[float],
+        deadline: Optional[float],
+        cancel: Optional[CancellationToken],
+    ) -> WaitResult:
+        with self._lock:
+            waiter = (mask, self._lock_backend.condition(self._lock))
+            self._waiters.append(waiter)
+            try:
+                return wait_on(
+                    waiter[1],
+                    lambda: satisfied(self._bits),
+                    timeout=timeout,
+                    deadline=deadline,
+                    cancel=cancel,
+                )
+            finally:
+                self._waiters.remove(waiter)
+
+    def wait_all_set(
+        self,
+        mask: Mask,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bool:
+        """Wait until all bits in `mask` are set.
+
+        The wait is only woken by changes to bits in `mask`.
+
+        Args:
+            mask: Bits to wait for.
+            timeout: Wait until `timeout` expired.
+                     If `timeout` is None then blocks until condition is True (default: None)
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+
+        Returns:
+            bool: True if all bits in `mask` are set, False if the timeout or deadline expired
+                  or if the wait was cancelled.
+        """
+        m = self._mask(mask)
+        return bool(
+            self._wait(m, lambda bits: bits & m == m, timeout, deadline, cancel)
+        )
+
+    def wait_any_set(
+        self,
+        mask: Mask,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bool:
+        """Wait until any bit in `mask` is set.
+
+        The wait is only woken by changes to bits in `mask`.
+
+        Args:
+            mask: Bits to wait for.
+            timeout: Wait until `timeout` expired.
+                     If `timeout` is None then blocks until condition is True (default: None)
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+
+        Returns:
+            bool: True if any bit in `mask` is set, False if the timeout or deadline expired
+                  or if the wait was cancelled.
+        """
+        m = self._mask(mask)
+        return bool(
+            self._wait(m, lambda bits: bool(bits & m), timeout, deadline, cancel)
+        )
+
+    def wait_all_clear(
+        self,
+        mask: Mask,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bool:
+        """Wait until all bits in `mask` are cleared.
+
+        The wait is only woken by changes to bits in `mask`.
+
+        Args:
+            mask: Bits to wait for.
+            timeout: Wait until `timeout` expired.
+                     If `timeout` is None then blocks until condition is True (default: None)
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+
+        Returns:
+            bool: True if no bit in `mask` is set, False if the timeout or deadline expired
+                  or if the wait was cancelled.
+        """
+        m = self._mask(mask)
+        return bool(
+            self._wait(m, lambda bits: not bits & m, timeout, deadline, cancel)
+        )
+
+    def __contains__(self, mask: Mask) -> bool:
+        return self.all_set(mask)
+
+    def __int__(self) -> int:
+        return self.value
+
+    def __eq__(self, other: object) -> bool:
+        if not hasattr(other, "__int__"):
+            return NotImplemented
+        return self.value == int(other)
+
+    def __str__(self) -> str:
+        return bin(self.value)
+
+    def __repr__(self) -> str:
+        return f"AtomicBitSet({str(self)})"
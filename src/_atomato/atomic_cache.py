@@ -0,0 +1,275 @@
+from collections import OrderedDict
+from threading import Condition
+from threading import Lock
+from threading import Thread
+from time import monotonic
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Generic
+from typing import Hashable
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import TypeVar
+
+from .after_fork import track
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class CacheStats(NamedTuple):
+    """Statistics of an AtomicCache."""
+
+    hits: int
+    misses: int
+    loads: int
+    load_failures: int
+    load_time: float
+
+
+class AtomicCache(Generic[K, V]):
+    """AtomicCache is a keyed, single-flight cache with TTL and LRU eviction.
+
+    Concurrent misses for the same key run the loader once, the other callers wait on that key's
+    condition for the result. Loaders always run outside of the cache lock.
+
+    Pickled copies hold the loader, the statistics and the entries, which keep their age. In a
+    child created by `os.fork` the loads of the parent's other threads are abandoned; do not fork
+    from within a loader.
+    """
+
+    _loader: Callable[[K], V]
+    _ttl: Optional[float]
+    _max_size: Optional[int]
+    _refresh_ahead: Optional[float]
+    _lock: Lock
+    _entries: "OrderedDict[K, Tuple[V, float]]"
+    _loading: Dict[K, Condition]
+    _stale: Set[K]
+    _refresh_failed: Set[K]
+    _hits: int
+    _misses: int
+    _loads: int
+    _load_failures: int
+    _load_time: float
+
+    def __init__(
+        self,
+        loader: Callable[[K], V],
+        ttl: Optional[float] = None,
+        max_size: Optional[int] = None,
+        refresh_ahead: Optional[float] = None,
+    ):
+        """Construct an `AtomicCache`.
+
+        Args:
+            loader: Function that takes a key and computes its value.
+            ttl: Seconds after loading that an entry expires. If None entries never expire.
+            max_size: Maximum amount of entries. The least recently used entry is evicted first.
+                      If None the cache is unbounded.
+            refresh_ahead: Fraction of `ttl` after which a hit reloads the entry in a background
+                           thread while the current value keeps being served, e.g. 0.8.
+                           If None entries are only reloaded after they expired.
+
+        Raises:
+            ValueError: if `ttl` is not positive, `max_size` is lower than 1 or if
+                        `refresh_ahead` is passed without `ttl` or is not between 0 and 1.
+        """
+        if ttl is not None and ttl <= 0:
+            raise ValueError(f"ttl should be positive, got {ttl}")
+        if max_size is not None and max_size < 1:
+            raise ValueError(f"max_size should be at least 1, got {max_size}")
+        if refresh_ahead is not None and (ttl is None or not 0 < refresh_ahead < 1):
+            raise ValueError("refresh_ahead requires a ttl and should be between 0 and 1")
+        self._loader = loader
+        self._ttl = ttl
+        self._max_size = max_size
+        self._refresh_ahead = refresh_ahead
+        self._init_sync()
+        self._entries = OrderedDict()
+        self._refresh_failed = set()
+        self._hits = self._misses = self._loads = self._load_failures = 0
+        self._load_time = 0.0
+        track(self)
+
+    def _init_sync(self) -> None:
+        self._lock = Lock()
+        self._loading = {}
+        self._stale = set()
+
+    def _after_fork(self) -> None:
+        self._init_sync()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the settings, statistics and entries with their ages, running loads excluded."""
+        with self._lock:
+            now = monotonic()
+            return {
+                "loader": self._loader,
+                "ttl": self._ttl,
+                "max_size": self._max_size,
+                "refresh_ahead": self._refresh_ahead,
+                "entries": [(k, v, now - loaded_at) for k, (v, loaded_at) in self._entries.items()],
+                "refresh_failed": set(self._refresh_failed),
+                "stats": (
+                    self._hits,
+                    self._misses,
+                    self._loads,
+                    self._load_failures,
+                    self._load_time,
+                ),
+            }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled AtomicCache, its entries loaded as long ago as when pickled."""
+        self._loader = state["loader"]
+        self._ttl = state["ttl"]
+        self._max_size = state["max_size"]
+        self._refresh_ahead = state["refresh_ahead"]
+        self._init_sync()
+        now = monotonic()
+        self._entries = OrderedDict((k, (v, now - age)) for k, v, age in state["entries"])
+        self._refresh_failed = state["refresh_failed"]
+        (
+            self._hits,
+            self._misses,
+            self._loads,
+            self._load_failures,
+            self._load_time,
+        ) = state["stats"]
+        track(self)
+
+    def get(self, key: K) -> V:
+        """Return value for `key`, loading it if it is absent or expired.
+
+        Args:
+            key: Key to look up.
+
+        Returns:
+            V: value for `key`.
+        """
+        with self._lock:
+            while True:
+                entry = self._entries.get(key)
+                now = monotonic()
+                if entry is not None and not self._expired(entry[1], now, 1.0):
+                    self._hits += 1
+                    self._entries.move_to_end(key)
+                    refresh = (
+                        self._refresh_ahead is not None
+                        and key not in self._loading
+                        and key not in self._refresh_failed
+                        and self._expired(entry[1], now, self._refresh_ahead)
+                    )
+                    if refresh:
+                        self._loading[key] = Condition(self._lock)
+                    break
+                condition = self._loading.get(key)
+                if condition is None:
+                    self._misses += 1
+                    self._loading[key] = Condition(self._lock)
+                    entry = None
+                    break
+                condition.wait()
+        if entry is None:
+            return self._load(key)
+        if refresh:
+            # started outside the lock, so other keys are not held up by the thread start
+            Thread(target=self._refresh, args=[key], daemon=True).start()
+        return entry[0]
+
+    def _expired(self, loaded_at: float, now: float, fraction: float) -> bool:
+        return self._ttl is not None and now - loaded_at >= self._ttl * fraction
+
+    def _load(self, key: K) -> V:
+        start = monotonic()
+        try:
+            value = self._loader(key)
+        except BaseException:
+            with self._lock:
+                self._load_failures += 1
+                self._stale.discard(key)
+                self._loading.pop(key).notify_all()
+            raise
+        end = monotonic()
+        with self._lock:
+            self._loads += 1
+            self._load_time += end - start
+            self._loading.pop(key).notify_all()
+            if key in self._stale:
+                # invalidated while loading, hand the value to this caller only
+                self._stale.discard(key)
+                return value
+            self._refresh_failed.discard(key)
+            self._entries[key] = (value, end)
+            self._entries.move_to_end(key)
+            if self._max_size is not None:
+                while len(self._entries) > self._max_size:
+                    self._entries.popitem(last=False)
+        return value
+
+    def _refresh(self, key: K) -> None:
+        try:
+            self._load(key)
+        except Exception:
+            # the current value is served without further refreshes until it expires
+            with self._lock:
+                self._refresh_failed.add(key)
+
+    def invalidate(self, key: K) -> None:
+        """Drop `key` so that the next access loads it again.
+
+        A load of `key` that is running while invalidating is not stored.
+
+        Args:
+            key: Key to drop.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._refresh_failed.discard(key)
+            if key in self._loading:
+                self._stale.add(key)
+
+    def clear(self) -> None:
+        """Drop all entries. Loads that are running while clearing are not stored."""
+        with self._lock:
+            self._entries.clear()
+            self._refresh_failed.clear()
+            self._stale.update(self._loading)
+
+    @property
+    def stats(self) -> CacheStats:
+        """Return hit, miss and load statistics of AtomicCache.
+
+        Returns:
+            CacheStats: statistics of AtomicCache
+        """
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                loads=self._loads,
+                load_failures=self._load_failures,
+                load_time=self._load_time,
+            )
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)  # type: ignore
+            return entry is not None and not self._expired(entry[1], monotonic(), 1.0)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __str__(self) -> str:
+        with self._lock:
+            values = {k: v for k, (v, _) in self._entries.items()}
+        return f"{values}"
+
+    def __repr__(self) -> str:
+        return f"AtomicCache({str(self)})"
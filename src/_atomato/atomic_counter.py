@@ -6,6 +6,136 @@ from typing import SupportsInt
 from typing import Union
 
 from .atomic_object import AtomicObject
+from .atomic_object import WaiterStats
+from .deadline import CancellationToken
+from .deadline import WaitResult
+from .lock_backend import LockBackend
+
+
+class CounterBatch:
+    """CounterBatch applies many operations to an `AtomicCounter` under one lock acquisition.
+
+    Create it with `AtomicCounter.batch()` and use it as a context manager. The counter stays
+    locked while the batch is active; the operations change a local value that is published
+    with a single notification of the waiters when the block is left. Waiters and readers only
+    ever see the value from before or after the whole batch. An exception that leaves the block
+    discards the batch: the counter keeps its value from before the batch.
+
+    Example::
+
+        with counter.batch() as b:
+            for item in items:
+                b.inc(item.weight)
+    """
+
+    _counter: "AtomicCounter"
+    _value: int
+    _active: bool
+
+    def __init__(self, counter: "AtomicCounter"):
+        """Construct a `CounterBatch`, prefer `AtomicCounter.batch()`.
+
+        Args:
+            counter: Counter that the batch is applied to.
+        """
+        self._counter = counter
+        self._value = 0
+        self._active = False
+
+    def _check_active(self) -> None:
+        if not self._active:
+            raise RuntimeError("batch is only usable inside its with block")
+
+    def inc(self, d: Union[int, SupportsInt] = 1) -> int:
+        """Increase the batched value by `d`.
+
+        Args:
+            d: Value with which to increase the counter.
+
+        Returns:
+            int: batched value after increasing by `d`.
+
+        Raises:
+            RuntimeError: if the batch is not active.
+        """  # noqa: DAR402 - raised by _check_active
+        self._check_active()
+        self._value = self._counter._clamp(self._value + int(d))
+        return self._value
+
+    def dec(self, d: Union[int, SupportsInt] = 1) -> int:
+        """Decrease the batched value by `d`.
+
+        Args:
+            d: Value with which to decrease the counter.
+
+        Returns:
+            int: batched value after decreasing by `d`.
+
+        Raises:
+            RuntimeError: if the batch is not active.
+        """  # noqa: DAR402 - raised by _check_active
+        self._check_active()
+        self._value = self._counter._clamp(self._value - int(d))
+        return self._value
+
+    def set(self, d: Union[int, SupportsInt]) -> int:
+        """Set the batched value to `d`, clamped to the default like `inc` and `dec`.
+
+        Args:
+            d: Value that the counter will be set to.
+
+        Returns:
+            int: batched value after setting it.
+
+        Raises:
+            RuntimeError: if the batch is not active.
+        """  # noqa: DAR402 - raised by _check_active
+        self._check_active()
+        self._value = self._counter._clamp(int(d))
+        return self._value
+
+    def reset(self) -> int:
+        """Reset the batched value to the default value of the counter.
+
+        Returns:
+            int: batched value after resetting it.
+
+        Raises:
+            RuntimeError: if the batch is not active.
+        """  # noqa: DAR402 - raised by _check_active
+        return self.set(self._counter._default_value)
+
+    @property
+    def value(self) -> int:
+        """Return the batched value, including the operations applied so far.
+
+        Returns:
+            int: batched value.
+
+        Raises:
+            RuntimeError: if the batch is not active.
+        """  # noqa: DAR402 - raised by _check_active
+        self._check_active()
+        return self._value
+
+    def __enter__(self) -> "CounterBatch":
+        if self._active:
+            raise RuntimeError("batch is already active")
+        ao = self._counter._ao
+        ao._condition.acquire()
+        self._value = ao._object
+        self._active = True
+        return self
+
+    def __exit__(self, etype, value, traceback) -> None:  # type: ignore
+        ao = self._counter._ao
+        self._active = False
+        try:
+            # an exception discards the batch, a batch without net change wakes no one
+            if etype is None and self._value != ao._object:
+                ao._publish(self._value)
+        finally:
+            ao._condition.release()
 
 
 @total_ordering
@@ -20,6 +150,7 @@ class AtomicCounter:
         self,
         default_value: Union[int, SupportsInt] = 0,
         allow_below_default: bool = True,
+        lock: Optional[LockBackend] = None,
     ):
         """Construct an `AtomicCounter`.
 
@@ -27,13 +158,20 @@ class AtomicCounter:
             default_value: Default value that the AtomicCounter will be set to.
             allow_below_default: If True allow decreasing the value below the default.
                                  If False, the lowest value will always be the default value.
+            lock: `LockBackend` that creates the lock, a reentrant `threading.RLock` if None.
         """
-        self._ao = AtomicObject(int(default_value))
+        self._ao = AtomicObject(int(default_value), lock=lock)
         self._default_value = int(default_value)
         self._allow_below_default = allow_below_default
 
     def _wait(
-        self, predicate: str, d: Union[int, SupportsInt], timeout: Optional[float]
+        self,
+        predicate: str,
+        d: Union[int, SupportsInt],
+        timeout: Optional[float],
+        deadline: Optional[float],
+        cancel: Optional[CancellationToken],
+        priority: Optional[int],
     ) -> bool:
         m: Dict[str, Callable[[int, int], bool]] = {
             "==": lambda x, y: x == y,
@@ -45,18 +183,23 @@ class AtomicCounter:
         assert predicate in m.keys(), f"predicate {predicate} not found in {m.keys()}"
 
         return self._ao.wait_for(
-            predicate=lambda v: m[predicate](v, int(d)), timeout=timeout
+            predicate=lambda v: m[predicate](v, int(d)),
+            timeout=timeout,
+            deadline=deadline,
+            cancel=cancel,
+            priority=priority,
+        )
+
+    def _clamp(self, v: int) -> int:
+        return (
+            v
+            if self._allow_below_default or v >= self._default_value
+            else self._default_value
         )
 
     def _set(self, d: Union[int, SupportsInt] = 1) -> int:
-        with self._ao:
-            v = (
-                int(d)
-                if self._allow_below_default or int(d) >= self._default_value
-                else self._default_value
-            )
-            self._ao.set(v)
-            return v
+        v = self._clamp(int(d))
+        return self._ao._transform(lambda _: v)
 
     def inc(self, d: Union[int, SupportsInt] = 1) -> int:
         """Increase value of AtomicCounter by `d`.
@@ -67,7 +210,8 @@ class AtomicCounter:
         Returns:
             int: value after increasing by `d`
         """
-        return self._set(self.value + int(d))
+        delta = int(d)
+        return self._ao._transform(lambda v: self._clamp(v + delta))
 
     def dec(self, d: Union[int, SupportsInt] = 1) -> int:
         """Decrease value of AtomicCounter by `d`.
@@ -78,7 +222,8 @@ class AtomicCounter:
         Returns:
             int: value after decreasing by `d`
         """
-        return self._set(self.value - int(d))
+        delta = int(d)
+        return self._ao._transform(lambda v: self._clamp(v - delta))
 
     def reset(self) -> int:
         """Reset value of AtomicCounter to `default_value` (0 if not specified to constructor).
@@ -88,6 +233,17 @@ class AtomicCounter:
         """
         return self._set(self._default_value)
 
+    def batch(self) -> CounterBatch:
+        """Return a `CounterBatch` to apply many operations under a single lock acquisition.
+
+        The counter must not be changed through its own methods inside the batch, as the
+        batched value replaces the value when the batch is published.
+
+        Returns:
+            CounterBatch: batch to use as a context manager, see `CounterBatch`.
+        """
+        return CounterBatch(self)
+
     @property
     def value(self) -> int:
         """Return value of AtomicCounter.
@@ -98,7 +254,12 @@ class AtomicCounter:
         return self._ao.value
 
     def wait_equal(
-        self, d: Union[int, SupportsInt], timeout: Optional[float] = None
+        self,
+        d: Union[int, SupportsInt],
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+        priority: Optional[int] = None,
     ) -> bool:
         """Wait until AtomicCounter has a value of `d` or if `timeout` expired.
 
@@ -106,14 +267,32 @@ class AtomicCounter:
             d: Value to compare with
             timeout: Wait until `timeout` expired.
                      If `timeout` is None then blocks until condition is True (default: None)
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+            priority: If passed the wait is queued and woken in priority order, lower values first.
+                      See `AtomicObject.wait_for`.
 
         Returns:
-            bool: Return True if AtomicCounter's value is equal to `d`, False if the timeout expired.
+            bool: Return True if AtomicCounter's value is equal to `d`, False if the timeout or
+                  deadline expired or if the wait was cancelled.
         """
-        return self._wait(d=d, predicate="==", timeout=timeout)
+        return self._wait(
+            d=d,
+            predicate="==",
+            timeout=timeout,
+            deadline=deadline,
+            cancel=cancel,
+            priority=priority,
+        )
 
     def wait_below(
-        self, d: Union[int, SupportsInt], timeout: Optional[float] = None
+        self,
+        d: Union[int, SupportsInt],
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+        priority: Optional[int] = None,
     ) -> bool:
         """Wait until AtomicCounter has a value lower than `d` or if `timeout` expired.
 
@@ -121,14 +300,32 @@ class AtomicCounter:
             d: Value to compare with
             timeout: Wait until `timeout` expired.
                     If `timeout` is None then blocks until condition is True (default: None)
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+            priority: If passed the wait is queued and woken in priority order, lower values first.
+                      See `AtomicObject.wait_for`.
 
         Returns:
-            bool: Return True if AtomicCounter's value is below `d`, False if the timeout expired.
+            bool: Return True if AtomicCounter's value is below `d`, False if the timeout or deadline expired
+                  or if the wait was cancelled.
         """
-        return self._wait(d=d, predicate="<", timeout=timeout)
+        return self._wait(
+            d=d,
+            predicate="<",
+            timeout=timeout,
+            deadline=deadline,
+            cancel=cancel,
+            priority=priority,
+        )
 
     def wait_above(
-        self, d: Union[int, SupportsInt], timeout: Optional[float] = None
+        self,
+        d: Union[int, SupportsInt],
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+        priority: Optional[int] = None,
     ) -> bool:
         """Wait until AtomicCounter has a value higher than `d` or if `timeout` expired.
 
@@ -136,11 +333,57 @@ class AtomicCounter:
             d: Value to compare with
             timeout: Wait until `timeout` expired.
                      If `timeout` is None then blocks until condition is True (default: None)
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+            priority: If passed the wait is queued and woken in priority order, lower values first.
+                      See `AtomicObject.wait_for`.
+
+        Returns:
+            bool: Return True if AtomicCounter's value is above `d`, False if the timeout or deadline expired
+                  or if the wait was cancelled.
+        """
+        return self._wait(
+            d=d,
+            predicate=">",
+            timeout=timeout,
+            deadline=deadline,
+            cancel=cancel,
+            priority=priority,
+        )
+
+    def wait_for_result(
+        self,
+        predicate: Callable[[int], bool],
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+        priority: Optional[int] = None,
+    ) -> WaitResult:
+        """Wait until `predicate` holds for the value of AtomicCounter, reporting why the wait ended.
+
+        Args:
+            predicate: Function or lambda that takes the value and returns True if the predicate holds true.
+            timeout: Wait until `timeout` expired.
+                     If `timeout` is None then blocks until condition is True (default: None)
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+            priority: If passed the wait is queued and woken in priority order, lower values first.
+                      See `AtomicObject.wait_for`.
+
+        Returns:
+            WaitResult: outcome of the wait and the time spent waiting.
+        """
+        return self._ao.wait_for_result(predicate, timeout, deadline, cancel, priority)
+
+    def waiter_stats(self) -> WaiterStats:
+        """Return amount and age of the priority-ordered waiters of AtomicCounter.
 
         Returns:
-            bool: Return True if AtomicCounter's value is above `d`, False if the timeout expired.
+            WaiterStats: amount of queued waiters and seconds the oldest one is waiting.
         """
-        return self._wait(d=d, predicate=">", timeout=timeout)
+        return self._ao.waiter_stats()
 
     def __eq__(self, other: object) -> bool:
         if not hasattr(other, "__int__"):
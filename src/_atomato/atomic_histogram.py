@@ -0,0 +1,389 @@
+import weakref
+from array import array
+from bisect import bisect_left
+from collections import deque
+from functools import partial
+from math import ceil
+from threading import Lock
+from threading import local
+from time import monotonic
+from typing import Any
+from typing import Deque
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from .after_fork import call_fork_safe
+from .after_fork import track
+
+
+class HistogramSnapshot:
+    """Immutable view of the bucket counts of an AtomicHistogram at one point in time."""
+
+    __slots__ = ("bounds", "counts", "total")
+
+    bounds: Tuple[float, ...]
+    counts: Tuple[int, ...]
+    total: float
+
+    def __init__(self, bounds: Tuple[float, ...], counts: Tuple[int, ...], total: float):
+        """Construct a `HistogramSnapshot`.
+
+        Args:
+            bounds: Inclusive upper bounds of the buckets.
+            counts: Observations per bucket, one more than `bounds` for values above the last bound.
+            total: Sum of all observed values.
+        """
+        self.bounds = bounds
+        self.counts = counts
+        self.total = total
+
+    @property
+    def count(self) -> int:
+        """Return amount of observations.
+
+        Returns:
+            int: amount of observations
+        """
+        return sum(self.counts)
+
+    @property
+    def mean(self) -> float:
+        """Return mean of the observations, 0.0 if there are none.
+
+        Returns:
+            float: mean of the observations
+        """
+        count = self.count
+        return self.total / count if count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Return the upper bound of the bucket that holds the `q`-th percentile.
+
+        Values above the last bound are reported as the last bound.
+
+        Args:
+            q: Percentile between 0 and 100.
+
+        Returns:
+            float: upper bound of the bucket, 0.0 if there are no observations.
+
+        Raises:
+            ValueError: if `q` is not between 0 and 100.
+        """
+        if not 0 <= q <= 100:
+            raise ValueError(f"q should be between 0 and 100, got {q}")
+        count = self.count
+        if not count:
+            return 0.0
+        rank = max(ceil(count * q / 100), 1)
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts[:-1], strict=True):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.bounds[-1]
+
+    def __sub__(self, other: "HistogramSnapshot") -> "HistogramSnapshot":
+        return HistogramSnapshot(
+            self.bounds,
+            tuple(a - b for a, b in zip(self.counts, other.counts, strict=True)),
+            self.total - other.total,
+        )
+
+    def __repr__(self) -> str:
+        return f"HistogramSnapshot(count={self.count}, mean={self.mean})"
+
+
+class _Shard:
+    __slots__ = ("counts", "total")
+
+    counts: "array[int]"
+    total: "array[float]"
+
+    def __init__(self, buckets: int):
+        self.counts = array("Q", bytes(8 * buckets))
+        self.total = array("d", [0.0])
+
+
+class _Owner:
+    """Thread-local token whose collection at thread exit retires the shard."""
+
+    __slots__ = ("shard", "__weakref__")
+
+    shard: _Shard
+
+    def __init__(self, shard: _Shard):
+        self.shard = shard
+
+
+def _retire(histogram: "weakref.ref[AtomicHistogram]", shard: _Shard) -> None:
+    h = histogram()
+    if h is not None:
+        with h._lock:
+            retired = h._shards[0]
+            for i, n in enumerate(shard.counts.tolist()):
+                retired.counts[i] += n
+            retired.total[0] += shard.total[0]
+            h._shards.remove(shard)
+
+
+class AtomicHistogram:
+    """AtomicHistogram records observations into buckets without taking a lock per observation.
+
+    Every thread records into its own compact array of bucket counts, which only that thread
+    writes to. Reads merge the arrays of all threads into a `HistogramSnapshot`. When a thread
+    exits its counts are folded into a shared retired array, so thread churn does not grow the
+    histogram. Pickled copies hold the merged counts and the window checkpoints.
+    """
+
+    _bounds: Tuple[float, ...]
+    _local: local
+    _shards: List[_Shard]
+    _lock: Lock
+    _window: Optional[float]
+    _checkpoints: Deque[Tuple[float, HistogramSnapshot]]
+    _rotations: int
+    _rotation_interval: float
+
+    def __init__(
+        self,
+        bounds: Sequence[float],
+        window: Optional[float] = None,
+        rotations: int = 6,
+    ):
+        """Construct an `AtomicHistogram`.
+
+        Args:
+            bounds: Inclusive upper bounds of the buckets, in increasing order. Values above the
+                    last bound are counted in an extra overflow bucket.
+            window: Seconds covered by `window_snapshot`, e.g. 60 for a "last minute" view.
+                    If None `window_snapshot` is not available.
+            rotations: Amount of checkpoints the window is divided in. More rotations make the
+                       window more precise at the cost of memory.
+
+        Raises:
+            ValueError: if `bounds` is empty or not strictly increasing, `window` is not positive
+                        or `rotations` is lower than 1.
+        """
+        if not bounds or any(a >= b for a, b in zip(bounds[:-1], bounds[1:], strict=True)):
+            raise ValueError("bounds should be non-empty and strictly increasing")
+        if window is not None and window <= 0:
+            raise ValueError(f"window should be positive, got {window}")
+        if rotations < 1:
+            raise ValueError(f"rotations should be at least 1, got {rotations}")
+        self._bounds = tuple(bounds)
+        self._init_sync()
+        self._window = window
+        self._rotations = rotations
+        self._rotation_interval = window / rotations if window else 0.0
+        self._checkpoints = deque(maxlen=rotations + 1)
+        if window:
+            self._checkpoints.append((monotonic(), self._empty()))
+        track(self)
+
+    def _init_sync(self) -> None:
+        self._local = local()
+        # the first shard holds the counts of exited threads
+        self._shards = [_Shard(len(self._bounds) + 1)]
+        self._lock = Lock()
+
+    def _after_fork(self) -> None:
+        # shards of the parent's other threads are retired once their finalizers run
+        self._lock = Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the bounds, merged counts and window checkpoints, with their ages."""
+        now = monotonic()
+        current = self.snapshot()
+        with self._lock:
+            checkpoints = [(now - taken_at, s.counts, s.total) for taken_at, s in self._checkpoints]
+        return {
+            "bounds": self._bounds,
+            "counts": current.counts,
+            "total": current.total,
+            "window": self._window,
+            "rotations": self._rotations,
+            "checkpoints": checkpoints,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled AtomicHistogram, its counts held by the retired shard."""
+        self._bounds = state["bounds"]
+        self._init_sync()
+        retired = self._shards[0]
+        retired.counts = array("Q", state["counts"])
+        retired.total[0] = state["total"]
+        self._window = state["window"]
+        self._rotations = rotations = state["rotations"]
+        self._rotation_interval = self._window / rotations if self._window else 0.0
+        now = monotonic()
+        self._checkpoints = deque(
+            (
+                (now - age, HistogramSnapshot(self._bounds, counts, total))
+                for age, counts, total in state["checkpoints"]
+            ),
+            maxlen=rotations + 1,
+        )
+        track(self)
+
+    @classmethod
+    def log_linear(
+        cls,
+        lowest: float,
+        highest: float,
+        sub_buckets: int = 4,
+        window: Optional[float] = None,
+    ) -> "AtomicHistogram":
+        """Construct an `AtomicHistogram` with log-linear buckets between `lowest` and `highest`.
+
+        Every power of two between `lowest` and `highest` is divided in `sub_buckets` linear
+        buckets, which bounds the relative error of percentiles to about 1 / `sub_buckets`.
+
+        Args:
+            lowest: Upper bound of the first bucket, must be positive.
+            highest: Values above are counted in the overflow bucket.
+            sub_buckets: Amount of linear buckets per power of two.
+            window: See `AtomicHistogram`.
+
+        Returns:
+            AtomicHistogram: histogram with log-linear buckets.
+
+        Raises:
+            ValueError: if `lowest` is not positive or `highest` is not above `lowest`.
+        """
+        if lowest <= 0 or highest <= lowest:
+            raise ValueError("lowest should be positive and below highest")
+        bounds = [lowest]
+        base = lowest
+        while bounds[-1] < highest:
+            step = base / sub_buckets
+            bounds.extend(base + step * i for i in range(1, sub_buckets + 1))
+            base *= 2
+        return cls(bounds, window=window)
+
+    def _empty(self) -> HistogramSnapshot:
+        return HistogramSnapshot(self._bounds, (0,) * (len(self._bounds) + 1), 0.0)
+
+    def _shard(self) -> _Shard:
+        owner: Optional[_Owner] = getattr(self._local, "owner", None)
+        if owner is None:
+            owner = self._local.owner = _Owner(_Shard(len(self._bounds) + 1))
+            with self._lock:
+                self._shards.append(owner.shard)
+            weakref.finalize(
+                owner, call_fork_safe, partial(_retire, weakref.ref(self), owner.shard)
+            )
+        return owner.shard
+
+    def observe(self, value: float) -> None:
+        """Record `value`.
+
+        Args:
+            value: Observed value, e.g. a latency in seconds.
+        """
+        shard = self._shard()
+        shard.counts[bisect_left(self._bounds, value)] += 1
+        shard.total[0] += value
+
+    def observe_many(self, values: Iterable[float]) -> None:
+        """Record all `values` at once.
+
+        Args:
+            values: Observed values.
+        """
+        shard = self._shard()
+        bounds = self._bounds
+        counts = shard.counts
+        total = 0.0
+        for value in values:
+            counts[bisect_left(bounds, value)] += 1
+            total += value
+        shard.total[0] += total
+
+    def snapshot(self) -> HistogramSnapshot:
+        """Return all observations since construction, merged over all threads.
+
+        Bucket counts are copied per thread in one pass. Observations that race with the
+        snapshot are either fully counted in their bucket or not at all, so the count and the
+        percentiles always agree. Only `total` may lag behind by those racing observations.
+        Shards are merged under the lock, so an exiting thread is never counted twice.
+
+        Returns:
+            HistogramSnapshot: merged bucket counts.
+        """
+        counts = [0] * (len(self._bounds) + 1)
+        total = 0.0
+        with self._lock:
+            for shard in self._shards:
+                for i, n in enumerate(shard.counts.tolist()):
+                    counts[i] += n
+                total += shard.total[0]
+        return HistogramSnapshot(self._bounds, tuple(counts), total)
+
+    def rotate(self) -> None:
+        """Take a window checkpoint if one is due.
+
+        Checkpoints are taken lazily by `window_snapshot`. Call this periodically if windows are
+        read less often than once every `window / rotations` seconds.
+
+        Raises:
+            ValueError: if the histogram was constructed without a `window`.
+        """
+        if not self._window:
+            raise ValueError("histogram has no window")
+        self._rotate(monotonic())
+
+    def _rotate(self, now: float) -> None:
+        with self._lock:
+            due = now - self._checkpoints[-1][0] >= self._rotation_interval
+        if due:
+            current = self.snapshot()
+            with self._lock:
+                self._checkpoints.append((now, current))
+
+    def window_snapshot(self) -> HistogramSnapshot:
+        """Return the observations of roughly the last `window` seconds.
+
+        The view starts at the oldest checkpoint within the window, so it covers between
+        `window * (1 - 1 / rotations)` and `window` seconds when read at least once every
+        `window / rotations` seconds. After a longer pause it starts at the moment of reading.
+
+        Returns:
+            HistogramSnapshot: bucket counts of the window.
+
+        Raises:
+            ValueError: if the histogram was constructed without a `window`.
+        """
+        if not self._window:
+            raise ValueError("histogram has no window")
+        now = monotonic()
+        self._rotate(now)
+        current = self.snapshot()
+        with self._lock:
+            # rotating guarantees the newest checkpoint is within the window
+            base = next(
+                checkpoint
+                for taken_at, checkpoint in self._checkpoints
+                if now - taken_at < self._window
+            )
+        return current - base
+
+    @property
+    def bounds(self) -> Tuple[float, ...]:
+        """Return the bucket bounds of AtomicHistogram.
+
+        Returns:
+            Tuple[float, ...]: inclusive upper bounds of the buckets
+        """
+        return self._bounds
+
+    def __str__(self) -> str:
+        s = self.snapshot()
+        return f"count={s.count}, mean={s.mean}"
+
+    def __repr__(self) -> str:
+        return f"AtomicHistogram({str(self)})"
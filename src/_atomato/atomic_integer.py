@@ -1,19 +1,26 @@
+from typing import Optional
 from typing import SupportsInt
 from typing import Union
 
 from .atomic_counter import AtomicCounter
+from .lock_backend import LockBackend
 
 
 class AtomicInteger(AtomicCounter):
     """AtomicState allows to store an integer in a threadsafe way."""
 
-    def __init__(self, default_value: Union[int, SupportsInt] = 0):
+    def __init__(
+        self,
+        default_value: Union[int, SupportsInt] = 0,
+        lock: Optional[LockBackend] = None,
+    ):
         """Construct an `AtomicInteger`.
 
         Args:
             default_value: Default value that the AtomicInteger will be set to.
+            lock: `LockBackend` that creates the lock, a reentrant `threading.RLock` if None.
         """
-        super().__init__(default_value, allow_below_default=True)
+        super().__init__(default_value, allow_below_default=True, lock=lock)
 
     def set(self, d: Union[int, SupportsInt] = 0) -> int:
         """Set AtomicInteger to `d`.
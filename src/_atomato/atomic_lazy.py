@@ -0,0 +1,134 @@
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Generic
+from typing import Optional
+from typing import TypeVar
+
+from .after_fork import track
+from .atomic_object import AtomicObject
+
+
+T = TypeVar("T")
+
+
+class _Slot(Generic[T]):
+    __slots__ = ("value", "loaded", "loading", "generation")
+
+    value: Optional[T]
+    loaded: bool
+    loading: bool
+    generation: int
+
+    def __init__(self) -> None:
+        self.value = None
+        self.loaded = False
+        self.loading = False
+        self.generation = 0
+
+    def fill(self, value: T, generation: int) -> None:
+        # a reset during the load makes its value stale, so it is not kept
+        if generation == self.generation:
+            self.value = value
+            self.loaded = True
+        self.loading = False
+
+    def abort(self) -> None:
+        self.loading = False
+
+    def clear(self) -> None:
+        self.value = None
+        self.loaded = False
+        self.generation += 1
+
+
+class AtomicLazy(Generic[T]):
+    """AtomicLazy computes a value on first access, exactly once, no matter how many threads race.
+
+    The first caller runs the loader outside of any lock while all other callers wait for its
+    result. If the loader raises, the exception is propagated to that caller and one of the
+    waiting callers takes over.
+
+    Pickled copies hold the loader and the loaded value, if any. In a child created by `os.fork`
+    a load that ran in another thread of the parent is abandoned, the next access loads again.
+    """
+
+    _loader: Callable[[], T]
+    _ao: AtomicObject[_Slot[T]]
+
+    def __init__(self, loader: Callable[[], T]):
+        """Construct an `AtomicLazy`.
+
+        Args:
+            loader: Function that computes the value. Called at most once per (re)load.
+        """
+        self._loader = loader
+        self._ao = AtomicObject(_Slot())
+        track(self)
+
+    def _after_fork(self) -> None:
+        self._ao._object.abort()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the loader and the loaded value, a running load is not pickled."""
+        with self._ao:
+            slot = self._ao.value
+            return {"loader": self._loader, "loaded": slot.loaded, "value": slot.value}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled AtomicLazy."""
+        self._loader = state["loader"]
+        slot: _Slot[T] = _Slot()
+        slot.value = state["value"]
+        slot.loaded = state["loaded"]
+        self._ao = AtomicObject(slot)
+        track(self)
+
+    @property
+    def value(self) -> T:
+        """Return value of AtomicLazy, loading it first if that has not happened yet.
+
+        Returns:
+            T: value of AtomicLazy
+
+        Raises:
+            BaseException: whatever `loader` raises, the next access loads again.
+        """
+        with self._ao:
+            self._ao.wait_for(lambda s: s.loaded or not s.loading)
+            slot = self._ao.value
+            if slot.loaded:
+                return slot.value  # type: ignore
+            slot.loading = True
+            generation = slot.generation
+
+        try:
+            value = self._loader()
+        except BaseException:
+            self._ao.set_by(lambda s: s.abort())
+            raise
+        self._ao.set_by(lambda s: s.fill(value, generation))
+        return value
+
+    @property
+    def loaded(self) -> bool:
+        """Return whether the value of AtomicLazy has been loaded.
+
+        Returns:
+            bool: True if the value has been loaded.
+        """
+        return self._ao.value.loaded
+
+    def reset(self) -> None:
+        """Drop the loaded value so that the next access loads it again.
+
+        A load that is running while resetting is not kept.
+        """
+        self._ao.set_by(lambda s: s.clear())
+
+    def __str__(self) -> str:
+        slot = self._ao.value
+        return f"{slot.value}" if slot.loaded else "<not loaded>"
+
+    def __repr__(self) -> str:
+        return f"AtomicLazy({str(self)})"
@@ -0,0 +1,308 @@
+from threading import Condition
+from threading import Lock
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Generic
+from typing import Hashable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import TypeVar
+
+from .after_fork import track
+from .deadline import CancellationToken
+from .deadline import wait_on
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class _Stripe(Generic[K, V]):
+    """A lock guarding a shard of the keys of an AtomicMap, plus the waiters for those keys."""
+
+    __slots__ = ("lock", "data", "waiters")
+
+    lock: Lock
+    data: Dict[K, V]
+    waiters: Dict[K, Tuple[Condition, int]]
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.data = {}
+        self.waiters = {}
+
+    def notify(self, key: K) -> None:
+        waiter = self.waiters.get(key)
+        if waiter is not None:
+            waiter[0].notify_all()
+
+
+class AtomicMap(Generic[K, V]):
+    """AtomicMap is a threadsafe mapping that stripes its locking over the hash of the keys.
+
+    Operations on keys in different stripes never contend, and waiters for a key are only woken by
+    writes to that key. Pickling copies the items stripe by stripe, like `items`.
+    """
+
+    _stripes: List[_Stripe[K, V]]
+
+    def __init__(self, stripes: int = 16):
+        """Construct an `AtomicMap`.
+
+        Args:
+            stripes: Amount of independently locked shards the keys are spread over.
+
+        Raises:
+            ValueError: if `stripes` is lower than 1.
+        """
+        if stripes < 1:
+            raise ValueError(f"stripes should be at least 1, got {stripes}")
+        self._stripes = [_Stripe() for _ in range(stripes)]
+        track(self)
+
+    def _after_fork(self) -> None:
+        for stripe in self._stripes:
+            stripe.lock = Lock()
+            stripe.waiters = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the amount of stripes and the items, the locks and waiters are not pickled."""
+        return {"stripes": len(self._stripes), "items": list(self.items())}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled AtomicMap, redistributing the items as hashes differ per process."""
+        self._stripes = [_Stripe() for _ in range(state["stripes"])]
+        for key, value in state["items"]:
+            self._stripe(key).data[key] = value
+        track(self)
+
+    def _stripe(self, key: K) -> _Stripe[K, V]:
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """Return value for `key`, or `default` if `key` is absent.
+
+        Args:
+            key: Key to look up.
+            default: Value to return when `key` is absent.
+
+        Returns:
+            Optional[V]: value for `key` or `default`.
+        """
+        stripe = self._stripe(key)
+        with stripe.lock:
+            return stripe.data.get(key, default)
+
+    def set(self, key: K, value: V) -> V:
+        """Set `key` to `value`.
+
+        Args:
+            key: Key to set.
+            value: Value to set `key` to.
+
+        Returns:
+            V: value after setting.
+        """
+        stripe = self._stripe(key)
+        with stripe.lock:
+            stripe.data[key] = value
+            stripe.notify(key)
+            return value
+
+    def pop(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """Remove `key` and return its value, or `default` if `key` is absent.
+
+        Args:
+            key: Key to remove.
+            default: Value to return when `key` is absent.
+
+        Returns:
+            Optional[V]: value `key` had or `default`.
+        """
+        stripe = self._stripe(key)
+        with stripe.lock:
+            if key not in stripe.data:
+                return default
+            value = stripe.data.pop(key)
+            stripe.notify(key)
+            return value
+
+    def compute(self, key: K, fn: Callable[[Optional[V]], Optional[V]]) -> Optional[V]:
+        """Atomically replace value of `key` by `fn(current value)`.
+
+        Args:
+            key: Key to compute.
+            fn: Function that takes the current value (None if absent) and returns the new one.
+                Returning None removes `key`.
+
+        Returns:
+            Optional[V]: value after computing, None if `key` was removed.
+
+        Example::
+
+            m = AtomicMap()
+            m.compute("hits", lambda v: (v or 0) + 1)
+            assert m.get("hits") == 1
+        """
+        stripe = self._stripe(key)
+        with stripe.lock:
+            value = fn(stripe.data.get(key))
+            if value is not None:
+                stripe.data[key] = value
+            elif key in stripe.data:
+                del stripe.data[key]
+            else:
+                return None
+            stripe.notify(key)
+            return value
+
+    def compute_if_absent(self, key: K, fn: Callable[[K], V]) -> V:
+        """Return value of `key`, atomically setting it to `fn(key)` first if `key` is absent.
+
+        Args:
+            key: Key to compute.
+            fn: Function that takes `key` and returns its initial value.
+
+        Returns:
+            V: value of `key`.
+        """
+        stripe = self._stripe(key)
+        with stripe.lock:
+            if key in stripe.data:
+                return stripe.data[key]
+            value = stripe.data[key] = fn(key)
+            stripe.notify(key)
+            return value
+
+    def merge(self, key: K, value: V, fn: Callable[[V, V], V]) -> V:
+        """Atomically set `key` to `value` if absent, or else to `fn(current value, value)`.
+
+        Args:
+            key: Key to merge into.
+            value: Value to merge.
+            fn: Function that takes the current and the passed value and returns the merged one.
+
+        Returns:
+            V: value after merging.
+        """
+        stripe = self._stripe(key)
+        with stripe.lock:
+            if key in stripe.data:
+                value = fn(stripe.data[key], value)
+            stripe.data[key] = value
+            stripe.notify(key)
+            return value
+
+    def wait_key(
+        self,
+        key: K,
+        predicate: Callable[[Optional[V]], bool],
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bool:
+        """Wait for value of `key` by passing a `predicate`.
+
+        Only writes to `key` wake the waiter, writes to other keys do not.
+
+        Args:
+            key: Key to wait for.
+            predicate: Function that takes the value of `key` (None if absent) and returns True
+                       if the predicate holds true.
+            timeout: Wait time until predicate holds true or the passed `timeout` expired.
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+
+        Returns:
+            bool: True if predicate is true. False if the timeout or deadline expired or if the
+                  wait was cancelled.
+        """
+        stripe = self._stripe(key)
+        with stripe.lock:
+            waiter = stripe.waiters.get(key)
+            condition, refs = waiter if waiter else (Condition(stripe.lock), 0)
+            stripe.waiters[key] = (condition, refs + 1)
+            try:
+                return bool(
+                    wait_on(
+                        condition,
+                        lambda: predicate(stripe.data.get(key)),
+                        timeout,
+                        deadline,
+                        cancel,
+                    )
+                )
+            finally:
+                condition, refs = stripe.waiters[key]
+                if refs == 1:
+                    del stripe.waiters[key]
+                else:
+                    stripe.waiters[key] = (condition, refs - 1)
+
+    def items(self) -> Iterator[Tuple[K, V]]:
+        """Iterate over the (key, value) pairs of the AtomicMap.
+
+        Iteration is weakly consistent: each stripe is copied under its own lock when reached, so
+        writers are never blocked for the whole iteration. Writes made during iteration may or may
+        not be reflected.
+
+        Yields:
+            Tuple[K, V]: (key, value) pairs.
+        """
+        for stripe in self._stripes:
+            with stripe.lock:
+                entries = list(stripe.data.items())
+            yield from entries
+
+    def keys(self) -> Iterator[K]:
+        """Iterate over the keys of the AtomicMap, weakly consistent like `items`.
+
+        Yields:
+            K: keys.
+        """
+        for key, _ in self.items():
+            yield key
+
+    def values(self) -> Iterator[V]:
+        """Iterate over the values of the AtomicMap, weakly consistent like `items`.
+
+        Yields:
+            V: values.
+        """
+        for _, value in self.items():
+            yield value
+
+    def __iter__(self) -> Iterator[K]:
+        return self.keys()
+
+    def __contains__(self, key: object) -> bool:
+        stripe = self._stripe(key)  # type: ignore
+        with stripe.lock:
+            return key in stripe.data
+
+    def __len__(self) -> int:
+        return sum(len(stripe.data) for stripe in self._stripes)
+
+    def __getitem__(self, key: K) -> V:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            return stripe.data[key]
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self.set(key, value)
+
+    def __delitem__(self, key: K) -> None:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            del stripe.data[key]
+            stripe.notify(key)
+
+    def __str__(self) -> str:
+        return f"{dict(self.items())}"
+
+    def __repr__(self) -> str:
+        return f"AtomicMap({str(self)})"
@@ -1,29 +1,79 @@
+from bisect import bisect_left
+from bisect import insort
 from functools import total_ordering
 from inspect import isclass
+from itertools import count
 from threading import Condition
+from time import monotonic
 from typing import Any
 from typing import Callable
 from typing import Dict
 from typing import Generic
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
 from typing import Optional
 from typing import Tuple
 from typing import Type
 from typing import TypeVar
 from typing import Union
 
+from .after_fork import track
+from .deadline import CancellationToken
+from .deadline import WaitResult
+from .deadline import wait_on
+from .lock_backend import LockBackend
+from .lock_backend import default_lock_backend
+
 
 T = TypeVar("T")
 
 
+class WaiterStats(NamedTuple):
+    """Statistics of the priority-ordered waiters of an AtomicObject."""
+
+    waiters: int
+    oldest: float
+
+
+class _Waiter:
+    """A priority-ordered wait, with its own condition on the lock of the AtomicObject."""
+
+    __slots__ = ("priority", "seq", "condition", "since", "woken")
+
+    priority: int
+    seq: int
+    condition: Condition
+    since: float
+    woken: bool
+
+    def __init__(self, priority: int, seq: int, condition: Condition):
+        self.priority = priority
+        self.seq = seq
+        self.condition = condition
+        self.since = monotonic()
+        self.woken = False
+
+
 @total_ordering
 class AtomicObject(Generic[T]):
     """AtomicObject allows to synchronize access for an underlying variable."""
 
+    _lock: Any
     _condition: Condition
     _object: T
+    _version: int
+    _sequence: int
+    _lock_backend: LockBackend
+    _queue: List[Tuple[int, int, _Waiter]]
+    _seq: Iterator[int]
 
     def __init__(
-        self, obj: Union[T, Type[T]], *args: Tuple[Any, ...], **kwargs: Dict[str, Any]
+        self,
+        obj: Union[T, Type[T]],
+        *args: Tuple[Any, ...],
+        lock: Optional[LockBackend] = None,
+        **kwargs: Dict[str, Any],
     ):
         """Construct an `AtomicObject` for `instance` by inline creating .
 
@@ -35,15 +85,53 @@ class AtomicObject(Generic[T]):
 
             Pass by instance or by class type. Both offer advantages so both are supported.
 
+            AtomicObject(0, lock=PlainLockBackend()) # choose the locking strategy
+
         Args:
             obj: An instance or class that will be encapsulated in `AtomicObject`.
             args: If passing a class type to `obj` then these will be the args
                   for delayed construction.
+            lock: `LockBackend` that creates the lock, a reentrant `threading.RLock` if None.
+                  Note that a keyword argument named `lock` is never passed on to `obj`.
             kwargs: If passing a class type to `obj` then these will be the keyword args
                     for delayed construction.
         """
-        self._condition = Condition()
+        self._lock_backend = lock if lock is not None else default_lock_backend()
         self._object = obj(*args, **kwargs) if isclass(obj) else obj
+        self._version = 0
+        self._init_sync()
+        track(self)
+
+    def _init_sync(self) -> None:
+        self._lock = self._lock_backend.lock()
+        self._condition = self._lock_backend.condition(self._lock)
+        self._sequence = 0
+        self._queue = []
+        self._seq = count()
+
+    def _after_fork(self) -> None:
+        if self._lock_backend.process_shared:
+            # the locks are still shared with the parent, only the threads are gone
+            self._queue = []
+            self._sequence += self._sequence & 1
+        else:
+            self._init_sync()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the value, version and lock backend, the locks and waiters are not pickled."""
+        return {
+            "object": self._object,
+            "version": self._version,
+            "lock_backend": self._lock_backend,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled AtomicObject with a new lock of its lock backend."""
+        self._object = state["object"]
+        self._version = state["version"]
+        self._lock_backend = state["lock_backend"]
+        self._init_sync()
+        track(self)
 
     @property
     def value(self) -> T:
@@ -55,17 +143,104 @@ class AtomicObject(Generic[T]):
         with self._condition:
             return self._object
 
+    @property
+    def version(self) -> int:
+        """Return version of AtomicObject, incremented by every change.
+
+        Returns:
+            int: version of AtomicObject
+        """
+        with self._condition:
+            return self._version
+
+    def read_versioned(self) -> Tuple[T, int]:
+        """Return value and version of AtomicObject, read together.
+
+        Returns:
+            Tuple[T, int]: value and version of AtomicObject
+
+        Example::
+
+            a = AtomicObject(0)
+            assert a.read_versioned() == (0, 0)
+        """
+        with self._condition:
+            return self._object, self._version
+
+    def compare_and_set(self, expected_version: int, value: T) -> bool:
+        """Set value of AtomicObject only if it did not change since `expected_version` was read.
+
+        Args:
+            expected_version: Version returned by `read_versioned` alongside the value `value`
+                              was computed from.
+            value: Value that the AtomicObject will be set to.
+
+        Returns:
+            bool: True if the value was set, False if another change came first.
+        """
+        with self._condition:
+            if self._version != expected_version:
+                return False
+            self._publish(value)
+            return True
+
+    def update(self, fn: Callable[[T], T], max_retries: int = 8) -> T:
+        """Replace value of AtomicObject by `fn(value)`, calling `fn` outside of the lock.
+
+        Readers and waiters are not blocked while `fn` runs. If another change is published in
+        the meantime, `fn` is retried on the newer value. After `max_retries` failed attempts `fn`
+        is applied once more while holding the lock, so the update always completes.
+
+        `fn` may run several times and must return a new value instead of modifying the one it
+        is given.
+
+        Args:
+            fn: Function that takes the current value and returns the new value.
+            max_retries: Amount of optimistic attempts before falling back to holding the lock.
+
+        Returns:
+            T: Value of AtomicObject after updating it.
+
+        Example::
+
+            config = AtomicObject({"hosts": ()})
+            config.update(lambda c: {**c, "hosts": resolve_hosts()})
+        """
+        for _ in range(max_retries):
+            value, version = self.read_versioned()
+            new_value = fn(value)
+            if self.compare_and_set(version, new_value):
+                return new_value
+        return self._transform(fn)
+
     def wait_for(
-        self, predicate: Callable[[T], bool], timeout: Optional[float] = None
+        self,
+        predicate: Callable[[T], bool],
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+        priority: Optional[int] = None,
     ) -> bool:
         """Wait for a value of an AtomicObject by passing a `predicate`.
 
+        `threading.Condition` wakes waiters in no particular order. Waits that pass a `priority`
+        are instead queued: after every change the queued waiters re-check their predicate one at
+        a time, in priority order, each after the previous one released the lock. A waiter that
+        acts on the value while still holding the lock, e.g. inside `with a:`, therefore acts
+        before every waiter queued behind it. Waits whose predicate already holds return at once.
+
         Args:
             predicate: Function or lambda that takes a `T` and returns True if the predicate holds true.
             timeout: Wait time until predicate holds true or the passed `timeout` expired.
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+            priority: If passed the wait is queued in priority order instead of waiting on the
+                      shared condition. Lower values are woken first, equal values in FIFO order.
 
         Returns:
-            bool: True if predicate is true. False if `timeout` has expired.
+            bool: True if predicate is true. False if `timeout` or `deadline` has expired
+                  or if the wait was cancelled.
 
         Example::
 
@@ -83,10 +258,110 @@ class AtomicObject(Generic[T]):
             vb = a.wait_for(lambda mc: mc.value == 1, timeout=0.1)
             assert vb is False
         """
+        return bool(
+            self.wait_for_result(predicate, timeout, deadline, cancel, priority)
+        )
+
+    def wait_for_result(
+        self,
+        predicate: Callable[[T], bool],
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+        priority: Optional[int] = None,
+    ) -> WaitResult:
+        """Wait for a value of an AtomicObject like `wait_for`, reporting why the wait ended.
+
+        Args:
+            predicate: Function or lambda that takes a `T` and returns True if the predicate holds true.
+            timeout: Wait time until predicate holds true or the passed `timeout` expired.
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+            priority: If passed the wait is queued in priority order instead of waiting on the
+                      shared condition. Lower values are woken first, equal values in FIFO order.
+
+        Returns:
+            WaitResult: outcome of the wait and the time spent waiting. True if predicate is true.
+
+        Example::
+
+            budget = time.monotonic() + 0.5
+            r = a.wait_for_result(lambda v: v > 0, deadline=budget)
+            if r.outcome is WaitOutcome.TIMEOUT:
+                ...
+        """
         with self._condition:
-            return self._condition.wait_for(
-                predicate=lambda: predicate(self._object), timeout=timeout
+            if priority is None:
+                return wait_on(
+                    self._condition,
+                    lambda: predicate(self._object),
+                    timeout=timeout,
+                    deadline=deadline,
+                    cancel=cancel,
+                )
+            waiter = _Waiter(
+                priority, next(self._seq), self._lock_backend.condition(self._lock)
             )
+            insort(self._queue, (priority, waiter.seq, waiter))
+
+            def satisfied() -> bool:
+                if waiter.woken:
+                    # pass the wakeup on, the next waiter runs once this one releases the lock
+                    waiter.woken = False
+                    self._wake_after(waiter)
+                return predicate(self._object)
+
+            try:
+                return wait_on(
+                    waiter.condition,
+                    satisfied,
+                    timeout=timeout,
+                    deadline=deadline,
+                    cancel=cancel,
+                )
+            finally:
+                del self._queue[self._position(waiter)]
+
+    def _position(self, waiter: _Waiter) -> int:
+        return bisect_left(self._queue, (waiter.priority, waiter.seq))
+
+    def _wake(self, index: int) -> None:
+        if index < len(self._queue):
+            waiter = self._queue[index][2]
+            waiter.woken = True
+            waiter.condition.notify()
+
+    def _wake_after(self, waiter: _Waiter) -> None:
+        self._wake(self._position(waiter) + 1)
+
+    def _publish(self, value: T) -> None:
+        """Store `value` and wake the waiters, the caller holds the lock.
+
+        `_sequence` is odd while the value is being replaced, so optimistic readers like
+        `snapshot` can detect a concurrent change without taking the lock.
+        """
+        self._sequence += 1
+        self._object = value
+        self._sequence += 1
+        self._version += 1
+        self._notify()
+
+    def _notify(self) -> None:
+        """Wake all waiters after a change, the caller holds the lock."""
+        self._condition.notify_all()
+        self._wake(0)
+
+    def waiter_stats(self) -> WaiterStats:
+        """Return amount and age of the priority-ordered waiters of AtomicObject.
+
+        Returns:
+            WaiterStats: amount of queued waiters and seconds the oldest one is waiting, 0.0 if
+                         there are none.
+        """
+        with self._condition:
+            since = [waiter.since for _, _, waiter in self._queue]
+        return WaiterStats(len(since), monotonic() - min(since) if since else 0.0)
 
     def set_by(self, setter: Callable[[T], None]) -> T:
         """Set value of AtomicObject by using a passed function.
@@ -109,9 +384,20 @@ class AtomicObject(Generic[T]):
             assert v == 1
         """
         with self._condition:
-            setter(self._object)
-            self._condition.notify_all()
-            return self.value
+            self._sequence += 1
+            try:
+                setter(self._object)
+            finally:
+                self._sequence += 1
+            self._version += 1
+            self._notify()
+            return self._object
+
+    def _transform(self, fn: Callable[[T], T]) -> T:
+        """Replace value of AtomicObject by `fn(value)` under a single lock acquisition."""
+        with self._condition:
+            self._publish(fn(self._object))
+            return self._object
 
     def set(self, value: T) -> T:
         """Set value of AtomicObject.
@@ -123,9 +409,8 @@ class AtomicObject(Generic[T]):
             T: Value of AtomicObject after setting it.
         """
         with self._condition:
-            self._object = value
-            self._condition.notify_all()
-            return self.value
+            self._publish(value)
+            return self._object
 
     def __eq__(self, other: object) -> bool:
         return self.value == other
@@ -0,0 +1,193 @@
+from math import exp
+from threading import Lock
+from time import monotonic
+from typing import Any
+from typing import Dict
+from typing import Tuple
+
+from .after_fork import track
+
+
+_TICK = 5.0
+_DECAYS = tuple(exp(-_TICK / 60 / minutes) for minutes in (1, 5, 15))
+
+
+class AtomicRateMeter:
+    """AtomicRateMeter measures event rates as 1, 5 and 15 minute exponential moving averages.
+
+    The averages are decayed lazily from `time.monotonic()` in 5 second ticks whenever the meter is
+    marked or read, so no ticker thread is needed. Instances only hold a few floats and a lock,
+    which keeps tens of thousands of meters per process cheap.
+    """
+
+    __slots__ = (
+        "_lock",
+        "_start",
+        "_last_tick",
+        "_count",
+        "_uncounted",
+        "_instant",
+        "_m1",
+        "_m5",
+        "_m15",
+        "_primed",
+        "__weakref__",
+    )
+
+    _lock: Lock
+    _start: float
+    _last_tick: float
+    _count: int
+    _uncounted: int
+    _instant: float
+    _m1: float
+    _m5: float
+    _m15: float
+    _primed: bool
+
+    def __init__(self) -> None:
+        """Construct an `AtomicRateMeter`."""
+        self._lock = Lock()
+        self._start = self._last_tick = monotonic()
+        self._count = self._uncounted = 0
+        self._instant = self._m1 = self._m5 = self._m15 = 0.0
+        self._primed = False
+        track(self)
+
+    def _after_fork(self) -> None:
+        self._lock = Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the counts and averages, with the age of the meter and of its last tick."""
+        with self._lock:
+            now = monotonic()
+            return {
+                "age": now - self._start,
+                "tick_age": now - self._last_tick,
+                "count": self._count,
+                "uncounted": self._uncounted,
+                "rates": (self._instant, self._m1, self._m5, self._m15),
+                "primed": self._primed,
+            }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled AtomicRateMeter, as old as when it was pickled."""
+        now = monotonic()
+        self._lock = Lock()
+        self._start = now - state["age"]
+        self._last_tick = now - state["tick_age"]
+        self._count = state["count"]
+        self._uncounted = state["uncounted"]
+        self._instant, self._m1, self._m5, self._m15 = state["rates"]
+        self._primed = state["primed"]
+        track(self)
+
+    def _tick(self, now: float) -> None:
+        ticks = int((now - self._last_tick) / _TICK)
+        if ticks < 1:
+            return
+        self._last_tick += ticks * _TICK
+        instant = self._uncounted / _TICK
+        self._uncounted = 0
+        rates: Tuple[float, ...] = (self._m1, self._m5, self._m15)
+        if self._primed:
+            rates = tuple(
+                instant + (rate - instant) * decay
+                for rate, decay in zip(rates, _DECAYS, strict=True)
+            )
+        else:
+            rates = (instant,) * 3
+            self._primed = True
+        # ticks without events only decay the averages
+        self._m1, self._m5, self._m15 = (
+            rate * decay ** (ticks - 1) for rate, decay in zip(rates, _DECAYS, strict=True)
+        )
+        self._instant = instant if ticks == 1 else 0.0
+
+    def mark(self, n: int = 1) -> None:
+        """Record `n` events.
+
+        Args:
+            n: Amount of events that occurred.
+        """
+        with self._lock:
+            self._tick(monotonic())
+            self._count += n
+            self._uncounted += n
+
+    @property
+    def count(self) -> int:
+        """Return amount of events marked since construction.
+
+        Returns:
+            int: amount of events
+        """
+        with self._lock:
+            return self._count
+
+    @property
+    def rates(self) -> Tuple[float, float, float]:
+        """Return the 1, 5 and 15 minute moving averages in events per second.
+
+        Returns:
+            Tuple[float, float, float]: 1, 5 and 15 minute rates
+        """
+        with self._lock:
+            self._tick(monotonic())
+            return self._m1, self._m5, self._m15
+
+    @property
+    def one_minute_rate(self) -> float:
+        """Return the 1 minute moving average in events per second.
+
+        Returns:
+            float: 1 minute rate
+        """
+        return self.rates[0]
+
+    @property
+    def five_minute_rate(self) -> float:
+        """Return the 5 minute moving average in events per second.
+
+        Returns:
+            float: 5 minute rate
+        """
+        return self.rates[1]
+
+    @property
+    def fifteen_minute_rate(self) -> float:
+        """Return the 15 minute moving average in events per second.
+
+        Returns:
+            float: 15 minute rate
+        """
+        return self.rates[2]
+
+    @property
+    def instant_rate(self) -> float:
+        """Return the rate over the last completed 5 second tick in events per second.
+
+        Returns:
+            float: instantaneous rate
+        """
+        with self._lock:
+            self._tick(monotonic())
+            return self._instant
+
+    @property
+    def mean_rate(self) -> float:
+        """Return the average rate since construction in events per second.
+
+        Returns:
+            float: mean rate
+        """
+        with self._lock:
+            elapsed = monotonic() - self._start
+            return self._count / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        m1, m5, m15 = self.rates
+        return f"{m1:.3f}/{m5:.3f}/{m15:.3f}"
+
+    def __repr__(self) -> str:
+        return f"AtomicRateMeter({str(self)})"
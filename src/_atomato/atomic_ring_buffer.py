@@ -0,0 +1,354 @@
+import asyncio
+from collections import deque
+from threading import Condition
+from threading import Lock
+from time import monotonic
+from typing import Any
+from typing import Deque
+from typing import Dict
+from typing import Generic
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import TypeVar
+
+from .after_fork import track
+from .deadline import CancellationToken
+from .deadline import WaitCancelledError
+from .deadline import WaitOutcome
+from .deadline import WaitResult
+from .deadline import resolve_deadline
+from .deadline import wait_on
+
+
+T = TypeVar("T")
+
+_AsyncWaiter = Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]
+
+
+def _resolve(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class AtomicRingBuffer(Generic[T]):
+    """AtomicRingBuffer is a bounded FIFO buffer with preallocated slots for producers and consumers.
+
+    Producers block while the buffer is full and consumers block while it is empty. Each side
+    waits on its own condition, so a `put` only wakes a consumer and a `get` only wakes a producer.
+
+    All blocking operations accept a relative `timeout`, an absolute `deadline` and a `cancel`
+    token. When the wait ends early they report how much they moved: `put` returns False,
+    `put_many` a short count and `get_many` an empty list. `get` raises `TimeoutError` or
+    `WaitCancelledError` instead, as any value, including None, could be a stored item.
+
+    Pickled copies hold the buffered items; waiting producers and consumers are not copied.
+    """
+
+    _slots: List[Optional[T]]
+    _capacity: int
+    _head: int
+    _size: int
+    _lock: Lock
+    _not_empty: Condition
+    _not_full: Condition
+    _async_getters: Deque[_AsyncWaiter]
+    _async_putters: Deque[_AsyncWaiter]
+
+    def __init__(self, capacity: int):
+        """Construct an `AtomicRingBuffer`.
+
+        Args:
+            capacity: Maximum amount of items the AtomicRingBuffer will hold.
+
+        Raises:
+            ValueError: if `capacity` is lower than 1.
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity should be at least 1, got {capacity}")
+        self._slots = [None] * capacity
+        self._capacity = capacity
+        self._head = 0
+        self._size = 0
+        self._init_sync()
+        track(self)
+
+    def _init_sync(self) -> None:
+        self._lock = Lock()
+        self._not_empty = Condition(self._lock)
+        self._not_full = Condition(self._lock)
+        self._async_getters = deque()
+        self._async_putters = deque()
+
+    def _after_fork(self) -> None:
+        # the event loops of async waiters do not run in the child
+        self._init_sync()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the capacity and the items in FIFO order."""
+        with self._lock:
+            items = [
+                self._slots[(self._head + i) % self._capacity] for i in range(self._size)
+            ]
+        return {"capacity": self._capacity, "items": items}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled AtomicRingBuffer with new conditions."""
+        self._capacity = state["capacity"]
+        self._slots = [None] * self._capacity
+        self._head = 0
+        self._size = 0
+        for item in state["items"]:
+            self._push(item)
+        self._init_sync()
+        track(self)
+
+    def _push(self, item: T) -> None:
+        self._slots[(self._head + self._size) % self._capacity] = item
+        self._size += 1
+
+    def _pop(self) -> T:
+        item = self._slots[self._head]
+        self._slots[self._head] = None
+        self._head = (self._head + 1) % self._capacity
+        self._size -= 1
+        return item  # type: ignore
+
+    @staticmethod
+    def _wake_async(waiters: Deque[_AsyncWaiter], n: int) -> None:
+        while n > 0 and waiters:
+            loop, future = waiters.popleft()
+            loop.call_soon_threadsafe(_resolve, future)
+            n -= 1
+
+    def _pushed(self, n: int) -> None:
+        self._not_empty.notify(n)
+        self._wake_async(self._async_getters, n)
+
+    def _popped(self, n: int) -> None:
+        self._not_full.notify(n)
+        self._wake_async(self._async_putters, n)
+
+    def _not_full_within(
+        self, end: Optional[float], cancel: Optional[CancellationToken]
+    ) -> WaitResult:
+        return wait_on(
+            self._not_full, lambda: self._size < self._capacity, deadline=end, cancel=cancel
+        )
+
+    def _not_empty_within(
+        self, end: Optional[float], cancel: Optional[CancellationToken]
+    ) -> WaitResult:
+        return wait_on(self._not_empty, lambda: self._size > 0, deadline=end, cancel=cancel)
+
+    def put(
+        self,
+        item: T,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bool:
+        """Put `item` at the back of the AtomicRingBuffer, waiting for a free slot if full.
+
+        Args:
+            item: Item to store.
+            timeout: Wait until `timeout` expired.
+                     If `timeout` is None then blocks until a slot is free (default: None)
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+
+        Returns:
+            bool: True if `item` was stored, False if the timeout or deadline expired or if the
+                  wait was cancelled.
+        """
+        end = resolve_deadline(timeout, deadline, monotonic())
+        with self._lock:
+            if not self._not_full_within(end, cancel):
+                return False
+            self._push(item)
+            self._pushed(1)
+            return True
+
+    def put_many(
+        self,
+        items: Iterable[T],
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> int:
+        """Put all `items` in the AtomicRingBuffer, moving as many as fit per lock acquisition.
+
+        The timeout and deadline apply to the whole call, not to each wait for free slots.
+
+        Args:
+            items: Items to store, in order.
+            timeout: Wait until `timeout` expired.
+                     If `timeout` is None then blocks until all items are stored (default: None)
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+
+        Returns:
+            int: Amount of items stored. Lower than the amount of `items` if the timeout or
+                 deadline expired or if the wait was cancelled.
+        """
+        pending = list(items)
+        end = resolve_deadline(timeout, deadline, monotonic())
+        stored = 0
+        with self._lock:
+            while stored < len(pending):
+                if not self._not_full_within(end, cancel):
+                    return stored
+                n = min(self._capacity - self._size, len(pending) - stored)
+                for item in pending[stored : stored + n]:
+                    self._push(item)
+                stored += n
+                self._pushed(n)
+        return stored
+
+    def get(
+        self,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> T:
+        """Take the item at the front of the AtomicRingBuffer, waiting for one if empty.
+
+        Args:
+            timeout: Wait until `timeout` expired.
+                     If `timeout` is None then blocks until an item is available (default: None)
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+
+        Returns:
+            T: Item at the front of the AtomicRingBuffer.
+
+        Raises:
+            WaitCancelledError: if `cancel` was cancelled before an item became available.
+            TimeoutError: if no item became available before the timeout or deadline expired.
+        """
+        end = resolve_deadline(timeout, deadline, monotonic())
+        with self._lock:
+            result = self._not_empty_within(end, cancel)
+            if result.outcome is WaitOutcome.CANCELLED:
+                raise WaitCancelledError("wait for an item was cancelled")
+            if not result:
+                raise TimeoutError("no item became available in time")
+            item = self._pop()
+            self._popped(1)
+            return item
+
+    def get_many(
+        self,
+        max_items: int,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> List[T]:
+        """Take up to `max_items` from the front of the AtomicRingBuffer under one lock acquisition.
+
+        Waits until at least one item is available, then takes whatever is there (up to `max_items`).
+
+        Args:
+            max_items: Maximum amount of items to take.
+            timeout: Wait until `timeout` expired.
+                     If `timeout` is None then blocks until an item is available (default: None)
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+
+        Returns:
+            List[T]: Items taken in FIFO order, empty if the timeout or deadline expired or if the
+                     wait was cancelled.
+
+        Raises:
+            ValueError: if `max_items` is lower than 1.
+        """
+        if max_items < 1:
+            raise ValueError(f"max_items should be at least 1, got {max_items}")
+        end = resolve_deadline(timeout, deadline, monotonic())
+        with self._lock:
+            if not self._not_empty_within(end, cancel):
+                return []
+            n = min(self._size, max_items)
+            items = [self._pop() for _ in range(n)]
+            self._popped(n)
+            return items
+
+    async def aput(self, item: T) -> None:
+        """Put `item` at the back of the AtomicRingBuffer without blocking the event loop.
+
+        Args:
+            item: Item to store.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._size < self._capacity:
+                    self._push(item)
+                    self._pushed(1)
+                    return
+                future: "asyncio.Future[None]" = loop.create_future()
+                self._async_putters.append((loop, future))
+            await self._await(self._async_putters, loop, future)
+
+    async def aget(self) -> T:
+        """Take the item at the front of the AtomicRingBuffer without blocking the event loop.
+
+        Returns:
+            T: Item at the front of the AtomicRingBuffer.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._size:
+                    item = self._pop()
+                    self._popped(1)
+                    return item
+                future: "asyncio.Future[None]" = loop.create_future()
+                self._async_getters.append((loop, future))
+            await self._await(self._async_getters, loop, future)
+
+    async def _await(
+        self,
+        waiters: Deque[_AsyncWaiter],
+        loop: asyncio.AbstractEventLoop,
+        future: "asyncio.Future[None]",
+    ) -> None:
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if (loop, future) in waiters:
+                    waiters.remove((loop, future))
+                else:
+                    # the wakeup was already handed to us, pass it on
+                    self._wake_async(waiters, 1)
+            raise
+
+    @property
+    def capacity(self) -> int:
+        """Return the maximum amount of items the AtomicRingBuffer holds.
+
+        Returns:
+            int: capacity of AtomicRingBuffer
+        """
+        return self._capacity
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._size
+
+    def __str__(self) -> str:
+        with self._lock:
+            items = [
+                self._slots[(self._head + i) % self._capacity]
+                for i in range(self._size)
+            ]
+        return f"{items}"
+
+    def __repr__(self) -> str:
+        return f"AtomicRingBuffer({str(self)}, capacity={self._capacity})"
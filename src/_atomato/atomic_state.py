@@ -5,6 +5,8 @@ from typing import Type
 from typing import Union
 
 from .atomic_integer import AtomicInteger
+from .deadline import CancellationToken
+from .lock_backend import LockBackend
 
 
 StateType = Union[int, SupportsInt]
@@ -36,6 +38,30 @@ class AtomicState:
             """
             return self._state.state
 
+        def wait_for_state(
+            self,
+            state: StateType,
+            timeout: Optional[float] = None,
+            deadline: Optional[float] = None,
+            cancel: Optional[CancellationToken] = None,
+            priority: Optional[int] = None,
+        ) -> bool:
+            """Wait until the tracked AtomicState is `state`, see `AtomicState.wait_for_state`.
+
+            Args:
+                state: State to wait for (should support conversion to `int`)
+                timeout: Seconds to wait at most, blocks until the state is reached if None.
+                deadline: Value of `time.monotonic()` after which to stop waiting. If both
+                          `timeout` and `deadline` are passed, the earliest of both applies.
+                cancel: `CancellationToken` that ends the wait early when cancelled.
+                priority: If passed the wait is queued and woken in priority order, lower values
+                          first.
+
+            Returns:
+                bool: True if the state is `state`, False if the wait timed out or was cancelled.
+            """
+            return self._state.wait_for_state(state, timeout, deadline, cancel, priority)
+
         def __str__(self) -> str:
             return str(self.state)
 
@@ -46,7 +72,10 @@ class AtomicState:
     _StateType: Type[StateType]
 
     def __init__(
-        self, default_state: StateType, state_type: Optional[Type[StateType]] = None
+        self,
+        default_state: StateType,
+        state_type: Optional[Type[StateType]] = None,
+        lock: Optional[LockBackend] = None,
     ):
         """Construct an `AtomicState`.
 
@@ -54,8 +83,9 @@ class AtomicState:
             default_state: Default state that the AtomicState will be set to.
             state_type: Integer convertible type that the AtomicState will wrap.
                         if left default (None), it will take the type of `default_state`
+            lock: `LockBackend` that creates the lock, a reentrant `threading.RLock` if None.
         """
-        self._state = AtomicInteger(int(default_state))
+        self._state = AtomicInteger(int(default_state), lock=lock)
         self._StateType = state_type if state_type else type(default_state)
 
     def set(self, state: StateType) -> StateType:
@@ -88,6 +118,38 @@ class AtomicState:
         """
         return self._StateType(self._state.value)  # type: ignore
 
+    def wait_for_state(
+        self,
+        state: StateType,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+        priority: Optional[int] = None,
+    ) -> bool:
+        """Wait until AtomicState is `state`.
+
+        Args:
+            state: State to wait for (should support conversion to `int`)
+            timeout: Wait until `timeout` expired.
+                     If `timeout` is None then blocks until condition is True (default: None)
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+            priority: If passed the wait is queued and woken in priority order, lower values first.
+                      See `AtomicObject.wait_for`.
+
+        Returns:
+            bool: True if the state is `state`, False if the timeout or deadline expired
+                  or if the wait was cancelled.
+        """
+        return self._state.wait_equal(
+            int(state),
+            timeout=timeout,
+            deadline=deadline,
+            cancel=cancel,
+            priority=priority,
+        )
+
     @property
     def tracker(self) -> "AtomicStateTracker":
         """Return `StateTracker` which only allows tracking the state.
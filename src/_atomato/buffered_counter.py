@@ -0,0 +1,267 @@
+import weakref
+from functools import partial
+from threading import Event
+from threading import Lock
+from threading import Thread
+from threading import local
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import SupportsInt
+from typing import Union
+
+from .after_fork import call_fork_safe
+from .after_fork import track
+from .atomic_counter import AtomicCounter
+
+
+class _Buffer:
+    """Increments of one thread: only the owner writes `added` and `ops`, flushes take `lock`."""
+
+    __slots__ = ("added", "flushed", "ops", "lock")
+
+    added: int
+    flushed: int
+    ops: int
+    lock: Lock
+
+    def __init__(self) -> None:
+        self.added = self.flushed = self.ops = 0
+        self.lock = Lock()
+
+
+class _Owner:
+    """Thread-local token whose collection at thread exit flushes and retires the buffer."""
+
+    __slots__ = ("buffer", "__weakref__")
+
+    buffer: _Buffer
+
+    def __init__(self, buffer: _Buffer):
+        self.buffer = buffer
+
+
+def _flush_periodically(
+    counter: "weakref.ref[BufferedCounter]", interval: float, stop: Event
+) -> None:
+    while not stop.wait(interval):
+        c = counter()
+        if c is None:
+            return
+        c.sync()
+        del c
+
+
+def _retire(counter: "weakref.ref[BufferedCounter]", buffer: _Buffer) -> None:
+    c = counter()
+    if c is not None:
+        c._flush(buffer)
+        with c._lock:
+            c._buffers.remove(buffer)
+
+
+class BufferedCounter:
+    """BufferedCounter counts into thread-local buffers that are flushed to an AtomicCounter.
+
+    Increments only touch the calling thread's buffer and take no lock. A buffer is added to the
+    backing counter every `flush_every` operations of its thread, every `flush_interval` seconds
+    by a background thread, when its thread exits and on `sync`.
+
+    Staleness bound: the backing counter lacks at most `flush_every - 1` operations per thread,
+    and no operation stays buffered for longer than `flush_interval` seconds plus the duration of
+    one `sync`. Waits on the backing counter, e.g. `counter.wait_above`, therefore see every
+    increment within that bound. Each flush adds the net amount of its operations, so a backing
+    counter with `allow_below_default=False` clamps net amounts instead of single operations.
+
+    Pickling flushes all buffers and copies the backing counter. In a child created by `os.fork`
+    the background flushes are restarted.
+
+    Example::
+
+        packets = BufferedCounter(flush_every=1000, flush_interval=0.05)
+        packets.inc()
+        ...
+        exact = packets.sync()
+    """
+
+    _counter: AtomicCounter
+    _flush_every: int
+    _flush_interval: Optional[float]
+    _local: local
+    _lock: Lock
+    _buffers: List[_Buffer]
+    _stop: Event
+
+    def __init__(
+        self,
+        counter: Optional[AtomicCounter] = None,
+        flush_every: int = 1024,
+        flush_interval: Optional[float] = 0.1,
+    ):
+        """Construct a `BufferedCounter`.
+
+        Args:
+            counter: Backing counter, a new `AtomicCounter` if None.
+            flush_every: Amount of operations after which a thread flushes its own buffer.
+            flush_interval: Seconds between flushes of all buffers by a background thread.
+                            If None buffers are only flushed by their thread, on thread exit
+                            and on `sync`, so an idle thread's operations may stay buffered.
+
+        Raises:
+            ValueError: if `flush_every` is lower than 1 or `flush_interval` is not positive.
+        """
+        if flush_every < 1:
+            raise ValueError(f"flush_every should be at least 1, got {flush_every}")
+        if flush_interval is not None and flush_interval <= 0:
+            raise ValueError(f"flush_interval should be positive, got {flush_interval}")
+        self._counter = counter if counter is not None else AtomicCounter()
+        self._flush_every = flush_every
+        self._flush_interval = flush_interval
+        self._init_sync(closed=False)
+        track(self)
+
+    def _init_sync(self, closed: bool) -> None:
+        self._local = local()
+        self._lock = Lock()
+        self._buffers = []
+        self._stop = Event()
+        if closed:
+            self._stop.set()
+        self._start_flusher()
+
+    def _start_flusher(self) -> None:
+        if self._flush_interval is not None and not self._stop.is_set():
+            Thread(
+                target=_flush_periodically,
+                args=[weakref.ref(self), self._flush_interval, self._stop],
+                daemon=True,
+            ).start()
+
+    def _after_fork(self) -> None:
+        # buffers of the parent's other threads are retired once their finalizers run
+        self._lock = Lock()
+        for buffer in self._buffers:
+            buffer.lock = Lock()
+        stopped = self._stop.is_set()
+        self._stop = Event()
+        if stopped:
+            self._stop.set()
+        self._start_flusher()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Flush all buffers and return the backing counter and flush settings."""
+        self.sync()
+        return {
+            "counter": self._counter,
+            "flush_every": self._flush_every,
+            "flush_interval": self._flush_interval,
+            "closed": self._stop.is_set(),
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled BufferedCounter with empty buffers."""
+        self._counter = state["counter"]
+        self._flush_every = state["flush_every"]
+        self._flush_interval = state["flush_interval"]
+        self._init_sync(state["closed"])
+        track(self)
+
+    def _buffer(self) -> _Buffer:
+        owner: Optional[_Owner] = getattr(self._local, "owner", None)
+        if owner is None:
+            owner = self._local.owner = _Owner(_Buffer())
+            with self._lock:
+                self._buffers.append(owner.buffer)
+            weakref.finalize(
+                owner, call_fork_safe, partial(_retire, weakref.ref(self), owner.buffer)
+            )
+        return owner.buffer
+
+    def _flush(self, buffer: _Buffer) -> None:
+        with buffer.lock:
+            added = buffer.added
+            delta = added - buffer.flushed
+            if delta:
+                self._counter.inc(delta)
+                buffer.flushed = added
+
+    def inc(self, d: Union[int, SupportsInt] = 1) -> None:
+        """Increase BufferedCounter by `d`.
+
+        Args:
+            d: Value with which to increase the BufferedCounter
+        """
+        buffer = self._buffer()
+        buffer.added += int(d)
+        buffer.ops += 1
+        if buffer.ops >= self._flush_every:
+            buffer.ops = 0
+            self._flush(buffer)
+
+    def dec(self, d: Union[int, SupportsInt] = 1) -> None:
+        """Decrease BufferedCounter by `d`.
+
+        Args:
+            d: Value with which to decrease the BufferedCounter
+        """
+        self.inc(-int(d))
+
+    def sync(self) -> int:
+        """Flush the buffers of all threads and return the exact value.
+
+        Operations that run concurrently with `sync` may or may not be included.
+
+        Returns:
+            int: value of the backing counter after flushing.
+        """
+        with self._lock:
+            buffers = list(self._buffers)
+        for buffer in buffers:
+            self._flush(buffer)
+        return self._counter.value
+
+    def close(self) -> int:
+        """Stop the background flushes and flush all buffers.
+
+        Operations after closing are still flushed every `flush_every` operations, on thread exit
+        and on `sync`.
+
+        Returns:
+            int: value of the backing counter after flushing.
+        """
+        self._stop.set()
+        return self.sync()
+
+    @property
+    def value(self) -> int:
+        """Return value of the backing counter, without flushing.
+
+        Returns:
+            int: value within the staleness bound of BufferedCounter
+        """
+        return self._counter.value
+
+    @property
+    def counter(self) -> AtomicCounter:
+        """Return the backing counter, e.g. to wait on it.
+
+        Returns:
+            AtomicCounter: backing counter
+        """
+        return self._counter
+
+    def __enter__(self) -> "BufferedCounter":
+        return self
+
+    def __exit__(self, etype, value, traceback) -> None:  # type: ignore
+        self.close()
+
+    def __int__(self) -> int:
+        return self.value
+
+    def __str__(self) -> str:
+        return f"{self.value}"
+
+    def __repr__(self) -> str:
+        return f"BufferedCounter({str(self)})"
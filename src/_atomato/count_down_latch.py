@@ -0,0 +1,167 @@
+from threading import Condition
+from threading import Lock
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+from .after_fork import track
+from .deadline import CancellationToken
+from .deadline import wait_on
+
+
+class CountDownLatch:
+    """CountDownLatch lets threads wait until a count of outstanding parties reaches zero.
+
+    Waiters are only woken once, when the count reaches zero. The latch can be re-armed with
+    `reset` and reused for the next round instead of allocating a new one.
+    """
+
+    _condition: Condition
+    _count: int
+    _generation: int
+
+    def __init__(self, count: int):
+        """Construct a `CountDownLatch`.
+
+        Args:
+            count: Amount of `count_down` calls needed before waiters are released.
+
+        Raises:
+            ValueError: if `count` is negative.
+        """
+        if count < 0:
+            raise ValueError(f"count should not be negative, got {count}")
+        self._count = count
+        self._generation = 0
+        self._init_sync()
+        track(self)
+
+    def _init_sync(self) -> None:
+        self._condition = Condition(Lock())
+
+    def _after_fork(self) -> None:
+        self._init_sync()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the count and generation, the condition and waiters are not pickled."""
+        with self._condition:
+            return {"count": self._count, "generation": self._generation}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled CountDownLatch with a new condition."""
+        self._count = state["count"]
+        self._generation = state["generation"]
+        self._init_sync()
+        track(self)
+
+    def count_down(self, n: int = 1) -> int:
+        """Decrease count of CountDownLatch by `n`, releasing all waiters when it reaches zero.
+
+        Args:
+            n: Value with which to decrease the count. The count never drops below zero.
+
+        Returns:
+            int: count after decreasing by `n`
+
+        Raises:
+            ValueError: if `n` is negative.
+        """
+        if n < 0:
+            raise ValueError(f"n should not be negative, got {n}")
+        with self._condition:
+            if self._count == 0:
+                return 0
+            self._count = max(self._count - n, 0)
+            if self._count == 0:
+                self._condition.notify_all()
+            return self._count
+
+    def register(self, n: int = 1) -> int:
+        """Register `n` additional parties that have to count down before waiters are released.
+
+        Registering on a latch that already reached zero re-arms it for a new round.
+
+        Args:
+            n: Amount of parties to add.
+
+        Returns:
+            int: count after registering.
+
+        Raises:
+            ValueError: if `n` is negative.
+        """
+        if n < 0:
+            raise ValueError(f"n should not be negative, got {n}")
+        with self._condition:
+            if self._count == 0:
+                self._generation += 1
+            self._count += n
+            return self._count
+
+    def reset(self, count: int) -> None:
+        """Re-arm CountDownLatch with `count` for the next round.
+
+        Waiters of the previous round that have not yet been scheduled after the count reached
+        zero are still released.
+
+        Args:
+            count: Amount of `count_down` calls needed before waiters are released.
+
+        Raises:
+            ValueError: if `count` is negative.
+        """
+        if count < 0:
+            raise ValueError(f"count should not be negative, got {count}")
+        with self._condition:
+            if self._count == 0:
+                self._generation += 1
+            self._count = count
+            if count == 0:
+                self._condition.notify_all()
+
+    def wait(
+        self,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bool:
+        """Wait until count of CountDownLatch reaches zero or if `timeout` expired.
+
+        Args:
+            timeout: Wait until `timeout` expired.
+                     If `timeout` is None then blocks until the count reached zero (default: None)
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+
+        Returns:
+            bool: True if the count reached zero, False if the timeout or deadline expired or if
+                  the wait was cancelled.
+        """
+        with self._condition:
+            generation = self._generation
+            return bool(
+                wait_on(
+                    self._condition,
+                    lambda: self._count == 0 or self._generation != generation,
+                    timeout,
+                    deadline,
+                    cancel,
+                )
+            )
+
+    @property
+    def count(self) -> int:
+        """Return count of CountDownLatch.
+
+        Returns:
+            int: count of CountDownLatch
+        """
+        with self._condition:
+            return self._count
+
+    def __str__(self) -> str:
+        return f"{self.count}"
+
+    def __repr__(self) -> str:
+        return f"CountDownLatch({str(self)})"
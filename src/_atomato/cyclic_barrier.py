@@ -0,0 +1,197 @@
+from threading import Condition
+from threading import Lock
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Optional
+
+from .after_fork import track
+from .deadline import CancellationToken
+from .deadline import wait_on
+
+
+class CyclicBarrier:
+    """CyclicBarrier lets a dynamic amount of parties wait for each other, round after round.
+
+    When the last party arrives, the optional `action` runs and all waiting parties are released
+    with a single notification. The barrier then starts the next generation on the same instance.
+
+    Arrivals are not copied by pickling, and in a child created by `os.fork` the arrivals of the
+    parent's threads are dropped, as those threads do not exist there.
+    """
+
+    _condition: Condition
+    _parties: int
+    _arrived: int
+    _generation: int
+    _action: Optional[Callable[[], None]]
+
+    def __init__(self, parties: int, action: Optional[Callable[[], None]] = None):
+        """Construct a `CyclicBarrier`.
+
+        Args:
+            parties: Amount of parties that have to arrive before the barrier trips.
+            action: Function that is called by the last arriving party before the others
+                    are released.
+
+        Raises:
+            ValueError: if `parties` is lower than 1.
+        """
+        if parties < 1:
+            raise ValueError(f"parties should be at least 1, got {parties}")
+        self._parties = parties
+        self._generation = 0
+        self._action = action
+        self._init_sync()
+        track(self)
+
+    def _init_sync(self) -> None:
+        self._condition = Condition(Lock())
+        self._arrived = 0
+
+    def _after_fork(self) -> None:
+        self._init_sync()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the parties, generation and action, arrivals are not pickled."""
+        with self._condition:
+            return {
+                "parties": self._parties,
+                "generation": self._generation,
+                "action": self._action,
+            }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled CyclicBarrier without arrivals."""
+        self._parties = state["parties"]
+        self._generation = state["generation"]
+        self._action = state["action"]
+        self._init_sync()
+        track(self)
+
+    def _trip_if_complete(self) -> bool:
+        if self._arrived < self._parties:
+            return False
+        try:
+            if self._action is not None:
+                self._action()
+        finally:
+            self._arrived = 0
+            self._generation += 1
+            self._condition.notify_all()
+        return True
+
+    def wait(
+        self,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bool:
+        """Arrive at the CyclicBarrier and wait until all parties arrived or if `timeout` expired.
+
+        A party that times out or is cancelled withdraws its arrival, so the current generation
+        can still trip once the remaining parties arrive.
+
+        Args:
+            timeout: Wait until `timeout` expired.
+                     If `timeout` is None then blocks until the barrier tripped (default: None)
+            deadline: Value of `time.monotonic()` after which to stop waiting. If both `timeout`
+                      and `deadline` are passed, the earliest of both applies.
+            cancel: `CancellationToken` that ends the wait early when cancelled.
+
+        Returns:
+            bool: True if the barrier tripped, False if the timeout or deadline expired or if the
+                  wait was cancelled.
+        """
+        with self._condition:
+            generation = self._generation
+            self._arrived += 1
+            if self._trip_if_complete():
+                return True
+            if wait_on(
+                self._condition,
+                lambda: self._generation != generation,
+                timeout,
+                deadline,
+                cancel,
+            ):
+                return True
+            self._arrived -= 1
+            return False
+
+    def register(self, n: int = 1) -> int:
+        """Register `n` additional parties for the current and following generations.
+
+        Args:
+            n: Amount of parties to add.
+
+        Returns:
+            int: amount of parties after registering.
+
+        Raises:
+            ValueError: if `n` is negative.
+        """
+        if n < 0:
+            raise ValueError(f"n should not be negative, got {n}")
+        with self._condition:
+            self._parties += n
+            return self._parties
+
+    def deregister(self, n: int = 1) -> int:
+        """Deregister `n` parties, tripping the barrier if all remaining parties already arrived.
+
+        Args:
+            n: Amount of parties to remove.
+
+        Returns:
+            int: amount of parties after deregistering.
+
+        Raises:
+            ValueError: if `n` is negative or if less than one party would remain.
+        """
+        if n < 0:
+            raise ValueError(f"n should not be negative, got {n}")
+        with self._condition:
+            if self._parties - n < 1:
+                raise ValueError("at least one party should remain registered")
+            self._parties -= n
+            if self._arrived:
+                self._trip_if_complete()
+            return self._parties
+
+    @property
+    def parties(self) -> int:
+        """Return amount of parties of CyclicBarrier.
+
+        Returns:
+            int: amount of parties
+        """
+        with self._condition:
+            return self._parties
+
+    @property
+    def waiting(self) -> int:
+        """Return amount of parties waiting at CyclicBarrier.
+
+        Returns:
+            int: amount of waiting parties
+        """
+        with self._condition:
+            return self._arrived
+
+    @property
+    def generation(self) -> int:
+        """Return amount of times CyclicBarrier tripped.
+
+        Returns:
+            int: generation of CyclicBarrier
+        """
+        with self._condition:
+            return self._generation
+
+    def __str__(self) -> str:
+        with self._condition:
+            return f"{self._arrived}/{self._parties}"
+
+    def __repr__(self) -> str:
+        return f"CyclicBarrier({str(self)})"
@@ -0,0 +1,180 @@
+from enum import Enum
+from threading import Condition
+from threading import Lock
+from time import monotonic
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from .after_fork import track
+
+
+class WaitOutcome(Enum):
+    """Reason a wait ended."""
+
+    SATISFIED = "satisfied"
+    TIMEOUT = "timeout"
+    CANCELLED = "cancelled"
+
+
+class WaitResult:
+    """Result of a wait: why it ended and how long it took.
+
+    Evaluates to True only if the waited for predicate was satisfied, so it can be used wherever
+    a plain bool was returned before.
+    """
+
+    __slots__ = ("outcome", "elapsed")
+
+    outcome: WaitOutcome
+    elapsed: float
+
+    def __init__(self, outcome: WaitOutcome, elapsed: float):
+        """Construct a `WaitResult`.
+
+        Args:
+            outcome: Reason the wait ended.
+            elapsed: Seconds spent waiting, measured on the monotonic clock.
+        """
+        self.outcome = outcome
+        self.elapsed = elapsed
+
+    def __bool__(self) -> bool:
+        return self.outcome is WaitOutcome.SATISFIED
+
+    def __repr__(self) -> str:
+        return f"WaitResult({self.outcome.value}, elapsed={self.elapsed:.6f})"
+
+
+class WaitCancelledError(Exception):
+    """A wait that cannot report its outcome in its return value was cancelled."""
+
+
+class CancellationToken:
+    """CancellationToken wakes up blocked waiters early when cancelled.
+
+    Pass the same token to any amount of waits, on any amount of objects. Once cancelled, waits
+    that use it end with `WaitOutcome.CANCELLED` and new waits end immediately.
+    """
+
+    _lock: Lock
+    _cancelled: bool
+    _conditions: List[Condition]
+
+    def __init__(self) -> None:
+        """Construct a `CancellationToken`."""
+        self._cancelled = False
+        self._init_sync()
+        track(self)
+
+    def _init_sync(self) -> None:
+        self._lock = Lock()
+        self._conditions = []
+
+    def _after_fork(self) -> None:
+        # only waits of the forking thread could use the token, and it is not waiting
+        self._init_sync()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return whether the token was cancelled, the registered waits are not pickled."""
+        return {"cancelled": self._cancelled}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled CancellationToken without registered waits."""
+        self._cancelled = state["cancelled"]
+        self._init_sync()
+        track(self)
+
+    def cancel(self) -> None:
+        """Cancel the token, waking all waits that use it."""
+        with self._lock:
+            self._cancelled = True
+            conditions = list(self._conditions)
+        for condition in conditions:
+            with condition:
+                condition.notify_all()
+
+    @property
+    def cancelled(self) -> bool:
+        """Return whether the token was cancelled.
+
+        Returns:
+            bool: True if cancelled.
+        """
+        return self._cancelled
+
+    def _register(self, condition: Condition) -> None:
+        with self._lock:
+            self._conditions.append(condition)
+
+    def _unregister(self, condition: Condition) -> None:
+        with self._lock:
+            self._conditions.remove(condition)
+
+
+def resolve_deadline(
+    timeout: Optional[float], deadline: Optional[float], now: float
+) -> Optional[float]:
+    """Combine a relative `timeout` and an absolute `deadline` into the earliest deadline.
+
+    Args:
+        timeout: Seconds from `now`, or None.
+        deadline: Value of `time.monotonic()` at which to stop, or None.
+        now: Current value of `time.monotonic()`.
+
+    Returns:
+        Optional[float]: earliest of both as a `time.monotonic()` value, None if neither is set.
+    """
+    if timeout is not None:
+        deadline = now + timeout if deadline is None else min(deadline, now + timeout)
+    return deadline
+
+
+def wait_on(
+    condition: Condition,
+    satisfied: Callable[[], bool],
+    timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    cancel: Optional[CancellationToken] = None,
+) -> WaitResult:
+    """Wait on `condition` until `satisfied` holds, the deadline passed or `cancel` was cancelled.
+
+    The caller must hold `condition`. Every loop iteration recomputes the remaining time from the
+    same deadline, so spurious wakeups never extend the wait.
+
+    Args:
+        condition: Condition to wait on, acquired by the caller.
+        satisfied: Function that returns True once the wait is over.
+        timeout: Seconds to wait at most.
+        deadline: Value of `time.monotonic()` at which to stop waiting.
+        cancel: Token that ends the wait early when cancelled.
+
+    Returns:
+        WaitResult: why the wait ended and how long it took.
+    """
+    start = monotonic()
+    end = resolve_deadline(timeout, deadline, start)
+    if cancel is not None:
+        cancel._register(condition)
+    try:
+        while True:
+            if satisfied():
+                outcome = WaitOutcome.SATISFIED
+                break
+            if cancel is not None and cancel.cancelled:
+                outcome = WaitOutcome.CANCELLED
+                break
+            if end is None:
+                condition.wait()
+                continue
+            remaining = end - monotonic()
+            if remaining <= 0:
+                outcome = WaitOutcome.TIMEOUT
+                break
+            condition.wait(remaining)
+    finally:
+        if cancel is not None:
+            cancel._unregister(condition)
+    return WaitResult(outcome, monotonic() - start)
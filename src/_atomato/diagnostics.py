@@ -0,0 +1,381 @@
+import os
+import sys
+import traceback
+import warnings
+import weakref
+from itertools import count
+from threading import Event
+from threading import Lock
+from threading import Thread
+from threading import enumerate as threads
+from threading import get_ident
+from time import monotonic
+from types import FrameType
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from . import lock_backend
+from .lock_backend import LockBackend
+
+
+_serials = count(1)
+# guards the lock-order graph, the held and waiting tables are only changed by their thread
+_graph_lock = Lock()
+# serial of a lock -> serials of locks acquired while holding it -> where that first happened
+_order: Dict[int, Dict[int, traceback.StackSummary]] = {}
+# thread ident -> tracked locks held by the thread, in acquisition order
+_held: Dict[int, List["TrackedLock"]] = {}
+# serials of garbage collected locks, pruned from the graph with its next change
+_dead: List[int] = []
+# thread ident -> tracked lock the thread blocks on and since when
+_waiting: Dict[int, Tuple["TrackedLock", float]] = {}
+_watchdog: Optional["LockWatchdog"] = None
+
+
+class LockOrderWarning(RuntimeWarning):
+    """Two tracked locks were acquired in opposite orders, which can deadlock.
+
+    Turn it into an exception with ``warnings.simplefilter("error", LockOrderWarning)``.
+    """
+
+
+def _creation_site() -> str:
+    frame: Optional[FrameType] = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith("_atomato.") or ".tests." in module:
+            return f"{frame.f_code.co_filename}:{frame.f_lineno}"
+        frame = frame.f_back
+    return "unknown location"  # pragma: no cover
+
+
+def _prune() -> None:
+    # the caller holds _graph_lock, finalizers must not take it as they may run in any thread
+    while _dead:
+        serial = _dead.pop()
+        _order.pop(serial, None)
+        for edges in _order.values():
+            edges.pop(serial, None)
+
+
+def _path(start: int, goal: int) -> bool:
+    seen: Set[int] = set()
+    todo = [start]
+    while todo:
+        serial = todo.pop()
+        if serial == goal:
+            return True
+        if serial not in seen:
+            seen.add(serial)
+            todo.extend(_order.get(serial, ()))
+    return False
+
+
+def _check_order(held: List["TrackedLock"], lock: "TrackedLock") -> None:
+    inversions: List[Tuple[TrackedLock, Optional[traceback.StackSummary]]] = []
+    for other in held:
+        if lock._serial in _order.get(other._serial, ()):
+            continue
+        with _graph_lock:
+            _prune()
+            edges = _order.setdefault(other._serial, {})
+            if lock._serial in edges:  # pragma: no cover - recorded by a racing thread
+                continue
+            if _path(lock._serial, other._serial):
+                inversions.append((other, _order[lock._serial].get(other._serial)))
+            edges[lock._serial] = traceback.extract_stack()
+    for other, where in inversions:
+        message = (
+            f"{lock.name} is acquired while holding {other.name},"
+            f" but elsewhere they are acquired the other way round"
+        )
+        if where is not None:
+            message += ", first at:\n" + "".join(where.format())
+        warnings.warn(message, LockOrderWarning, stacklevel=4)
+
+
+def _remove_held(ident: int, lock: "TrackedLock", depth: int) -> None:
+    held = _held[ident]
+    # locks may be released out of order, remove the latest acquisitions of `lock`
+    for _ in range(depth):
+        del held[len(held) - 1 - held[::-1].index(lock)]
+    if not held:
+        del _held[ident]
+
+
+class TrackedLock:
+    """TrackedLock wraps a lock to record its holders, waiters and the lock acquisition order.
+
+    Created by `DiagnosticLockBackend`. Before a thread blocks on the lock while it holds other
+    tracked locks, the order is added to a process-wide graph and a `LockOrderWarning` is warned
+    if the graph shows the opposite order, i.e. the acquisitions can deadlock.
+    """
+
+    name: str
+    _lock: Any
+    _serial: int
+
+    def __init__(self, lock: Any, origin: str):
+        """Construct a `TrackedLock`.
+
+        Args:
+            lock: Lock to wrap.
+            origin: Where the lock was created, part of its name in warnings and reports.
+        """
+        self._lock = lock
+        self._serial = next(_serials)
+        self.name = f"lock-{self._serial} of {origin}"
+        weakref.finalize(self, _dead.append, self._serial)
+
+    def _block(self, acquire: Callable[[], Any]) -> Any:
+        ident = get_ident()
+        _waiting[ident] = (self, monotonic())
+        try:
+            return acquire()
+        finally:
+            del _waiting[ident]
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        """Acquire the wrapped lock, checking the acquisition order first.
+
+        Args:
+            blocking: If False only try to acquire, which cannot deadlock and is not checked.
+            timeout: Seconds to block, -1 blocks until acquired.
+
+        Returns:
+            bool: True if the lock was acquired.
+        """
+        ident = get_ident()
+        held = _held.get(ident)
+        if not blocking:
+            acquired = self._lock.acquire(False)
+        else:
+            if held and self not in held:
+                _check_order(held, self)
+            acquired = self._block(lambda: self._lock.acquire(True, timeout))
+        if acquired:
+            _held.setdefault(ident, []).append(self)
+        return bool(acquired)
+
+    def release(self) -> None:
+        """Release the wrapped lock."""
+        self._lock.release()
+        _remove_held(get_ident(), self, 1)
+
+    def _is_owned(self) -> bool:
+        return self in _held.get(get_ident(), ())
+
+    def _release_save(self) -> Tuple[Any, int]:
+        # used by Condition.wait to fully release a reentrant lock
+        ident = get_ident()
+        depth = _held[ident].count(self)
+        release_save = getattr(self._lock, "_release_save", None)
+        state = release_save() if release_save is not None else self._lock.release()
+        _remove_held(ident, self, depth)
+        return state, depth
+
+    def _acquire_restore(self, saved: Tuple[Any, int]) -> None:
+        state, depth = saved
+        acquire_restore = getattr(self._lock, "_acquire_restore", None)
+        if acquire_restore is not None:
+            self._block(lambda: acquire_restore(state))
+        else:
+            self._block(self._lock.acquire)
+        _held.setdefault(get_ident(), []).extend([self] * depth)
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, etype, value, traceback) -> None:  # type: ignore
+        self.release()
+
+    def __repr__(self) -> str:
+        return f"TrackedLock({self.name})"
+
+
+class DiagnosticLockBackend(LockBackend):
+    """Backend that wraps the locks of another backend in `TrackedLock`.
+
+    Use it for single objects with `lock=DiagnosticLockBackend()`, or for all objects constructed
+    without `lock` with `enable_lock_diagnostics`. Objects with other backends are unaffected,
+    so diagnostics cost nothing where they are not used.
+    """
+
+    _backend: LockBackend
+
+    def __init__(self, backend: Optional[LockBackend] = None):
+        """Construct a `DiagnosticLockBackend`.
+
+        Args:
+            backend: `LockBackend` whose locks are tracked, `DEFAULT_LOCK_BACKEND` if None.
+
+        Raises:
+            ValueError: if `backend` is process-shared, other processes cannot be tracked.
+        """
+        backend = backend if backend is not None else lock_backend.DEFAULT_LOCK_BACKEND
+        if backend.process_shared:
+            raise ValueError("process-shared locks cannot be tracked")
+        self._backend = backend
+
+    def lock(self) -> TrackedLock:
+        """Return a new `TrackedLock`, named after where its object is constructed.
+
+        Returns:
+            TrackedLock: new lock.
+        """
+        return TrackedLock(self._backend.lock(), _creation_site())
+
+    def __repr__(self) -> str:
+        return f"DiagnosticLockBackend({self._backend!r})"
+
+
+def dump_lock_diagnostics() -> str:
+    """Return a report of the threads that hold or wait for tracked locks, with their stacks.
+
+    Returns:
+        str: report, one section per thread.
+    """
+    held = {ident: list(locks) for ident, locks in list(_held.items())}
+    waiting = dict(_waiting)
+    frames = sys._current_frames()
+    names = {t.ident: t.name for t in threads()}
+    now = monotonic()
+    sections = []
+    for ident in sorted(set(held) | set(waiting)):
+        lines = [f"Thread {names.get(ident, '?')} ({ident})"]
+        unique = list(dict.fromkeys(held.get(ident, [])))
+        if unique:
+            lines.append("  holds " + ", ".join(lock.name for lock in unique))
+        if ident in waiting:
+            lock, since = waiting[ident]
+            holders = [
+                names.get(other, str(other))
+                for other, locks in held.items()
+                if other != ident and lock in locks
+            ]
+            lines.append(
+                f"  waits {now - since:.3f}s for {lock.name}"
+                f" held by {', '.join(holders) or 'no thread'}"
+            )
+        frame = frames.get(ident)
+        if frame is not None:  # pragma: no branch
+            lines.extend(
+                "    " + line.rstrip().replace("\n", "\n    ")
+                for line in traceback.format_stack(frame)
+            )
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections) or "no thread holds or waits for a tracked lock"
+
+
+class LockWatchdog:
+    """LockWatchdog reports the lock diagnostics when a thread waits too long for a tracked lock.
+
+    A daemon thread checks the waiting threads periodically and calls `report` with
+    `dump_lock_diagnostics()` once a thread waits longer than `timeout`. Every stuck wait is
+    reported once.
+    """
+
+    _timeout: float
+    _report: Callable[[str], None]
+    _stop: Event
+    _thread: Thread
+
+    def __init__(self, timeout: float, report: Optional[Callable[[str], None]] = None):
+        """Construct and start a `LockWatchdog`.
+
+        Args:
+            timeout: Seconds a thread may wait for a tracked lock before it is reported.
+            report: Called with the report, writes it to `sys.stderr` if None.
+
+        Raises:
+            ValueError: if `timeout` is not positive.
+        """
+        if timeout <= 0:
+            raise ValueError(f"timeout should be positive, got {timeout}")
+        self._timeout = timeout
+        self._report = report if report is not None else _write_stderr
+        self._stop = Event()
+        self._thread = Thread(target=self._run, name="atomato-lock-watchdog", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        reported: Set[Tuple[int, float]] = set()
+        while not self._stop.wait(self._timeout / 4):
+            now = monotonic()
+            stuck = {
+                (ident, since)
+                for ident, (_, since) in list(_waiting.items())
+                if now - since >= self._timeout
+            }
+            if stuck - reported:
+                self._report(dump_lock_diagnostics())
+            reported = stuck
+
+    def stop(self) -> None:
+        """Stop the watchdog and wait for its thread to end."""
+        self._stop.set()
+        self._thread.join()
+
+    def __enter__(self) -> "LockWatchdog":
+        return self
+
+    def __exit__(self, etype, value, traceback) -> None:  # type: ignore
+        self.stop()
+
+
+def _write_stderr(report: str) -> None:
+    print(report, file=sys.stderr, flush=True)
+
+
+def enable_lock_diagnostics(
+    watchdog_timeout: Optional[float] = None,
+    report: Optional[Callable[[str], None]] = None,
+) -> None:
+    """Track the locks of all objects constructed without `lock` from now on.
+
+    The default backend is wrapped in a `DiagnosticLockBackend`. Objects constructed before, or
+    with an explicit `lock`, are not tracked.
+
+    Args:
+        watchdog_timeout: If passed also start a `LockWatchdog` with this timeout.
+        report: `report` of the `LockWatchdog`.
+    """
+    global _watchdog
+    current = lock_backend.default_lock_backend()
+    if not isinstance(current, DiagnosticLockBackend):
+        lock_backend._set_default_lock_backend(DiagnosticLockBackend(current))
+    if watchdog_timeout is not None:
+        if _watchdog is not None:
+            _watchdog.stop()
+        _watchdog = LockWatchdog(watchdog_timeout, report)
+
+
+def disable_lock_diagnostics() -> None:
+    """Stop tracking the locks of objects constructed from now on and stop the watchdog.
+
+    Objects constructed while diagnostics were enabled keep their tracked locks.
+    """
+    global _watchdog
+    current = lock_backend.default_lock_backend()
+    if isinstance(current, DiagnosticLockBackend):
+        lock_backend._set_default_lock_backend(current._backend)
+    if _watchdog is not None:
+        _watchdog.stop()
+        _watchdog = None
+
+
+def _forget_other_threads() -> None:
+    # only the forking thread survives in the child
+    ident = get_ident()
+    for table in (_held, _waiting):
+        for other in [other for other in table if other != ident]:
+            del table[other]
+
+
+if hasattr(os, "register_at_fork"):  # pragma: no branch
+    os.register_at_fork(after_in_child=_forget_other_threads)
@@ -0,0 +1,412 @@
+import fcntl
+import mmap
+import os
+import struct
+from array import array
+from threading import Event
+from threading import Lock
+from threading import Thread
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import SupportsInt
+from typing import Union
+from zlib import crc32
+
+from .atomic_counter import AtomicCounter
+from .atomic_object import AtomicObject
+from .lock_backend import LockBackend
+
+
+_MAGIC = b"ATOMCTR\x00"
+_FORMAT_VERSION = 1
+# magic, format version, capacity, name size, clean flag
+_HEADER = struct.Struct("<8sIIII")
+_HEADER_SIZE = 64
+# generation, crc32 of generation, amount and payload, amount of counters
+_CHECKPOINT = struct.Struct("<QII")
+NAME_SIZE = 48
+
+
+def _checksum(generation: int, count: int, payload: bytes) -> int:
+    return crc32(payload, crc32(struct.pack("<QI", generation, count)))
+
+
+class _SlotObject(AtomicObject[int]):
+    """AtomicObject that mirrors every change of its value into a slot of the store's array."""
+
+    _slots: "array[int]"
+    _index: int
+
+    def __init__(
+        self, value: int, slots: "array[int]", index: int, lock: Optional[LockBackend]
+    ):
+        super().__init__(value, lock=lock)
+        self._slots = slots
+        self._index = index
+
+    def __getstate__(self) -> Dict[str, Any]:
+        raise TypeError("DurableCounter is bound to its store, pickle its value instead")
+
+    def _publish(self, value: int) -> None:
+        self._slots[self._index] = value
+        super()._publish(value)
+
+
+class DurableCounter(AtomicCounter):
+    """DurableCounter is an `AtomicCounter` whose value is checkpointed by a DurableCounterStore.
+
+    Create instances with `DurableCounterStore.counter`. Values are stored as signed 64 bit
+    integers: an update beyond that range, e.g. `inc` past ``2**63 - 1``, raises `OverflowError`
+    and leaves the value unchanged.
+    """
+
+    _name: str
+
+    def __init__(
+        self,
+        name: str,
+        ao: _SlotObject,
+        default_value: int,
+        allow_below_default: bool,
+    ):
+        """Construct a `DurableCounter`, use `DurableCounterStore.counter` instead.
+
+        Args:
+            name: Name of the counter in the store.
+            ao: Object holding the value, mirrored into the store.
+            default_value: Value that `reset` sets the counter to.
+            allow_below_default: See `AtomicCounter`.
+        """
+        super().__init__(default_value, allow_below_default)
+        self._ao = ao
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        """Return name of DurableCounter.
+
+        Returns:
+            str: name in the store
+        """
+        return self._name
+
+    def __repr__(self) -> str:
+        return f"DurableCounter({self._name}={str(self)})"
+
+
+class DurableCounterStore:
+    """DurableCounterStore keeps named counters in a memory-mapped file that survives restarts.
+
+    The file starts with a versioned header followed by two checkpoint areas. Every `flush` writes
+    the names and values of all counters into the older area, with a higher generation and a
+    crc32, so a crash during a flush leaves the other checkpoint intact. On open the valid
+    checkpoint with the highest generation is loaded by copying its values into memory, without
+    any parsing.
+
+    Counter updates never touch the file: they update an in-memory array under the counter's own
+    lock, and `flush` copies that array in one pass. Updates after the last flush are lost when
+    the process crashes, so pass `flush_interval` to bound that loss. Only use files on a local
+    filesystem, memory maps on network filesystems do not give the same guarantees.
+
+    A store has a single owner: opening takes an exclusive `fcntl.flock` on the file, so a second
+    store on the same file, in this or another process, fails until the first one is closed.
+
+    Example::
+
+        with DurableCounterStore("quota.ctr", flush_interval=1.0) as store:
+            requests = store.counter("requests")
+            requests.inc()
+    """
+
+    _lock: Lock
+    _file: int
+    _mm: mmap.mmap
+    _capacity: int
+    _names: bytearray
+    _values: "array[int]"
+    _counters: Dict[str, DurableCounter]
+    _index: Dict[str, int]
+    _generation: int
+    _flushed: bytes
+    _count_flushed: int
+    _recovered: bool
+    _lock_backend: Optional[LockBackend]
+    _closed: Event
+    _flusher: Optional[Thread]
+
+    def __init__(
+        self,
+        path: Union[str, "os.PathLike[str]"],
+        capacity: int = 1024,
+        flush_interval: Optional[float] = None,
+        lock: Optional[LockBackend] = None,
+    ):
+        """Open the store at `path`, creating it if it does not exist.
+
+        Args:
+            path: File to keep the counters in.
+            capacity: Maximum amount of counters of a new file. Existing files keep their capacity.
+            flush_interval: Seconds between flushes by a background thread. If None only `flush`
+                            and `close` write checkpoints.
+            lock: `LockBackend` for the counters, a reentrant `threading.RLock` if None.
+
+        Raises:
+            ValueError: if `capacity` or `flush_interval` is not positive, if the file is not a
+                        counter store of this format version or holds no valid checkpoint.
+            RuntimeError: if another store has the file open.
+            BaseException: whatever fails while reading the file, after the file was released.
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity should be at least 1, got {capacity}")
+        if flush_interval is not None and flush_interval <= 0:
+            raise ValueError(f"flush_interval should be positive, got {flush_interval}")
+        self._lock = Lock()
+        self._lock_backend = lock
+        self._counters = {}
+        self._index = {}
+        self._file = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise RuntimeError(f"counter store {path} is open in another store") from None
+            if os.fstat(self._file).st_size == 0:
+                self._create(capacity)
+            else:
+                self._open()
+        except BaseException:
+            if getattr(self, "_mm", None) is not None:
+                self._mm.close()
+            os.close(self._file)
+            raise
+        self._closed = Event()
+        self._flusher = None
+        if flush_interval is not None:
+            self._flusher = Thread(
+                target=self._flush_periodically, args=[flush_interval], daemon=True
+            )
+            self._flusher.start()
+
+    def _area_size(self) -> int:
+        return _CHECKPOINT.size + self._capacity * (NAME_SIZE + 8)
+
+    def _area_offset(self, generation: int) -> int:
+        return _HEADER_SIZE + (generation % 2) * self._area_size()
+
+    def _map(self) -> None:
+        self._mm = mmap.mmap(self._file, _HEADER_SIZE + 2 * self._area_size())
+
+    def _set_clean(self, clean: bool) -> None:
+        self._mm[: _HEADER.size] = _HEADER.pack(
+            _MAGIC, _FORMAT_VERSION, self._capacity, NAME_SIZE, int(clean)
+        )
+        self._mm.flush()
+
+    def _create(self, capacity: int) -> None:
+        self._capacity = capacity
+        os.ftruncate(self._file, _HEADER_SIZE + 2 * self._area_size())
+        self._map()
+        self._set_clean(False)
+        self._names = bytearray(capacity * NAME_SIZE)
+        self._values = array("q", bytes(8 * capacity))
+        self._generation = 0
+        self._flushed = b""
+        self._count_flushed = -1
+        self._recovered = False
+        self.flush()
+
+    def _open(self) -> None:
+        with open(self._file, "rb", closefd=False) as f:
+            header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError("file is not a counter store")
+        magic, version, capacity, name_size, clean = _HEADER.unpack(header)
+        if magic != _MAGIC or name_size != NAME_SIZE:
+            raise ValueError("file is not a counter store")
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"unsupported counter store version {version}")
+        self._capacity = capacity
+        if os.fstat(self._file).st_size < _HEADER_SIZE + 2 * self._area_size():
+            raise ValueError("file is not a counter store, it is truncated")
+        self._map()
+        best = None
+        for area in range(2):
+            offset = _HEADER_SIZE + area * self._area_size()
+            generation, crc, count = _CHECKPOINT.unpack_from(self._mm, offset)
+            payload = self._mm[offset + _CHECKPOINT.size : offset + self._area_size()]
+            if generation and _checksum(generation, count, payload) == crc:
+                if best is None or generation > best[0]:
+                    best = (generation, count, payload)
+        if best is None:
+            raise ValueError("counter store holds no valid checkpoint")
+        self._generation, count, payload = best
+        names_size = capacity * NAME_SIZE
+        self._names = bytearray(payload[:names_size])
+        self._values = array("q")
+        self._values.frombytes(payload[names_size:])
+        self._flushed = self._values.tobytes()
+        self._count_flushed = count
+        for i in range(count):
+            name = self._names[i * NAME_SIZE : (i + 1) * NAME_SIZE].rstrip(b"\x00")
+            self._index[name.decode()] = i
+        self._recovered = not clean
+        self._set_clean(False)
+
+    def counter(
+        self,
+        name: str,
+        default_value: Union[int, SupportsInt] = 0,
+        allow_below_default: bool = True,
+    ) -> DurableCounter:
+        """Return the counter called `name`, creating it if the store does not hold it yet.
+
+        A new counter starts at `default_value`, an existing one at its last checkpointed value.
+        Asking for the same name again returns the same counter.
+
+        Args:
+            name: Name of the counter, at most `NAME_SIZE` bytes in utf-8 and without NUL bytes.
+            default_value: Value of a new counter, and the value `reset` sets the counter to.
+            allow_below_default: See `AtomicCounter`.
+
+        Returns:
+            DurableCounter: counter called `name`.
+
+        Raises:
+            ValueError: if `name` is empty, too long or contains NUL bytes, or if the store is full.
+        """
+        with self._lock:
+            counter = self._counters.get(name)
+            if counter is not None:
+                return counter
+            encoded = name.encode()
+            if not encoded or len(encoded) > NAME_SIZE or b"\x00" in encoded:
+                raise ValueError(
+                    f"name should be 1 to {NAME_SIZE} bytes without NUL bytes, got {name!r}"
+                )
+            index = self._index.get(name)
+            if index is None:
+                index = len(self._index)
+                if index >= self._capacity:
+                    raise ValueError(f"store is full, capacity is {self._capacity}")
+                self._names[index * NAME_SIZE : index * NAME_SIZE + len(encoded)] = encoded
+                self._values[index] = int(default_value)
+                self._index[name] = index
+            ao = _SlotObject(
+                self._values[index], self._values, index, self._lock_backend
+            )
+            counter = DurableCounter(name, ao, int(default_value), allow_below_default)
+            self._counters[name] = counter
+            return counter
+
+    def flush(self) -> int:
+        """Write a checkpoint of all counters and sync it to disk.
+
+        Nothing is written if no counter changed since the last checkpoint or if the store was
+        closed.
+
+        Returns:
+            int: generation of the latest checkpoint.
+        """
+        with self._lock:
+            # a single copy of the array is a consistent view of all counters
+            values = self._values.tobytes()
+            count = len(self._index)
+            if self._mm.closed or (
+                values == self._flushed and count == self._count_flushed
+            ):
+                return self._generation
+            generation = self._generation + 1
+            payload = bytes(self._names) + values
+            offset = self._area_offset(generation)
+            self._mm[offset + _CHECKPOINT.size : offset + self._area_size()] = payload
+            # the checkpoint header goes last, a torn write fails the checksum either way
+            _CHECKPOINT.pack_into(
+                self._mm, offset, generation, _checksum(generation, count, payload), count
+            )
+            self._mm.flush()
+            self._generation = generation
+            self._flushed = values
+            self._count_flushed = count
+            return generation
+
+    def _flush_periodically(self, interval: float) -> None:
+        while not self._closed.wait(interval):
+            self.flush()
+
+    def close(self) -> None:
+        """Write a final checkpoint, mark the file as cleanly closed and release it.
+
+        Counters of a closed store keep working in memory but are no longer persisted.
+        """
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        # concurrent flushes see the closed map under the lock
+        with self._lock:
+            self._set_clean(True)
+            self._mm.close()
+        os.close(self._file)
+
+    @property
+    def generation(self) -> int:
+        """Return generation of the latest checkpoint.
+
+        Returns:
+            int: generation, incremented by every checkpoint
+        """
+        with self._lock:
+            return self._generation
+
+    @property
+    def recovered(self) -> bool:
+        """Return whether the file was not closed cleanly when it was opened.
+
+        Returns:
+            bool: True if updates after the last checkpoint of the previous process may be lost
+        """
+        return self._recovered
+
+    @property
+    def capacity(self) -> int:
+        """Return maximum amount of counters of DurableCounterStore.
+
+        Returns:
+            int: capacity
+        """
+        return self._capacity
+
+    def names(self) -> List[str]:
+        """Return names of all counters in the store, in creation order.
+
+        Returns:
+            List[str]: names
+        """
+        with self._lock:
+            return list(self._index)
+
+    def __contains__(self, name: object) -> bool:
+        with self._lock:
+            return name in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._index)
+
+    def __enter__(self) -> "DurableCounterStore":
+        return self
+
+    def __exit__(self, etype, value, traceback) -> None:  # type: ignore
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"DurableCounterStore(counters={len(self)}, generation={self.generation})"
@@ -0,0 +1,228 @@
+import multiprocessing
+from multiprocessing.context import BaseContext
+from threading import Condition
+from threading import Lock
+from threading import RLock
+from time import sleep
+from typing import Any
+from typing import Optional
+
+
+class SpinLock:
+    """SpinLock retries a non-blocking acquire a number of times before parking the thread.
+
+    Between attempts the spinning thread yields with ``time.sleep(0)``, so the holder can run and
+    release the lock. For very short critical sections the lock is usually free again after a
+    few yields, which saves the cost of parking and waking the thread. The lock is not
+    reentrant.
+    """
+
+    _lock: Any
+    _spins: int
+
+    def __init__(self, spins: int = 100):
+        """Construct a `SpinLock`.
+
+        Args:
+            spins: Amount of non-blocking attempts before blocking.
+        """
+        self._lock = Lock()
+        self._spins = spins
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        """Acquire the lock, spinning first and then blocking.
+
+        Args:
+            blocking: If False try once without spinning and return whether the lock was
+                      acquired, like `threading.Lock`. `Condition` relies on this to cheaply
+                      check ownership.
+            timeout: Seconds to block after spinning, -1 blocks until acquired.
+
+        Returns:
+            bool: True if the lock was acquired.
+        """
+        acquire = self._lock.acquire
+        if not blocking:
+            return bool(acquire(False))
+        for _ in range(self._spins):
+            if acquire(False):
+                return True
+            sleep(0)
+        return bool(acquire(True, timeout))
+
+    def release(self) -> None:
+        """Release the lock."""
+        self._lock.release()
+
+    def locked(self) -> bool:
+        """Return whether the lock is held.
+
+        Returns:
+            bool: True if the lock is held.
+        """
+        return bool(self._lock.locked())
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, etype, value, traceback) -> None:  # type: ignore
+        self.release()
+
+
+class LockBackend:
+    """LockBackend creates the locks and conditions that atomato objects synchronize on.
+
+    Pass an instance as `lock=` to `AtomicObject` (and `AtomicCounter`, `AtomicInteger`,
+    `AtomicState`) to choose the locking strategy. Subclasses implement `lock`.
+
+    Locks of backends that are not `process_shared` are replaced in children created by
+    `os.fork`, as a lock held by another thread of the parent would never be released there.
+    """
+
+    process_shared: bool = False
+
+    def lock(self) -> Any:
+        """Return a new lock.
+
+        Raises:
+            NotImplementedError: always, subclasses implement this.
+        """
+        raise NotImplementedError
+
+    def condition(self, lock: Optional[Any] = None) -> Condition:
+        """Return a new condition on `lock`, or on a new lock if None is passed.
+
+        Args:
+            lock: Lock created by this backend to share between conditions.
+
+        Returns:
+            Condition: condition on the lock.
+        """
+        return Condition(self.lock() if lock is None else lock)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+
+class ReentrantLockBackend(LockBackend):
+    """Backend on `threading.RLock`, the default. The owning thread may acquire it again."""
+
+    def lock(self) -> RLock:
+        """Return a new `threading.RLock`.
+
+        Returns:
+            RLock: new lock.
+        """
+        return RLock()
+
+
+class PlainLockBackend(LockBackend):
+    """Backend on `threading.Lock`, cheaper than an RLock for callers that never re-enter.
+
+    Holding the object's lock (e.g. `with obj:`) and then calling one of its methods from the
+    same thread deadlocks with this backend.
+    """
+
+    def lock(self) -> Lock:
+        """Return a new `threading.Lock`.
+
+        Returns:
+            Lock: new lock.
+        """
+        return Lock()
+
+
+class SpinLockBackend(LockBackend):
+    """Backend on `SpinLock`, for very short and frequently contended critical sections.
+
+    Like `PlainLockBackend` the lock is not reentrant.
+    """
+
+    _spins: int
+
+    def __init__(self, spins: int = 100):
+        """Construct a `SpinLockBackend`.
+
+        Args:
+            spins: Amount of non-blocking attempts before blocking.
+        """
+        self._spins = spins
+
+    def lock(self) -> SpinLock:
+        """Return a new `SpinLock`.
+
+        Returns:
+            SpinLock: new lock.
+        """
+        return SpinLock(self._spins)
+
+    def __repr__(self) -> str:
+        return f"SpinLockBackend(spins={self._spins})"
+
+
+class ProcessLockBackend(LockBackend):
+    """Backend on `multiprocessing` locks, which can be shared with child processes.
+
+    Only the synchronization is process-shared; the wrapped value lives in each process unless
+    it is itself shared, e.g. a `multiprocessing.Value`. The locks are kept across `os.fork`.
+    """
+
+    process_shared = True
+
+    _context: BaseContext
+    _reentrant: bool
+
+    def __init__(self, context: Optional[BaseContext] = None, reentrant: bool = True):
+        """Construct a `ProcessLockBackend`.
+
+        Args:
+            context: `multiprocessing` context to create the locks with, the default if None.
+            reentrant: If True create reentrant `RLock` locks, else plain `Lock` locks.
+        """
+        self._context = context if context is not None else multiprocessing.get_context()
+        self._reentrant = reentrant
+
+    def lock(self) -> Any:
+        """Return a new `multiprocessing` lock.
+
+        Returns:
+            Any: new `multiprocessing.RLock` or `multiprocessing.Lock`.
+        """
+        return self._context.RLock() if self._reentrant else self._context.Lock()
+
+    def condition(self, lock: Optional[Any] = None) -> Condition:
+        """Return a new `multiprocessing.Condition` on `lock`, or on a new lock if None is passed.
+
+        Args:
+            lock: Lock created by this backend to share between conditions.
+
+        Returns:
+            Condition: condition on the lock.
+        """
+        return self._context.Condition(  # type: ignore
+            self.lock() if lock is None else lock
+        )
+
+    def __repr__(self) -> str:
+        return f"ProcessLockBackend(reentrant={self._reentrant})"
+
+
+DEFAULT_LOCK_BACKEND: LockBackend = ReentrantLockBackend()
+_default_lock_backend = DEFAULT_LOCK_BACKEND
+
+
+def default_lock_backend() -> LockBackend:
+    """Return the backend of objects constructed without `lock`.
+
+    This is `DEFAULT_LOCK_BACKEND` unless lock diagnostics are enabled, see
+    `enable_lock_diagnostics`.
+
+    Returns:
+        LockBackend: current default backend.
+    """
+    return _default_lock_backend
+
+
+def _set_default_lock_backend(backend: LockBackend) -> None:
+    global _default_lock_backend
+    _default_lock_backend = backend
@@ -0,0 +1,99 @@
+import struct
+import sys
+from array import array
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+from .atomic_counter import AtomicCounter
+from .atomic_integer import AtomicInteger
+from .lock_backend import LockBackend
+from .snapshot import snapshot
+
+
+_MAGIC = b"ACTR"
+_FORMAT_VERSION = 1
+# magic, format version, amount of counters
+_HEADER = struct.Struct("<4sHI")
+_ALLOW_BELOW_DEFAULT = 1
+_INTEGER = 2
+
+
+def _little_endian(values: "array[int]") -> "array[int]":
+    if sys.byteorder == "big":  # pragma: no cover
+        values.byteswap()
+    return values
+
+
+def dump_counters(counters: Sequence[AtomicCounter]) -> bytes:
+    """Serialize `counters` into a compact binary form.
+
+    The values are read with `snapshot`, so they all stem from the same instant, and stored
+    together with the defaults as packed 64 bit integers. This is much smaller and faster than
+    pickling each counter, e.g. to ship many counters to worker processes.
+
+    Args:
+        counters: `AtomicCounter` and `AtomicInteger` instances. Subclasses are stored as their
+                  base class, e.g. a `DurableCounter` is loaded as an `AtomicCounter`.
+
+    Returns:
+        bytes: serialized counters, load them with `load_counters`.
+
+    Raises:
+        OverflowError: if a value or default does not fit in 64 bits.
+    """  # noqa: DAR402 - raised by array
+    values = array("q", snapshot(*counters))
+    defaults = array("q", (c._default_value for c in counters))
+    flags = bytes(
+        (_INTEGER if isinstance(c, AtomicInteger) else 0)
+        | (_ALLOW_BELOW_DEFAULT if c._allow_below_default else 0)
+        for c in counters
+    )
+    return b"".join(
+        [
+            _HEADER.pack(_MAGIC, _FORMAT_VERSION, len(counters)),
+            _little_endian(values).tobytes(),
+            _little_endian(defaults).tobytes(),
+            flags,
+        ]
+    )
+
+
+def load_counters(data: bytes, lock: Optional[LockBackend] = None) -> List[AtomicCounter]:
+    """Deserialize counters serialized by `dump_counters`.
+
+    Args:
+        data: Serialized counters.
+        lock: `LockBackend` for the new counters, a reentrant `threading.RLock` if None.
+
+    Returns:
+        List[AtomicCounter]: new counters with the serialized values, in the serialized order.
+
+    Raises:
+        ValueError: if `data` was not created by `dump_counters` of this format version.
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("data are not serialized counters")
+    magic, version, count = _HEADER.unpack_from(data)
+    if magic != _MAGIC or len(data) != _HEADER.size + 17 * count:
+        raise ValueError("data are not serialized counters")
+    if version != _FORMAT_VERSION:
+        raise ValueError(f"unsupported serialized counters version {version}")
+    offset = _HEADER.size
+    values, defaults = array("q"), array("q")
+    values.frombytes(data[offset : offset + 8 * count])
+    defaults.frombytes(data[offset + 8 * count : offset + 16 * count])
+    flags = data[offset + 16 * count :]
+    counters: List[AtomicCounter] = []
+    for value, default, flag in zip(
+        _little_endian(values), _little_endian(defaults), flags, strict=True
+    ):
+        counter = (
+            AtomicInteger(default, lock=lock)
+            if flag & _INTEGER
+            else AtomicCounter(default, bool(flag & _ALLOW_BELOW_DEFAULT), lock=lock)
+        )
+        # not shared with other threads yet, so no need to lock
+        counter._ao._object = value
+        counters.append(counter)
+    return counters
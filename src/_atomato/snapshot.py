@@ -0,0 +1,126 @@
+from time import sleep
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Tuple
+from typing import Union
+
+from .atomic_counter import AtomicCounter
+from .atomic_object import AtomicObject
+from .atomic_state import AtomicState
+
+
+Snapshottable = Union[AtomicObject[Any], AtomicCounter, AtomicState]
+
+
+def _source(obj: Snapshottable) -> AtomicObject[Any]:
+    if isinstance(obj, AtomicObject):
+        return obj
+    if isinstance(obj, AtomicCounter):
+        return obj._ao
+    if isinstance(obj, AtomicState):
+        return obj._state._ao
+    raise TypeError(f"cannot snapshot {type(obj).__name__}")
+
+
+def _read(sources: List[AtomicObject[Any]], retries: int) -> List[Any]:
+    for _ in range(retries):
+        before = [source._sequence for source in sources]
+        if not any(sequence & 1 for sequence in before):
+            values = [source._object for source in sources]
+            if before == [source._sequence for source in sources]:
+                return values
+        sleep(0)
+    # writers kept interfering: take the locks, in a fixed order to avoid deadlocks
+    unique = {id(source): source for source in sources}
+    locks = [unique[key]._lock for key in sorted(unique)]
+    for lock in locks:
+        lock.acquire()
+    try:
+        return [source._object for source in sources]
+    finally:
+        for lock in reversed(locks):
+            lock.release()
+
+
+def snapshot(*objs: Snapshottable, retries: int = 16) -> Tuple[Any, ...]:
+    """Return the values of `objs` as they all were at one instant.
+
+    The values are read optimistically without taking any lock: the change sequence of every
+    object is read before and after reading the values, and the read is retried if any object
+    changed in between. Writers are never blocked unless `retries` attempts in a row were
+    disturbed by writes, after which the locks of all objects are taken in a fixed order.
+
+    Args:
+        objs: `AtomicObject`, `AtomicCounter` (and subclasses) or `AtomicState` instances.
+        retries: Amount of optimistic attempts before falling back to taking the locks.
+
+    Returns:
+        Tuple[Any, ...]: value of each object, in the order of `objs`. States are returned as
+                         their state type.
+
+    Raises:
+        TypeError: if one of `objs` cannot be snapshotted.
+
+    Example::
+
+        inflight, queued, failed = snapshot(inflight_ctr, queued_ctr, failed_ctr)
+    """  # noqa: DAR402 - raised by _source
+    values = _read([_source(obj) for obj in objs], retries)
+    return tuple(
+        obj._StateType(value)  # type: ignore
+        if isinstance(obj, AtomicState)
+        else value
+        for obj, value in zip(objs, values, strict=True)
+    )
+
+
+class CounterGroup:
+    """CounterGroup names related atomato objects so they can be read consistently at once.
+
+    Example::
+
+        group = CounterGroup(inflight=inflight, queued=queued, failed=failed)
+        values = group.snapshot()
+        ratio = values["failed"] / max(values["inflight"], 1)
+    """
+
+    _members: Dict[str, Snapshottable]
+    _retries: int
+
+    def __init__(self, retries: int = 16, **members: Snapshottable):
+        """Construct a `CounterGroup`.
+
+        Args:
+            retries: See `snapshot`.
+            members: Objects of the group by name.
+
+        Raises:
+            TypeError: if one of `members` cannot be snapshotted.
+        """  # noqa: DAR402 - raised by _source
+        for obj in members.values():
+            _source(obj)
+        self._members = members
+        self._retries = retries
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the values of all members as they all were at one instant.
+
+        Returns:
+            Dict[str, Any]: value of each member by name.
+        """
+        values = snapshot(*self._members.values(), retries=self._retries)
+        return dict(zip(self._members, values, strict=True))
+
+    def __getitem__(self, name: str) -> Snapshottable:
+        return self._members[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._members)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __repr__(self) -> str:
+        return f"CounterGroup({self.snapshot()})"
@@ -0,0 +1,13 @@
+"""Polling helper for tests that wait for other threads to reach a state."""
+# type: ignore
+
+from time import monotonic
+from time import sleep
+
+
+def wait_until(predicate, timeout=10.0):
+    """Poll `predicate` until it holds, failing the test after `timeout` seconds."""
+    deadline = monotonic() + timeout
+    while not predicate():
+        assert monotonic() < deadline, "condition was not reached in time"
+        sleep(0.001)
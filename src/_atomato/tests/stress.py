@@ -0,0 +1,159 @@
+"""Multi-threaded stress harness with a linearizability checker for the atomato primitives."""
+# type: ignore
+
+from random import Random
+from threading import Barrier
+from threading import Thread
+from time import perf_counter
+from time import perf_counter_ns
+from typing import Any
+from typing import Callable
+from typing import Hashable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+
+class Operation(NamedTuple):
+    """One completed call on the object under test, with its invocation and response times."""
+
+    thread: int
+    name: str
+    arg: Any
+    result: Any
+    start: int
+    end: int
+
+
+class StressReport(NamedTuple):
+    """Recorded history of a stress run."""
+
+    history: List[Operation]
+    elapsed: float
+
+    @property
+    def throughput(self) -> float:
+        """Return completed operations per second over all threads."""
+        return len(self.history) / self.elapsed
+
+
+def run_stress(
+    invoke: Callable[[str, Any], Any],
+    choose: Callable[[Random], Tuple[str, Any]],
+    threads: int = 4,
+    ops_per_thread: int = 50,
+    seed: int = 0,
+) -> StressReport:
+    """Run `threads` threads that each perform `ops_per_thread` randomized operations.
+
+    Args:
+        invoke: Performs operation (name, arg) on the object under test and returns its result.
+        choose: Picks the next (name, arg) from a per-thread random generator.
+        threads: Amount of concurrent threads.
+        ops_per_thread: Amount of operations every thread performs.
+        seed: Seed for the per-thread random generators, so runs are reproducible.
+
+    Returns:
+        StressReport: all operations with timestamps and the wall time of the run.
+    """
+    barrier = Barrier(threads)
+    histories: List[List[Operation]] = [[] for _ in range(threads)]
+
+    def worker(index: int) -> None:
+        rng = Random(seed * 1000 + index)
+        history = histories[index]
+        barrier.wait()
+        for _ in range(ops_per_thread):
+            name, arg = choose(rng)
+            start = perf_counter_ns()
+            result = invoke(name, arg)
+            history.append(Operation(index, name, arg, result, start, perf_counter_ns()))
+
+    workers = [Thread(target=worker, args=[i]) for i in range(threads)]
+    start = perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = perf_counter() - start
+    return StressReport([op for h in histories for op in h], elapsed)
+
+
+def check_linearizable(
+    history: List[Operation],
+    initial: Hashable,
+    step: Callable[[Hashable, Operation], Optional[Hashable]],
+) -> bool:
+    """Check whether `history` is linearizable with respect to a sequential model.
+
+    Implements the Wing & Gong search with memoization of visited (linearized set, state) pairs.
+
+    Args:
+        history: Completed operations.
+        initial: Initial state of the sequential model.
+        step: Applies an operation to a model state. Returns the next state, or None if the
+              operation's recorded result is impossible from that state.
+
+    Returns:
+        bool: True if some order of the operations that respects real time explains all results.
+    """
+    ops = sorted(history, key=lambda op: op.start)
+    done_mask = (1 << len(ops)) - 1
+    seen = set()
+    stack = [(0, initial)]
+    while stack:
+        mask, state = stack.pop()
+        if mask == done_mask:
+            return True
+        if (mask, state) in seen:
+            continue
+        seen.add((mask, state))
+        pending = [i for i in range(len(ops)) if not mask >> i & 1]
+        min_end = min(ops[i].end for i in pending)
+        for i in pending:
+            # an operation can only go next if no pending operation completed before it started
+            if ops[i].start > min_end:
+                break
+            next_state = step(state, ops[i])
+            if next_state is not None:
+                stack.append((mask | 1 << i, next_state))
+    return False
+
+
+def counter_step(
+    default_value: int = 0, allow_below_default: bool = True
+) -> Callable[[int, Operation], Optional[int]]:
+    """Return the sequential model of an `AtomicCounter` / `AtomicInteger`.
+
+    Args:
+        default_value: Default value of the counter.
+        allow_below_default: Same as the argument to `AtomicCounter`.
+
+    Returns:
+        Callable[[int, Operation], Optional[int]]: step function for `check_linearizable`.
+    """
+
+    def clamp(v: int) -> int:
+        return v if allow_below_default or v >= default_value else default_value
+
+    def step(state: int, op: Operation) -> Optional[int]:
+        if op.name in ("inc", "dec", "set", "reset"):
+            new = {
+                "inc": lambda: clamp(state + op.arg),
+                "dec": lambda: clamp(state - op.arg),
+                "set": lambda: clamp(op.arg),
+                "reset": lambda: default_value,
+            }[op.name]()
+            return new if op.result == new else None
+        if op.name == "read":
+            return state if op.result == state else None
+        predicates = {
+            "wait_equal": lambda: state == op.arg,
+            "wait_above": lambda: state > op.arg,
+            "wait_below": lambda: state < op.arg,
+        }
+        # a wait that timed out can be placed anywhere, one that succeeded needs a matching state
+        return state if not op.result or predicates[op.name]() else None
+
+    return step
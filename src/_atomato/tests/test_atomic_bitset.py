@@ -0,0 +1,141 @@
+# type: ignore
+
+from enum import IntFlag
+from threading import Condition
+from threading import Thread
+
+import pytest
+
+from atomato import AtomicBitSet
+from atomato import CancellationToken
+from atomato import PlainLockBackend
+from atomato import ReentrantLockBackend
+
+from .polling import wait_until
+
+
+class Ready(IntFlag):
+    DB = 1
+    CACHE = 2
+    QUEUE = 4
+
+
+class CountingCondition(Condition):
+    notified = 0
+
+    def notify_all(self):
+        CountingCondition.notified += 1
+        super().notify_all()
+
+
+class CountingBackend(ReentrantLockBackend):
+    def condition(self, lock=None):
+        return CountingCondition(self.lock() if lock is None else lock)
+
+
+def wait_for_waiters(bs, n):
+    wait_until(lambda: len(bs._waiters) == n)
+
+
+def test_atomic_bitset_basics():
+    bs = AtomicBitSet(0b100)
+    assert bs.value == 4
+    assert bs.set_bits(0b011) == 0b111
+    assert bs.clear_bits(0b101) == 0b010
+    assert bs.popcount() == 1
+    assert bs.popcount(0b101) == 0
+
+    assert bs.test_and_set(0b001) is False
+    assert bs.test_and_set(0b001) is True
+    assert bs.test_and_clear(0b001) is True
+    assert bs.test_and_clear(0b001) is False
+
+    assert bs.all_set(0b010) is True
+    assert bs.all_set(0b011) is False
+    assert bs.any_set(0b011) is True
+    assert bs.any_set(0b101) is False
+    assert 0b010 in bs
+    assert 0b011 not in bs
+
+    assert int(bs) == 2
+    assert bs == 2
+    assert bs != "2"
+    assert str(bs) == "0b10"
+    assert repr(bs) == "AtomicBitSet(0b10)"
+
+    with pytest.raises(ValueError):
+        AtomicBitSet(-1)
+    with pytest.raises(ValueError):
+        bs.set_bits(-1)
+
+
+def test_atomic_bitset_int_flag():
+    bs = AtomicBitSet(Ready.DB, lock=PlainLockBackend())
+    bs.set_bits(Ready.CACHE)
+    assert Ready(bs.value) == Ready.DB | Ready.CACHE
+    assert bs.all_set(Ready.DB | Ready.CACHE)
+    assert bs.wait_all_set(Ready.DB | Ready.CACHE, timeout=0.0001) is True
+    assert bs.wait_any_set(Ready.QUEUE, timeout=0.0001) is False
+    assert bs.wait_all_clear(Ready.QUEUE) is True
+
+
+def test_atomic_bitset_waits():
+    bs = AtomicBitSet(0b001)
+    results = {}
+
+    def wait(name, fn, mask):
+        results[name] = fn(mask, timeout=10)
+
+    threads = [
+        Thread(target=wait, args=("all", bs.wait_all_set, 0b011)),
+        Thread(target=wait, args=("any", bs.wait_any_set, 0b110)),
+        Thread(target=wait, args=("clear", bs.wait_all_clear, 0b001)),
+    ]
+    for t in threads:
+        t.start()
+    wait_for_waiters(bs, 3)
+
+    bs.set_bits(0b010)
+    for t in threads[:2]:
+        t.join(timeout=10)
+    assert results == {"all": True, "any": True}
+
+    bs.clear_bits(0b001)
+    threads[2].join(timeout=10)
+    assert results["clear"] is True
+    assert bs._waiters == []
+
+
+def test_atomic_bitset_only_wakes_relevant_waiters():
+    CountingCondition.notified = 0
+    bs = AtomicBitSet(lock=CountingBackend())
+    t = Thread(target=bs.wait_all_set, args=(0b1000,), kwargs={"timeout": 10})
+    t.start()
+    wait_for_waiters(bs, 1)
+
+    # changes to other bits and no-op changes do not wake the waiter
+    bs.set_bits(0b0111)
+    bs.clear_bits(0b0001)
+    bs.clear_bits(0b1000)
+    assert CountingCondition.notified == 0
+
+    bs.set_bits(0b1000)
+    t.join(timeout=10)
+    assert not t.is_alive()
+    assert CountingCondition.notified == 1
+
+
+def test_atomic_bitset_wait_timeout_and_cancel():
+    bs = AtomicBitSet()
+    assert bs.wait_all_set(1, timeout=0.0001) is False
+    assert bs._waiters == []
+
+    token = CancellationToken()
+    results = []
+    t = Thread(target=lambda: results.append(bs.wait_any_set(1, cancel=token)))
+    t.start()
+    wait_for_waiters(bs, 1)
+    token.cancel()
+    t.join(timeout=10)
+    assert results == [False]
+    assert bs._waiters == []
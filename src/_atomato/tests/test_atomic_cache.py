@@ -0,0 +1,199 @@
+# type: ignore
+
+from threading import Barrier
+from threading import Event
+from threading import Thread
+from time import sleep
+
+import pytest
+
+from atomato import AtomicCache
+from atomato import CacheStats
+
+from .polling import wait_until
+
+
+def test_atomic_cache_basics():
+    cache = AtomicCache(lambda k: k * 2)
+    assert cache.get(1) == 2
+    assert cache.get(1) == 2
+    assert 1 in cache
+    assert 2 not in cache
+    assert len(cache) == 1
+
+    stats = cache.stats
+    assert isinstance(stats, CacheStats)
+    assert (stats.hits, stats.misses, stats.loads, stats.load_failures) == (1, 1, 1, 0)
+    assert stats.load_time >= 0
+
+    assert str(cache) == "{1: 2}"
+    assert repr(cache) == "AtomicCache({1: 2})"
+
+    cache.invalidate(1)
+    assert 1 not in cache
+    cache.get(2)
+    cache.clear()
+    assert len(cache) == 0
+
+    with pytest.raises(ValueError):
+        AtomicCache(lambda k: k, refresh_ahead=0.5)
+    with pytest.raises(ValueError):
+        AtomicCache(lambda k: k, ttl=1, refresh_ahead=1)
+    with pytest.raises(ValueError):
+        AtomicCache(lambda k: k, ttl=0)
+    with pytest.raises(ValueError):
+        AtomicCache(lambda k: k, max_size=0)
+
+
+def test_atomic_cache_ttl_and_lru():
+    cache = AtomicCache(lambda k: k, ttl=0.01)
+    cache.get(1)
+    sleep(0.02)
+    assert 1 not in cache
+    cache.get(1)
+    assert cache.stats.misses == 2
+
+    cache = AtomicCache(lambda k: k, max_size=2)
+    cache.get(1)
+    cache.get(2)
+    cache.get(1)
+    cache.get(3)
+    assert 1 in cache and 3 in cache
+    assert 2 not in cache
+
+
+def test_atomic_cache_single_flight():
+    thread_count = 8
+    barrier = Barrier(thread_count)
+    release = Event()
+    calls = []
+
+    def loader(k):
+        calls.append(k)
+        release.wait()
+        return k
+
+    cache = AtomicCache(loader)
+
+    def worker():
+        barrier.wait()
+        assert cache.get("a") == "a"
+
+    threads = [Thread(target=worker) for _ in range(thread_count)]
+    for t in threads:
+        t.start()
+    wait_until(lambda: calls)
+    # every other worker waits for the load in flight instead of loading itself
+    wait_until(lambda: len(cache._loading["a"]._waiters) == thread_count - 1)
+    release.set()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert calls == ["a"]
+    assert cache.stats.loads == 1
+
+
+def test_atomic_cache_loader_failure():
+    attempts = []
+
+    def loader(k):
+        attempts.append(k)
+        if len(attempts) == 1:
+            raise RuntimeError("first load fails")
+        return k
+
+    cache = AtomicCache(loader)
+    with pytest.raises(RuntimeError):
+        cache.get(1)
+    assert cache.get(1) == 1
+    assert cache.stats.load_failures == 1
+
+
+def test_atomic_cache_refresh_ahead():
+    loads = []
+    fail = Event()
+
+    def loader(k):
+        if fail.is_set():
+            raise RuntimeError("refresh fails")
+        loads.append(k)
+        return len(loads)
+
+    cache = AtomicCache(loader, ttl=10, refresh_ahead=0.5)
+    assert cache.get("a") == 1
+
+    # pretend the entry was loaded long enough ago to be refreshed ahead of expiry
+    value, loaded_at = cache._entries["a"]
+    cache._entries["a"] = (value, loaded_at - 6)
+    assert cache.get("a") == 1
+    wait_until(lambda: cache.get("a") == 2)
+
+    fail.set()
+    value, loaded_at = cache._entries["a"]
+    cache._entries["a"] = (value, loaded_at - 6)
+    assert cache.get("a") == 2
+    wait_until(lambda: cache.stats.load_failures == 1)
+
+    # a failed refresh is not retried on every hit until the entry expires
+    for _ in range(10):
+        assert cache.get("a") == 2
+    assert "a" not in cache._loading
+    assert cache.stats.load_failures == 1
+
+    # an expired entry is loaded again, which also re-enables refreshing
+    fail.clear()
+    value, loaded_at = cache._entries["a"]
+    cache._entries["a"] = (value, loaded_at - 10)
+    assert cache.get("a") == 3
+    assert "a" not in cache._refresh_failed
+
+
+def test_atomic_cache_invalidate_during_load():
+    loading = Event()
+    release = Event()
+
+    def loader(k):
+        if not release.is_set():
+            loading.set()
+            assert release.wait(timeout=5)
+            return "stale"
+        return "fresh"
+
+    for drop in [lambda c: c.invalidate("k"), lambda c: c.clear()]:
+        loading.clear()
+        release.clear()
+        cache = AtomicCache(loader)
+        results = []
+        t = Thread(target=lambda: results.append(cache.get("k")))  # noqa: B023
+        t.start()
+        assert loading.wait(timeout=5)
+
+        drop(cache)
+        release.set()
+        t.join(timeout=5)
+
+        # the caller that ran the load gets its value, but it is not stored
+        assert results == ["stale"]
+        assert str(cache) == "{}"
+        assert cache.get("k") == "fresh"
+        assert cache._stale == set()
+
+
+def test_atomic_cache_refresh_thread_started_without_lock(monkeypatch):
+    import _atomato.atomic_cache
+
+    cache = AtomicCache(lambda k: k, ttl=10, refresh_ahead=0.5)
+    locked_at_start = []
+
+    class RecordingThread(Thread):
+        def start(self):
+            locked_at_start.append(cache._lock.locked())
+            super().start()
+
+    monkeypatch.setattr(_atomato.atomic_cache, "Thread", RecordingThread)
+    assert cache.get("a") == "a"
+    value, loaded_at = cache._entries["a"]
+    cache._entries["a"] = (value, loaded_at - 6)
+    assert cache.get("a") == "a"
+    wait_until(lambda: "a" not in cache._loading)
+    assert locked_at_start == [False]
@@ -125,3 +125,71 @@ def test_atomic_counter_lock():
 
     ctr.wait_above(0)
     assert ctr > 0
+
+
+def test_atomic_counter_batch():
+    ctr = AtomicCounter(2, allow_below_default=False)
+    with ctr.batch() as b:
+        assert b.value == 2
+        assert b.inc(5) == 7
+        assert b.dec() == 6
+        assert b.dec(100) == 2
+        assert b.set(9) == 9
+        assert b.set(-1) == 2
+        assert b.reset() == 2
+        assert b.inc(40) == 42
+        # the counter is locked, not yet changed
+        assert ctr._ao._object == 2
+    assert ctr.value == 42
+    assert ctr._ao.version == 1
+
+    # a batch without net change does not publish, an exception discards the batch
+    with ctr.batch() as b:
+        b.inc()
+        b.dec()
+    with pytest.raises(KeyError):
+        with ctr.batch() as b:
+            b.inc()
+            raise KeyError
+    assert ctr.value == 42
+    assert ctr._ao.version == 1
+
+    with pytest.raises(RuntimeError, match="inside its with block"):
+        b.inc()
+    with pytest.raises(RuntimeError, match="inside its with block"):
+        b.value
+    with b:
+        with pytest.raises(RuntimeError, match="already active"):
+            b.__enter__()
+    assert not ctr._ao._lock._is_owned()
+
+
+def test_atomic_counter_batch_is_atomic():
+    ctr = AtomicCounter()
+    seen = []
+
+    def waiter():
+        ctr.wait_above(0)
+        seen.append(ctr.value)
+
+    t = Thread(target=waiter)
+    t.start()
+    sleep(0.01)
+    with ctr.batch() as b:
+        for _ in range(100):
+            b.inc()
+    t.join(timeout=10)
+    assert seen == [100]
+
+    def worker():
+        for _ in range(100):
+            with ctr.batch() as b:
+                b.inc()
+                b.inc()
+
+    threads = [Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert ctr.value == 900
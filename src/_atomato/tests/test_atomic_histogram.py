@@ -0,0 +1,139 @@
+# type: ignore
+
+import gc
+from threading import Thread
+
+import pytest
+
+from atomato import AtomicHistogram
+from atomato import HistogramSnapshot
+
+
+def test_atomic_histogram_basics():
+    h = AtomicHistogram([1, 2, 5, 10])
+    assert h.bounds == (1, 2, 5, 10)
+
+    s = h.snapshot()
+    assert s.count == 0
+    assert s.mean == 0.0
+    assert s.percentile(50) == 0.0
+
+    for v in [0.5, 1, 1.5, 3, 4, 7, 20]:
+        h.observe(v)
+    s = h.snapshot()
+    assert isinstance(s, HistogramSnapshot)
+    assert s.counts == (2, 1, 2, 1, 1)
+    assert s.count == 7
+    assert s.total == pytest.approx(37)
+    assert s.mean == pytest.approx(37 / 7)
+    assert s.percentile(0) == 1
+    assert s.percentile(50) == 5
+    assert s.percentile(85) == 10
+    # values above the last bound are reported as the last bound
+    assert s.percentile(100) == 10
+
+    h.observe_many([1, 1, 1])
+    assert h.snapshot().counts == (5, 1, 2, 1, 1)
+
+    assert repr(s) == f"HistogramSnapshot(count=7, mean={37 / 7})"
+    assert str(AtomicHistogram([1])) == "count=0, mean=0.0"
+    assert repr(AtomicHistogram([1])) == "AtomicHistogram(count=0, mean=0.0)"
+
+    with pytest.raises(ValueError):
+        s.percentile(101)
+    with pytest.raises(ValueError):
+        AtomicHistogram([])
+    with pytest.raises(ValueError):
+        AtomicHistogram([2, 1])
+
+
+def test_atomic_histogram_log_linear():
+    h = AtomicHistogram.log_linear(1, 100, sub_buckets=4)
+    assert h.bounds[:6] == (1, 1.25, 1.5, 1.75, 2, 2.5)
+    assert h.bounds[-1] >= 100
+    assert all(a < b for a, b in zip(h.bounds, h.bounds[1:]))
+
+    with pytest.raises(ValueError):
+        AtomicHistogram.log_linear(0, 100)
+    with pytest.raises(ValueError):
+        AtomicHistogram.log_linear(10, 1)
+
+
+def test_atomic_histogram_concurrency():
+    h = AtomicHistogram([1, 2, 3])
+    thread_count = 4
+
+    def worker():
+        for _ in range(1000):
+            h.observe(2)
+        h.observe_many([3] * 1000)
+
+    threads = [Thread(target=worker) for _ in range(thread_count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+
+    s = h.snapshot()
+    assert s.counts == (0, 4000, 4000, 0)
+    assert s.total == 20000
+
+
+def test_atomic_histogram_retires_exited_threads():
+    h = AtomicHistogram([1, 2])
+    h.observe(1)
+    for _ in range(20):
+        t = Thread(target=h.observe_many, args=[[2, 3]])
+        t.start()
+        t.join()
+    gc.collect()
+    # the retired shard and the main thread's shard
+    assert len(h._shards) == 2
+    s = h.snapshot()
+    assert s.counts == (1, 20, 20)
+    assert s.total == 101
+
+    # threads outliving their histogram retire nothing
+    t = Thread(target=AtomicHistogram([1]).observe, args=[1])
+    t.start()
+    t.join()
+
+
+def test_atomic_histogram_window(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("_atomato.atomic_histogram.monotonic", lambda: now[0])
+
+    h = AtomicHistogram([1, 10], window=60, rotations=6)
+    h.observe(1)
+    assert h.window_snapshot().count == 1
+
+    # reading every rotation interval keeps the window moving
+    for _ in range(6):
+        now[0] += 10
+        h.window_snapshot()
+        h.observe(5)
+    s = h.window_snapshot()
+    assert s.counts == (0, 6, 0)
+    assert h.snapshot().count == 7
+
+    # after a long idle period the window starts at the moment of reading
+    now[0] += 1000
+    h.observe(5)
+    assert h.window_snapshot().count == 0
+
+    # an explicit rotation takes a checkpoint only when one is due
+    now[0] += 10
+    h.observe(5)
+    h.rotate()
+    h.rotate()
+    assert [t for t, _ in h._checkpoints][-2:] == [now[0] - 10, now[0]]
+    assert h.window_snapshot().count == 1
+
+    with pytest.raises(ValueError):
+        AtomicHistogram([1]).window_snapshot()
+    with pytest.raises(ValueError):
+        AtomicHistogram([1]).rotate()
+    with pytest.raises(ValueError, match="window should be positive, got 0"):
+        AtomicHistogram([1], window=0)
+    with pytest.raises(ValueError, match="rotations should be at least 1, got 0"):
+        AtomicHistogram([1], window=60, rotations=0)
@@ -0,0 +1,105 @@
+# type: ignore
+
+from threading import Barrier
+from threading import Event
+from threading import Thread
+
+import pytest
+
+from atomato import AtomicLazy
+
+
+def test_atomic_lazy_basics():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return "config"
+
+    lazy = AtomicLazy(loader)
+    assert lazy.loaded is False
+    assert str(lazy) == "<not loaded>"
+
+    assert lazy.value == "config"
+    assert lazy.value == "config"
+    assert lazy.loaded is True
+    assert len(calls) == 1
+    assert repr(lazy) == "AtomicLazy(config)"
+
+    lazy.reset()
+    assert lazy.loaded is False
+    assert lazy.value == "config"
+    assert len(calls) == 2
+
+
+def test_atomic_lazy_single_flight():
+    thread_count = 8
+    barrier = Barrier(thread_count)
+    calls = []
+    results = []
+
+    def loader():
+        calls.append(1)
+        return object()
+
+    lazy = AtomicLazy(loader)
+
+    def worker():
+        barrier.wait()
+        results.append(lazy.value)
+
+    threads = [Thread(target=worker) for _ in range(thread_count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert len(calls) == 1
+    assert len(results) == thread_count
+    assert all(r is results[0] for r in results)
+
+
+def test_atomic_lazy_loader_failure():
+    attempts = []
+
+    def loader():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("first load fails")
+        return 1
+
+    lazy = AtomicLazy(loader)
+    with pytest.raises(RuntimeError):
+        lazy.value
+    assert lazy.loaded is False
+    assert lazy.value == 1
+
+
+def test_atomic_lazy_reset_during_load():
+    loading = Event()
+    release = Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        if len(calls) == 1:
+            loading.set()
+            assert release.wait(timeout=5)
+            return "stale"
+        return "fresh"
+
+    lazy = AtomicLazy(loader)
+    results = []
+    t = Thread(target=lambda: results.append(lazy.value))
+    t.start()
+    assert loading.wait(timeout=5)
+
+    lazy.reset()
+    release.set()
+    t.join(timeout=5)
+
+    # the caller that ran the load gets its value, but it is not kept
+    assert results == ["stale"]
+    assert lazy.loaded is False
+    assert lazy.value == "fresh"
+    assert len(calls) == 2
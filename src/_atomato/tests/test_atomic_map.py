@@ -0,0 +1,171 @@
+# type: ignore
+
+from threading import Event
+from threading import Thread
+
+import pytest
+
+from atomato import AtomicMap
+
+from .polling import wait_until
+
+
+def test_atomic_map_basics():
+    m = AtomicMap()
+    assert len(m) == 0
+    assert m.get("a") is None
+    assert m.get("a", 1) == 1
+
+    assert m.set("a", 1) == 1
+    m["b"] = 2
+    assert m["a"] == 1
+    assert "b" in m
+    assert "c" not in m
+    assert len(m) == 2
+    assert sorted(m) == ["a", "b"]
+    assert sorted(m.values()) == [1, 2]
+    assert dict(m.items()) == {"a": 1, "b": 2}
+
+    assert m.pop("b") == 2
+    assert m.pop("b", 0) == 0
+    del m["a"]
+    with pytest.raises(KeyError):
+        m["a"]
+
+    m = AtomicMap(stripes=1)
+    m["a"] = 1
+    assert str(m) == "{'a': 1}"
+    assert repr(m) == "AtomicMap({'a': 1})"
+
+    with pytest.raises(ValueError):
+        AtomicMap(stripes=0)
+
+
+def test_atomic_map_compute():
+    m = AtomicMap()
+
+    assert m.compute("a", lambda v: (v or 0) + 1) == 1
+    assert m.compute("a", lambda v: (v or 0) + 1) == 2
+    assert m.compute("a", lambda v: None) is None
+    assert "a" not in m
+
+    assert m.compute_if_absent("a", lambda k: k * 2) == "aa"
+    assert m.compute_if_absent("a", lambda k: k * 3) == "aa"
+
+    assert m.merge("b", 1, lambda x, y: x + y) == 1
+    assert m.merge("b", 2, lambda x, y: x + y) == 3
+
+
+def test_atomic_map_concurrent_compute():
+    m = AtomicMap(stripes=4)
+
+    def worker():
+        for i in range(1000):
+            m.merge(i % 10, 1, lambda x, y: x + y)
+
+    threads = [Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert dict(m.items()) == {i: 400 for i in range(10)}
+
+
+def test_atomic_map_wait_key():
+    m = AtomicMap(stripes=1)
+
+    assert m.wait_key("a", lambda v: v is None) is True
+    assert m.wait_key("a", lambda v: v == 1, timeout=0.0001) is False
+    assert m._stripes[0].waiters == {}
+
+    woken = []
+    started = Event()
+
+    def waiter():
+        def predicate(v):
+            woken.append(v)
+            started.set()
+            return v == 2
+
+        assert m.wait_key("a", predicate) is True
+
+    t = Thread(target=waiter)
+    t.start()
+    started.wait()
+
+    # writes to another key in the same stripe do not wake the waiter
+    for i in range(100):
+        m["b"] = i
+    m["a"] = 2
+    t.join(timeout=5)
+
+    assert not t.is_alive()
+    assert woken == [None, 2]
+    assert m._stripes[0].waiters == {}
+
+
+def test_atomic_map_wait_key_shared_condition():
+    m = AtomicMap(stripes=1)
+    results = []
+
+    def waiter(timeout):
+        results.append(m.wait_key("a", lambda v: v == 1, timeout=timeout))
+
+    long_waiter = Thread(target=waiter, args=[5])
+    long_waiter.start()
+    wait_until(lambda: "a" in m._stripes[0].waiters)
+
+    short_waiter = Thread(target=waiter, args=[0.05])
+    short_waiter.start()
+    wait_until(lambda: m._stripes[0].waiters["a"][1] == 2 or not short_waiter.is_alive())
+    short_waiter.join(timeout=5)
+
+    # the condition is shared and kept until the last waiter for the key left
+    assert results == [False]
+    assert m._stripes[0].waiters["a"][1] == 1
+
+    m["a"] = 1
+    long_waiter.join(timeout=5)
+    assert results == [False, True]
+    assert m._stripes[0].waiters == {}
+
+
+def test_atomic_map_compute_noop_does_not_wake():
+    m = AtomicMap(stripes=1)
+    woken = []
+    started = Event()
+
+    def waiter():
+        def predicate(v):
+            woken.append(v)
+            started.set()
+            return v == 1
+
+        assert m.wait_key("a", predicate) is True
+
+    t = Thread(target=waiter)
+    t.start()
+    started.wait()
+
+    # removing an absent key changes nothing and does not wake the waiter
+    for _ in range(100):
+        assert m.compute("a", lambda v: None) is None
+    m.compute("a", lambda v: 1)
+    t.join(timeout=5)
+    assert woken == [None, 1]
+
+    assert m.compute("a", lambda v: None) is None
+    assert "a" not in m
+
+
+def test_atomic_map_iteration_does_not_block_writers():
+    m = AtomicMap(stripes=2)
+    for i in range(10):
+        m[i] = i
+
+    it = m.items()
+    next(it)
+    # iteration is suspended between stripes while a writer comes in
+    m[100] = 100
+    assert len(list(it)) >= 9
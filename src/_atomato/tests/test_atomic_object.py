@@ -3,6 +3,8 @@ import pytest
 
 from atomato import AtomicObject
 
+from .polling import wait_until
+
 
 def test_atomic_variables_basics():
     a = AtomicObject(int())
@@ -87,3 +89,168 @@ def test_atomic_variables_concurrency():
 
     iteration_time = time() - iteration_time_start
     assert iteration_time < 0.001
+
+
+def test_atomic_object_versions():
+    a = AtomicObject(0)
+    assert a.read_versioned() == (0, 0)
+    a.set(1)
+    a.set_by(lambda v: None)
+    assert a.version == 2
+
+    value, version = a.read_versioned()
+    assert a.compare_and_set(version, value + 1) is True
+    assert a.read_versioned() == (2, 3)
+    # the version moved on, so a second attempt from the same read fails
+    assert a.compare_and_set(version, 100) is False
+    assert a.value == 2
+
+
+def test_atomic_object_update():
+    from threading import Event
+    from threading import Thread
+
+    a = AtomicObject((1,))
+    assert a.update(lambda t: t + (2,)) == (1, 2)
+
+    # readers are not blocked while the update function runs
+    entered, release = Event(), Event()
+    calls = []
+
+    def slow(t):
+        calls.append(t)
+        entered.set()
+        release.wait(timeout=10)
+        return t + (3,)
+
+    t = Thread(target=a.update, args=[slow])
+    t.start()
+    assert entered.wait(timeout=10)
+    assert a.value == (1, 2)
+    # a concurrent change makes the first attempt retry on the newer value
+    a.set((0,))
+    release.set()
+    t.join(timeout=10)
+    assert calls == [(1, 2), (0,)]
+    assert a.value == (0, 3)
+
+
+def test_atomic_object_update_falls_back_to_lock():
+    a = AtomicObject(0)
+    calls = []
+
+    def contended(v):
+        calls.append(v)
+        if len(calls) <= 3:
+            # every optimistic attempt loses against another change
+            a.set(v + 10)
+        return v + 1
+
+    assert a.update(contended, max_retries=3) == 31
+    assert calls == [0, 10, 20, 30]
+    assert a.value == 31
+
+
+def queued(a, n):
+    wait_until(lambda: a.waiter_stats().waiters == n)
+
+
+def test_atomic_object_priority_order():
+    from threading import Thread
+
+    a = AtomicObject(0)
+    order = []
+
+    def waiter(priority):
+        with a:
+            assert a.wait_for(lambda v: v > 0, timeout=10, priority=priority)
+            order.append(priority)
+
+    # equal priorities are woken in arrival order
+    threads = []
+    for priority in [2, 0, 1, 0]:
+        threads.append(Thread(target=waiter, args=[priority]))
+        threads[-1].start()
+        queued(a, len(threads))
+
+    stats = a.waiter_stats()
+    assert stats.waiters == 4
+    assert stats.oldest > 0
+
+    a.set(1)
+    for t in threads:
+        t.join(timeout=10)
+    assert order == [0, 0, 1, 2]
+    assert a.waiter_stats() == (0, 0.0)
+
+    # satisfied waits return at once
+    assert a.wait_for(lambda v: v == 1, priority=5) is True
+
+
+def test_atomic_object_priority_handoff():
+    from threading import Thread
+
+    from atomato import AtomicCounter
+
+    slots = AtomicCounter(0)
+    admitted = []
+
+    def admit(priority):
+        with slots:
+            assert slots.wait_above(0, timeout=10, priority=priority)
+            slots.dec()
+            admitted.append(priority)
+
+    threads = [Thread(target=admit, args=[p]) for p in [3, 1, 2]]
+    for i, t in enumerate(threads):
+        t.start()
+        queued(slots._ao, i + 1)
+
+    def admitted_count(n):
+        def reached():
+            with slots:
+                return len(admitted) == n
+
+        wait_until(reached)
+
+    # each free slot goes to the best queued waiter, the others keep waiting
+    slots.inc()
+    admitted_count(1)
+    assert admitted == [1]
+    slots.inc()
+    admitted_count(2)
+    assert admitted == [1, 2]
+    assert slots.waiter_stats().waiters == 1
+    slots.inc()
+    for t in threads:
+        t.join(timeout=10)
+    assert admitted == [1, 2, 3]
+
+
+def test_atomic_object_priority_timeout_and_cancel():
+    from threading import Thread
+
+    from atomato import CancellationToken
+    from atomato import WaitOutcome
+
+    a = AtomicObject(0)
+    assert a.wait_for(lambda v: v > 0, timeout=0.0001, priority=0) is False
+
+    token = CancellationToken()
+    results = []
+    t = Thread(
+        target=lambda: results.append(
+            a.wait_for_result(lambda v: v > 0, cancel=token, priority=0)
+        )
+    )
+    t.start()
+    queued(a, 1)
+    token.cancel()
+    t.join(timeout=10)
+    assert results[0].outcome is WaitOutcome.CANCELLED
+    assert a.waiter_stats().waiters == 0
+
+    # a failing predicate still leaves the queue
+    with pytest.raises(ZeroDivisionError):
+        a.wait_for(lambda v: 1 / v, priority=0)
+    assert a.waiter_stats().waiters == 0
@@ -0,0 +1,83 @@
+# type: ignore
+
+import sys
+from math import exp
+from threading import Thread
+
+import pytest
+
+from atomato import AtomicRateMeter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("_atomato.atomic_rate_meter.monotonic", lambda: now[0])
+    return now
+
+
+def test_atomic_rate_meter_basics(clock):
+    m = AtomicRateMeter()
+    assert m.count == 0
+    assert m.rates == (0.0, 0.0, 0.0)
+    assert m.mean_rate == 0.0
+    assert str(m) == "0.000/0.000/0.000"
+    assert repr(m) == "AtomicRateMeter(0.000/0.000/0.000)"
+
+    m.mark(10)
+    m.mark()
+    assert m.count == 11
+    # nothing is averaged until the first tick completed
+    assert m.one_minute_rate == 0.0
+
+    clock[0] += 5
+    assert m.instant_rate == pytest.approx(11 / 5)
+    assert m.one_minute_rate == pytest.approx(11 / 5)
+    assert m.five_minute_rate == pytest.approx(11 / 5)
+    assert m.fifteen_minute_rate == pytest.approx(11 / 5)
+    assert m.mean_rate == pytest.approx(11 / 5)
+
+
+def test_atomic_rate_meter_decay(clock):
+    m = AtomicRateMeter()
+    m.mark(50)
+    clock[0] += 5
+    assert m.one_minute_rate == pytest.approx(10)
+
+    m.mark(100)
+    clock[0] += 5
+    alpha = 1 - exp(-5 / 60)
+    expected = 10 + alpha * (20 - 10)
+    assert m.one_minute_rate == pytest.approx(expected)
+
+    # a minute without events decays the averages lazily, in one go
+    clock[0] += 60
+    decay = exp(-5 / 60)
+    assert m.one_minute_rate == pytest.approx(expected * decay**12)
+    assert m.instant_rate == 0.0
+    m1, m5, m15 = m.rates
+    assert m1 < m5 < m15
+
+
+def test_atomic_rate_meter_concurrency(clock):
+    m = AtomicRateMeter()
+
+    def worker():
+        for _ in range(1000):
+            m.mark()
+
+    threads = [Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert m.count == 4000
+    clock[0] += 5
+    assert m.instant_rate == pytest.approx(800)
+
+
+def test_atomic_rate_meter_is_compact():
+    m = AtomicRateMeter()
+    assert not hasattr(m, "__dict__")
+    assert sys.getsizeof(m) < 200
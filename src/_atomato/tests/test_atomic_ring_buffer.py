@@ -0,0 +1,127 @@
+# type: ignore
+
+import asyncio
+from threading import Thread
+
+import pytest
+
+from atomato import AtomicRingBuffer
+
+
+def test_atomic_ring_buffer_basics():
+    rb = AtomicRingBuffer(3)
+    assert rb.capacity == 3
+    assert len(rb) == 0
+
+    assert rb.put(1) is True
+    assert rb.put(2) is True
+    assert len(rb) == 2
+    assert rb.get() == 1
+
+    # wrap around the end of the preallocated slots
+    assert rb.put_many([3, 4]) == 2
+    assert len(rb) == 3
+    assert rb.put(5, timeout=0.0001) is False
+    assert rb.put_many([5, 6], timeout=0.0001) == 0
+
+    assert str(rb) == "[2, 3, 4]"
+    assert repr(rb) == "AtomicRingBuffer([2, 3, 4], capacity=3)"
+
+    assert rb.get_many(2) == [2, 3]
+    assert rb.get_many(10) == [4]
+    assert rb.get_many(10, timeout=0.0001) == []
+
+    with pytest.raises(TimeoutError):
+        rb.get(timeout=0.0001)
+
+    with pytest.raises(ValueError):
+        rb.get_many(0)
+
+    with pytest.raises(ValueError):
+        AtomicRingBuffer(0)
+
+
+def test_atomic_ring_buffer_concurrency():
+    rb = AtomicRingBuffer(4)
+    item_count = 1000
+    received = []
+
+    def producer():
+        for i in range(0, item_count, 10):
+            assert rb.put_many(range(i, i + 10)) == 10
+
+    def consumer():
+        while len(received) < item_count:
+            received.extend(rb.get_many(7))
+
+    threads = [Thread(target=producer), Thread(target=consumer)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert received == list(range(item_count))
+    assert len(rb) == 0
+
+
+def test_atomic_ring_buffer_async():
+    async def main():
+        rb = AtomicRingBuffer(2)
+        item_count = 100
+
+        async def producer():
+            for i in range(item_count):
+                await rb.aput(i)
+
+        async def consumer():
+            return [await rb.aget() for _ in range(item_count)]
+
+        _, received = await asyncio.gather(producer(), consumer())
+        assert received == list(range(item_count))
+
+        # a cancelled getter must not leave a stale waiter behind
+        getter = asyncio.ensure_future(rb.aget())
+        await asyncio.sleep(0)
+        getter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await getter
+        await rb.aput(1)
+        assert await rb.aget() == 1
+
+    asyncio.run(main())
+
+
+def test_atomic_ring_buffer_async_wakes_from_thread():
+    async def main():
+        rb = AtomicRingBuffer(1)
+        rb.put(0)
+
+        def sync_side():
+            assert rb.get() == 0
+
+        putter = asyncio.ensure_future(rb.aput(1))
+        await asyncio.sleep(0)
+        t = Thread(target=sync_side)
+        t.start()
+        await putter
+        t.join(timeout=5)
+        assert rb.get() == 1
+
+    asyncio.run(main())
+
+
+def test_atomic_ring_buffer_async_cancel_passes_wakeup_on():
+    async def main():
+        rb = AtomicRingBuffer(1)
+        first = asyncio.ensure_future(rb.aget())
+        second = asyncio.ensure_future(rb.aget())
+        await asyncio.sleep(0)
+
+        # the put resolves the first getter's future, which is cancelled before it can run
+        rb.put(1)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert await asyncio.wait_for(second, timeout=5) == 1
+
+    asyncio.run(main())
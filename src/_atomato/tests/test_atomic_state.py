@@ -6,6 +6,8 @@ import pytest
 
 from atomato import AtomicState
 
+from .polling import wait_until
+
 
 def test_atomic_state_basics():
     class State(int, Enum):
@@ -109,3 +111,27 @@ def test_atomic_state_unqualified_inputs():
     s = AtomicState(State.A)
 
     assert (s == object()) is False
+
+
+def test_atomic_state_wait_for_state():
+    from threading import Thread
+
+    class State(int, Enum):
+        IDLE = 0
+        RUNNING = 1
+
+    s = AtomicState(State.IDLE)
+    assert s.wait_for_state(State.IDLE) is True
+    assert s.tracker.wait_for_state(State.RUNNING, timeout=0.0001) is False
+
+    results = []
+    t = Thread(
+        target=lambda: results.append(
+            s.tracker.wait_for_state(State.RUNNING, timeout=10, priority=0)
+        )
+    )
+    t.start()
+    wait_until(lambda: s._state.waiter_stats().waiters)
+    s.set(State.RUNNING)
+    t.join(timeout=10)
+    assert results == [True]
@@ -0,0 +1,109 @@
+# type: ignore
+
+import gc
+from threading import Event
+from threading import Thread
+from threading import enumerate as threads
+
+import pytest
+
+from atomato import AtomicCounter
+from atomato import BufferedCounter
+
+
+def test_buffered_counter_basics():
+    backing = AtomicCounter(10)
+    ctr = BufferedCounter(backing, flush_every=3, flush_interval=None)
+    assert ctr.counter is backing
+
+    ctr.inc()
+    ctr.inc(2)
+    assert ctr.value == 10  # still buffered
+    ctr.dec()
+    assert ctr.value == 12  # the third operation flushed the buffer
+
+    ctr.inc(5)
+    assert ctr.value == 12
+    assert ctr.sync() == 17
+    assert ctr.sync() == 17
+
+    assert int(ctr) == 17
+    assert str(ctr) == "17"
+    assert repr(ctr) == "BufferedCounter(17)"
+
+    with pytest.raises(ValueError):
+        BufferedCounter(flush_every=0)
+    with pytest.raises(ValueError):
+        BufferedCounter(flush_interval=0)
+
+
+def test_buffered_counter_threads():
+    with BufferedCounter(flush_every=128, flush_interval=None) as ctr:
+        release = Event()
+        done = [Event() for _ in range(4)]
+
+        def work(done):
+            for _ in range(10_000):
+                ctr.inc()
+            done.set()
+            release.wait(timeout=10)
+
+        workers = [Thread(target=work, args=[e]) for e in done]
+        for t in workers:
+            t.start()
+        for e in done:
+            assert e.wait(timeout=10)
+        # sync sees the buffers of threads that are still alive
+        assert ctr.value < 40_000
+        assert ctr.sync() == 40_000
+
+        release.set()
+        for t in workers:
+            t.join()
+
+
+def test_buffered_counter_flush_on_thread_exit():
+    ctr = BufferedCounter(flush_every=1000, flush_interval=None)
+    t = Thread(target=lambda: ctr.inc(7))
+    t.start()
+    t.join()
+    del t
+    gc.collect()
+    assert ctr.value == 7
+    assert ctr._buffers == []
+
+
+def test_buffered_counter_background_flush():
+    ctr = BufferedCounter(flush_every=1000, flush_interval=0.001)
+    ctr.inc(3)
+    # waits on the backing counter see the increment within the staleness bound
+    assert ctr.counter.wait_above(2, timeout=10) is True
+    assert ctr.close() == 3
+
+
+def test_buffered_counter_collected():
+    before = set(threads())
+    ctr = BufferedCounter(flush_interval=0.001)
+    (flusher,) = set(threads()) - before
+    started, release = Event(), Event()
+
+    def work():
+        ctr.inc()
+        started.set()
+        release.wait(timeout=10)
+
+    t = Thread(target=work)
+    t.start()
+    assert started.wait(timeout=10)
+    del ctr
+    gc.collect()
+
+    # the background thread stops once the counter is gone
+    flusher.join(timeout=10)
+    assert not flusher.is_alive()
+
+    # and threads exiting afterwards have nothing to flush into
+    release.set()
+    t.join(timeout=10)
+    del t
+    gc.collect()
@@ -0,0 +1,85 @@
+# type: ignore
+
+from threading import Condition
+from threading import Event
+from threading import RLock
+from threading import Thread
+
+import pytest
+
+from atomato import CountDownLatch
+
+
+def test_count_down_latch_basics():
+    latch = CountDownLatch(2)
+    assert latch.count == 2
+    assert latch.wait(timeout=0.0001) is False
+
+    assert latch.count_down() == 1
+    assert latch.register() == 2
+    assert latch.count_down(5) == 0
+    assert latch.count_down() == 0
+    assert latch.wait() is True
+
+    assert str(latch) == "0"
+    assert repr(latch) == "CountDownLatch(0)"
+
+    # registering on a released latch re-arms it
+    assert latch.register(1) == 1
+    assert latch.wait(timeout=0.0001) is False
+
+    latch.reset(0)
+    assert latch.wait() is True
+    latch.reset(3)
+    assert latch.count == 3
+
+    with pytest.raises(ValueError):
+        CountDownLatch(-1)
+    with pytest.raises(ValueError):
+        latch.count_down(-1)
+    with pytest.raises(ValueError):
+        latch.register(-1)
+    with pytest.raises(ValueError):
+        latch.reset(-1)
+    assert latch.count == 3
+
+
+def test_count_down_latch_rounds():
+    latch = CountDownLatch(0)
+    worker_count = 4
+
+    for _ in range(50):
+        latch.reset(worker_count)
+        threads = [Thread(target=latch.count_down) for _ in range(worker_count)]
+        for t in threads:
+            t.start()
+        assert latch.wait(timeout=5) is True
+        assert latch.count == 0
+        for t in threads:
+            t.join(timeout=5)
+
+
+def test_count_down_latch_wakes_waiters_of_previous_round():
+    waiting = Event()
+
+    class SignallingCondition(Condition):
+        def wait(self, timeout=None):
+            waiting.set()
+            return super().wait(timeout)
+
+    latch = CountDownLatch(1)
+    # a reentrant lock lets the test hold it across `count_down` and `reset`, so the waiter
+    # can only run after the latch was already re-armed
+    latch._condition = SignallingCondition(RLock())
+
+    results = []
+    waiter = Thread(target=lambda: results.append(latch.wait(timeout=5)))
+    waiter.start()
+    assert waiting.wait(timeout=5)
+
+    with latch._condition:
+        latch.count_down()
+        latch.reset(1)
+    waiter.join(timeout=5)
+    assert results == [True]
+    assert latch.count == 1
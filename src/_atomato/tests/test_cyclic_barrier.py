@@ -0,0 +1,84 @@
+# type: ignore
+
+from threading import Thread
+
+import pytest
+
+from atomato import CyclicBarrier
+
+from .polling import wait_until
+
+
+def test_cyclic_barrier_basics():
+    barrier = CyclicBarrier(1)
+    assert barrier.wait() is True
+    assert barrier.generation == 1
+
+    barrier = CyclicBarrier(2)
+    assert barrier.parties == 2
+    assert barrier.wait(timeout=0.0001) is False
+    assert barrier.waiting == 0
+    assert str(barrier) == "0/2"
+    assert repr(barrier) == "CyclicBarrier(0/2)"
+
+    with pytest.raises(ValueError):
+        CyclicBarrier(0)
+    with pytest.raises(ValueError):
+        barrier.deregister(2)
+    with pytest.raises(ValueError):
+        barrier.deregister(-1)
+    with pytest.raises(ValueError):
+        barrier.register(-1)
+    assert barrier.parties == 2
+
+
+def test_cyclic_barrier_rounds():
+    party_count = 4
+    round_count = 50
+    actions = []
+    barrier = CyclicBarrier(party_count, action=lambda: actions.append(1))
+
+    def worker():
+        for _ in range(round_count):
+            assert barrier.wait(timeout=5) is True
+
+    threads = [Thread(target=worker) for _ in range(party_count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert barrier.generation == round_count
+    assert len(actions) == round_count
+    assert barrier.waiting == 0
+
+
+def test_cyclic_barrier_dynamic_parties():
+    barrier = CyclicBarrier(1)
+    assert barrier.register(2) == 3
+
+    results = []
+    threads = [Thread(target=lambda: results.append(barrier.wait())) for _ in range(2)]
+    for t in threads:
+        t.start()
+    wait_until(lambda: barrier.waiting == 2)
+
+    # the third party leaves instead of arriving, which trips the barrier
+    assert barrier.deregister() == 2
+    for t in threads:
+        t.join(timeout=5)
+    assert results == [True, True]
+    assert barrier.generation == 1
+
+    assert barrier.deregister() == 1
+
+
+def test_cyclic_barrier_failing_action():
+    def action():
+        raise RuntimeError("action fails")
+
+    barrier = CyclicBarrier(1, action=action)
+    with pytest.raises(RuntimeError):
+        barrier.wait()
+    assert barrier.generation == 1
+    assert barrier.waiting == 0
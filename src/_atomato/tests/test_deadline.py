@@ -0,0 +1,180 @@
+# type: ignore
+
+from threading import Thread
+from time import monotonic
+from time import sleep
+
+import pytest
+
+from atomato import AtomicCounter
+from atomato import AtomicMap
+from atomato import AtomicObject
+from atomato import AtomicRingBuffer
+from atomato import CancellationToken
+from atomato import CountDownLatch
+from atomato import CyclicBarrier
+from atomato import WaitCancelledError
+from atomato import WaitOutcome
+from atomato import WaitResult
+
+from .polling import wait_until
+
+
+def test_wait_result():
+    r = WaitResult(WaitOutcome.SATISFIED, 0.5)
+    assert bool(r) is True
+    assert repr(r) == "WaitResult(satisfied, elapsed=0.500000)"
+    assert bool(WaitResult(WaitOutcome.TIMEOUT, 0.5)) is False
+    assert bool(WaitResult(WaitOutcome.CANCELLED, 0.5)) is False
+
+
+def test_wait_deadline():
+    a = AtomicObject(0)
+
+    r = a.wait_for_result(lambda v: v == 0)
+    assert r.outcome is WaitOutcome.SATISFIED
+
+    deadline = monotonic() + 0.01
+    r = a.wait_for_result(lambda v: v == 1, deadline=deadline)
+    assert r.outcome is WaitOutcome.TIMEOUT
+    assert monotonic() >= deadline
+    assert r.elapsed > 0
+
+    # a deadline in the past does not wait at all
+    assert a.wait_for(lambda v: v == 1, deadline=monotonic() - 1) is False
+
+    # the earliest of timeout and deadline applies
+    r = a.wait_for_result(lambda v: v == 1, timeout=10, deadline=monotonic() + 0.01)
+    assert r.outcome is WaitOutcome.TIMEOUT and r.elapsed < 5
+    r = a.wait_for_result(lambda v: v == 1, timeout=0.01, deadline=monotonic() + 10)
+    assert r.outcome is WaitOutcome.TIMEOUT and r.elapsed < 5
+
+
+def test_wait_deadline_survives_spurious_wakeups():
+    a = AtomicObject(0)
+    deadline = monotonic() + 0.1
+
+    def writer():
+        while monotonic() < deadline + 0.05:
+            a.set(0)
+            sleep(0.005)
+
+    t = Thread(target=writer)
+    t.start()
+    r = a.wait_for_result(lambda v: v == 1, deadline=deadline)
+    t.join(timeout=5)
+
+    assert r.outcome is WaitOutcome.TIMEOUT
+    assert r.elapsed < 0.1 + 0.05
+
+
+def test_wait_cancel():
+    a = AtomicObject(0)
+    token = CancellationToken()
+    assert token.cancelled is False
+
+    results = []
+    t = Thread(
+        target=lambda: results.append(a.wait_for_result(lambda v: v == 1, cancel=token))
+    )
+    t.start()
+    wait_until(lambda: token._conditions)
+    token.cancel()
+    t.join(timeout=5)
+
+    assert token.cancelled is True
+    assert results[0].outcome is WaitOutcome.CANCELLED
+    assert token._conditions == []
+
+    # a cancelled token ends new waits immediately, unless the predicate already holds
+    assert a.wait_for(lambda v: v == 1, cancel=token) is False
+    assert a.wait_for(lambda v: v == 0, cancel=token) is True
+
+
+def test_counter_wait_deadline_and_cancel():
+    ctr = AtomicCounter()
+    deadline = monotonic() + 0.001
+    assert ctr.wait_above(0, deadline=deadline) is False
+    assert ctr.wait_below(-1, deadline=deadline) is False
+    assert ctr.wait_equal(1, deadline=deadline) is False
+
+    token = CancellationToken()
+    token.cancel()
+    assert ctr.wait_equal(1, cancel=token) is False
+
+    r = ctr.wait_for_result(lambda v: v == 0, deadline=deadline)
+    assert r.outcome is WaitOutcome.SATISFIED
+    r = ctr.wait_for_result(lambda v: v == 1, cancel=token)
+    assert r.outcome is WaitOutcome.CANCELLED
+
+
+def test_synchronizer_waits_deadline_and_cancel():
+    cancelled = CancellationToken()
+    cancelled.cancel()
+    deadline = monotonic() + 0.001
+
+    latch = CountDownLatch(1)
+    assert latch.wait(deadline=deadline) is False
+    assert latch.wait(cancel=cancelled) is False
+    latch.count_down()
+    assert latch.wait(deadline=deadline, cancel=cancelled) is True
+
+    barrier = CyclicBarrier(2)
+    assert barrier.wait(deadline=deadline) is False
+    assert barrier.wait(cancel=cancelled) is False
+    # both parties withdrew their arrival
+    assert barrier.waiting == 0
+
+    m = AtomicMap()
+    assert m.wait_key("a", lambda v: v == 1, deadline=deadline) is False
+    assert m.wait_key("a", lambda v: v == 1, cancel=cancelled) is False
+    assert m._stripe("a").waiters == {}
+
+    rb = AtomicRingBuffer(1)
+    with pytest.raises(TimeoutError):
+        rb.get(deadline=deadline)
+    with pytest.raises(WaitCancelledError):
+        rb.get(cancel=cancelled)
+    assert rb.get_many(2, deadline=deadline) == []
+    assert rb.get_many(2, cancel=cancelled) == []
+    assert rb.put(1, deadline=deadline, cancel=cancelled) is True
+    assert rb.put(2, deadline=deadline) is False
+    assert rb.put(2, cancel=cancelled) is False
+    assert rb.put_many([2, 3], deadline=deadline) == 0
+    assert rb.put_many([2, 3], cancel=cancelled) == 0
+    assert rb.get(deadline=deadline, cancel=cancelled) == 1
+
+
+def test_ring_buffer_deadline_spans_the_whole_call():
+    rb = AtomicRingBuffer(1)
+
+    def consume():
+        sleep(0.01)
+        rb.get()
+
+    t = Thread(target=consume)
+    t.start()
+    # the first item fits, the second after the consumer made room, the third never
+    start = monotonic()
+    assert rb.put_many([1, 2, 3], timeout=0.2) == 2
+    assert monotonic() - start < 1
+    t.join()
+
+
+def test_ring_buffer_cancel_wakes_blocked_get():
+    rb = AtomicRingBuffer(1)
+    token = CancellationToken()
+    errors = []
+
+    def get():
+        try:
+            rb.get(cancel=token)
+        except WaitCancelledError as e:
+            errors.append(e)
+
+    t = Thread(target=get)
+    t.start()
+    wait_until(lambda: token._conditions)
+    token.cancel()
+    t.join(timeout=5)
+    assert len(errors) == 1
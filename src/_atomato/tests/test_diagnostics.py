@@ -0,0 +1,247 @@
+# type: ignore
+
+import gc
+import warnings
+from threading import Event
+from threading import Thread
+from threading import get_ident
+from time import sleep
+
+import pytest
+
+import _atomato.diagnostics
+from atomato import AtomicBitSet
+from atomato import AtomicCounter
+from atomato import AtomicObject
+from atomato import DiagnosticLockBackend
+from atomato import LockOrderWarning
+from atomato import LockWatchdog
+from atomato import PlainLockBackend
+from atomato import ProcessLockBackend
+from atomato import ReentrantLockBackend
+from atomato import TrackedLock
+from atomato import disable_lock_diagnostics
+from atomato import dump_lock_diagnostics
+from atomato import enable_lock_diagnostics
+
+from .polling import wait_until
+
+
+@pytest.fixture(autouse=True)
+def no_lock_order_warnings():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", LockOrderWarning)
+        yield
+
+
+def test_lock_order_inversion():
+    backend = DiagnosticLockBackend()
+    a, b = AtomicObject(0, lock=backend), AtomicCounter(lock=backend)
+    assert isinstance(a._lock, TrackedLock)
+    assert "test_diagnostics.py" in a._lock.name
+    assert repr(a._lock) == f"TrackedLock({a._lock.name})"
+
+    for _ in range(2):
+        with a:
+            with b:
+                # reentrant acquisitions are not an inversion
+                assert b.inc() == a.set(b.value)
+    with pytest.warns(LockOrderWarning, match="other way round, first at:") as record:
+        with b:
+            with a:
+                pass
+    assert "test_lock_order_inversion" in str(record[0].message)
+    # every inversion is only reported once
+    with b:
+        with a:
+            pass
+
+
+def test_lock_order_inversion_over_several_locks():
+    backend = DiagnosticLockBackend(PlainLockBackend())
+    a, b, c = (AtomicObject(i, lock=backend) for i in range(3))
+    with a:
+        with b:
+            pass
+    with b:
+        with c:
+            pass
+    with pytest.warns(LockOrderWarning) as record:
+        with c:
+            with a:
+                pass
+    assert "first at" not in str(record[0].message)
+
+    # a try-lock cannot deadlock
+    with b:
+        assert a._lock.acquire(blocking=False)
+        a._lock.release()
+        t = Thread(target=lambda: results.append(b._lock.acquire(timeout=0.01)))
+        results = []
+        t.start()
+        t.join()
+        assert results == [False]
+
+    # locks released out of order
+    a._lock.acquire()
+    b._lock.acquire()
+    a._lock.release()
+    assert _atomato.diagnostics._held[get_ident()] == [b._lock]
+    b._lock.release()
+
+
+def test_lock_order_over_converging_paths():
+    backend = DiagnosticLockBackend()
+    x, y, z, w, q = (AtomicObject(i, lock=backend) for i in range(5))
+    for first, second in [(x, y), (x, z), (y, w), (z, w)]:
+        with first:
+            with second:
+                pass
+    # the search from x reaches w twice and q never
+    with q:
+        with x:
+            pass
+
+
+def test_garbage_collected_locks_leave_the_graph():
+    backend = DiagnosticLockBackend()
+    a, b = AtomicObject(0, lock=backend), AtomicObject(0, lock=backend)
+    serials = [a._lock._serial, b._lock._serial]
+    with a:
+        with b:
+            pass
+    del a, b
+    gc.collect()
+    c = AtomicObject(0, lock=backend)
+    with c:
+        with AtomicObject(0, lock=backend):
+            pass
+    graph = _atomato.diagnostics._order
+    assert not set(serials) & (set(graph) | {s for edges in graph.values() for s in edges})
+
+
+@pytest.mark.parametrize("inner", [ReentrantLockBackend(), PlainLockBackend()])
+def test_tracked_lock_conditions(inner):
+    a = AtomicObject(0, lock=DiagnosticLockBackend(inner))
+    bits = AtomicBitSet(lock=DiagnosticLockBackend(inner))
+
+    def set_later():
+        sleep(0.01)
+        a.set(1)
+        bits.set_bits(1)
+
+    t = Thread(target=set_later)
+    t.start()
+    assert a.wait_for(lambda v: v == 1, timeout=10, priority=0)
+    assert bits.wait_all_set(1, timeout=10)
+    t.join()
+    assert not a._lock._is_owned()
+    assert get_ident() not in _atomato.diagnostics._held
+
+    if isinstance(inner, ReentrantLockBackend):
+        ctr = AtomicCounter(lock=DiagnosticLockBackend(inner))
+        with ctr:
+            with ctr:
+                assert ctr._ao.wait_for(lambda v: v == 0, timeout=0.01)
+                assert _atomato.diagnostics._held[get_ident()] == [ctr._ao._lock] * 2
+            assert ctr._ao._lock._is_owned()
+        assert not ctr._ao._lock._is_owned()
+
+
+def test_process_shared_backend_rejected():
+    with pytest.raises(ValueError, match="process-shared"):
+        DiagnosticLockBackend(ProcessLockBackend())
+    assert repr(DiagnosticLockBackend()) == "DiagnosticLockBackend(ReentrantLockBackend())"
+
+
+def hold_and_wait(first, second, holding, done):
+    with first:
+        holding.set()
+        with second:
+            pass
+    done.set()
+
+
+def test_dump_lock_diagnostics():
+    assert dump_lock_diagnostics() == "no thread holds or waits for a tracked lock"
+    backend = DiagnosticLockBackend()
+    a, b = AtomicObject(0, lock=backend), AtomicObject(0, lock=backend)
+    holding, done = Event(), Event()
+    t = Thread(target=hold_and_wait, args=[a, b, holding, done], name="stuck")
+    with b:
+        t.start()
+        assert holding.wait(timeout=10)
+        wait_until(lambda: t.ident in _atomato.diagnostics._waiting)
+        report = dump_lock_diagnostics()
+    assert done.wait(timeout=10)
+    t.join()
+
+    assert f"Thread MainThread ({get_ident()})\n  holds {b._lock.name}" in report
+    assert f"Thread stuck ({t.ident})\n  holds {a._lock.name}" in report
+    assert f"for {b._lock.name} held by MainThread" in report
+    assert "in hold_and_wait" in report
+    assert "in test_dump_lock_diagnostics" in report
+
+
+def test_dump_lock_diagnostics_waiting_for_a_free_lock(monkeypatch):
+    lock = TrackedLock(PlainLockBackend().lock(), "nowhere")
+    monkeypatch.setattr(_atomato.diagnostics, "_waiting", {get_ident(): (lock, 0)})
+    assert f"for {lock.name} held by no thread" in dump_lock_diagnostics()
+
+
+def test_lock_watchdog():
+    with pytest.raises(ValueError):
+        LockWatchdog(0)
+    a = AtomicObject(0, lock=DiagnosticLockBackend())
+    reports = []
+    holding, done = Event(), Event()
+    t = Thread(target=hold_and_wait, args=[AtomicObject(0), a, holding, done])
+    with LockWatchdog(0.02, reports.append):
+        with a:
+            t.start()
+            assert holding.wait(timeout=10)
+            sleep(0.2)
+        assert done.wait(timeout=10)
+        t.join()
+        sleep(0.05)
+    # the stuck wait is reported once
+    assert len(reports) == 1
+    assert f"for {a._lock.name} held by MainThread" in reports[0]
+
+
+def test_enable_lock_diagnostics(capsys):
+    before = AtomicObject(0)
+    enable_lock_diagnostics()
+    enable_lock_diagnostics(watchdog_timeout=0.02)
+    enable_lock_diagnostics(watchdog_timeout=0.02)
+    try:
+        tracked = AtomicObject(0)
+        assert isinstance(tracked._lock, TrackedLock)
+        assert isinstance(AtomicBitSet()._lock, TrackedLock)
+        assert not isinstance(before._lock, TrackedLock)
+        assert not isinstance(AtomicObject(0, lock=PlainLockBackend())._lock, TrackedLock)
+        holding, done = Event(), Event()
+        t = Thread(target=hold_and_wait, args=[AtomicObject(0), tracked, holding, done])
+        with tracked:
+            t.start()
+            assert holding.wait(timeout=10)
+            sleep(0.2)
+        assert done.wait(timeout=10)
+        t.join()
+    finally:
+        disable_lock_diagnostics()
+        disable_lock_diagnostics()
+    assert f"for {tracked._lock.name} held by MainThread" in capsys.readouterr().err
+    assert not isinstance(AtomicObject(0)._lock, TrackedLock)
+    assert _atomato.diagnostics._watchdog is None
+
+
+def test_after_fork_forgets_other_threads(monkeypatch):
+    lock = TrackedLock(PlainLockBackend().lock(), "nowhere")
+    held = {get_ident(): [lock], -1: [lock]}
+    waiting = {-1: (lock, 0)}
+    monkeypatch.setattr(_atomato.diagnostics, "_held", held)
+    monkeypatch.setattr(_atomato.diagnostics, "_waiting", waiting)
+    _atomato.diagnostics._forget_other_threads()
+    assert held == {get_ident(): [lock]}
+    assert waiting == {}
@@ -0,0 +1,190 @@
+# type: ignore
+
+import os
+import struct
+from threading import Thread
+
+import pytest
+
+from atomato import AtomicCounter
+from atomato import DurableCounter
+from atomato import DurableCounterStore
+from atomato import PlainLockBackend
+
+from .polling import wait_until
+
+
+def test_durable_counter_store_roundtrip(tmp_path):
+    path = tmp_path / "counters"
+    with DurableCounterStore(path, capacity=4) as store:
+        assert store.capacity == 4
+        assert store.recovered is False
+        assert store.generation == 1
+
+        requests = store.counter("requests")
+        assert isinstance(requests, AtomicCounter)
+        assert store.counter("requests") is requests
+        assert requests.name == "requests"
+        assert requests.inc(5) == 5
+        assert requests.dec() == 4
+        with requests.batch() as b:
+            b.inc(10)
+            b.dec(10)
+        with requests.batch() as b:
+            b.inc(3)
+        assert requests.dec(3) == 4
+
+        quota = store.counter("quota", default_value=10, allow_below_default=False)
+        assert quota.dec(20) == 10
+        assert quota.inc() == 11
+
+        assert store.names() == ["requests", "quota"]
+        assert list(store) == ["requests", "quota"]
+        assert "quota" in store
+        assert "other" not in store
+        assert len(store) == 2
+        assert repr(requests) == "DurableCounter(requests=4)"
+        assert repr(store) == "DurableCounterStore(counters=2, generation=1)"
+
+    with DurableCounterStore(path, capacity=100) as store:
+        assert store.recovered is False
+        assert store.capacity == 4
+        assert store.generation == 2
+        assert store.names() == ["requests", "quota"]
+        assert store.counter("requests").value == 4
+        quota = store.counter("quota", default_value=10)
+        assert quota.value == 11
+        assert quota.reset() == 10
+
+
+def test_durable_counter_store_flush(tmp_path):
+    store = DurableCounterStore(tmp_path / "counters", lock=PlainLockBackend())
+    ctr = store.counter("a")
+    assert store.flush() == 2
+    # unchanged counters do not write a checkpoint
+    assert store.flush() == 2
+    ctr.inc()
+    assert store.flush() == 3
+    store.counter("b")
+    assert store.flush() == 4
+
+    store.close()
+    store.close()
+    # counters of a closed store keep working in memory but are not persisted
+    assert ctr.inc() == 2
+    assert store.flush() == 4
+
+
+def test_durable_counter_store_crash_recovery(tmp_path):
+    path = tmp_path / "counters"
+    store = DurableCounterStore(path)
+    ctr = store.counter("a")
+    ctr.inc(3)
+    store.flush()
+    ctr.inc(4)  # lost: never flushed
+
+    # the only owner of the file
+    with pytest.raises(RuntimeError, match="open in another store"):
+        DurableCounterStore(path)
+
+    # the process dies without closing the store, which releases the file
+    store._mm.close()
+    os.close(store._file)
+    recovered = DurableCounterStore(path)
+    assert recovered.recovered is True
+    assert recovered.counter("a").value == 3
+    recovered.close()
+
+
+def test_durable_counter_store_torn_checkpoint(tmp_path):
+    path = tmp_path / "counters"
+    with DurableCounterStore(path, capacity=2) as store:
+        store.counter("a").inc(1)
+        store.flush()  # generation 2 in the first area
+        store.counter("a").inc(1)
+    # generation 3, the latest, sits in the second area
+    area_size = 16 + 2 * (48 + 8)
+    with open(path, "r+b") as f:
+        f.seek(64 + area_size + 16 + 2 * 48)
+        f.write(struct.pack("<q", 1234))
+
+    with DurableCounterStore(path) as store:
+        assert store.generation == 2
+        assert store.counter("a").value == 1
+
+    # with both checkpoints corrupted the file is refused
+    with open(path, "r+b") as f:
+        f.seek(64 + 16)
+        f.write(b"x")
+        f.seek(64 + area_size + 16)
+        f.write(b"x")
+    with pytest.raises(ValueError, match="no valid checkpoint"):
+        DurableCounterStore(path)
+
+
+def test_durable_counter_store_invalid(tmp_path):
+    with pytest.raises(ValueError):
+        DurableCounterStore(tmp_path / "a", capacity=0)
+    with pytest.raises(ValueError):
+        DurableCounterStore(tmp_path / "a", flush_interval=0)
+
+    path = tmp_path / "short"
+    path.write_bytes(b"ATOM")
+    with pytest.raises(ValueError, match="not a counter store"):
+        DurableCounterStore(path)
+
+    path = tmp_path / "truncated"
+    DurableCounterStore(path).close()
+    path.write_bytes(path.read_bytes()[:100])
+    with pytest.raises(ValueError, match="not a counter store, it is truncated"):
+        DurableCounterStore(path)
+
+    path = tmp_path / "magic"
+    path.write_bytes(b"\x00" * 64)
+    with pytest.raises(ValueError, match="not a counter store"):
+        DurableCounterStore(path)
+
+    path = tmp_path / "version"
+    DurableCounterStore(path).close()
+    data = bytearray(path.read_bytes())
+    data[8:12] = struct.pack("<I", 99)
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="version 99"):
+        DurableCounterStore(path)
+
+    with DurableCounterStore(tmp_path / "full", capacity=1) as store:
+        store.counter("a")
+        with pytest.raises(ValueError, match="full"):
+            store.counter("b")
+        for name in ["", "x" * 49, "a\x00b"]:
+            with pytest.raises(ValueError):
+                store.counter(name)
+
+
+def test_durable_counter_int64_limit(tmp_path):
+    with DurableCounterStore(tmp_path / "counters") as store:
+        ctr = store.counter("a", default_value=2**63 - 1)
+        with pytest.raises(OverflowError):
+            ctr.inc()
+        assert ctr.value == 2**63 - 1
+
+
+def test_durable_counter_store_periodic_flush(tmp_path):
+    store = DurableCounterStore(tmp_path / "counters", flush_interval=0.001)
+    ctr = store.counter("a")
+    assert isinstance(ctr, DurableCounter)
+
+    def inc():
+        for _ in range(1000):
+            ctr.inc()
+
+    threads = [Thread(target=inc) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wait_until(lambda: store.generation > 2)
+    store.close()
+
+    with DurableCounterStore(tmp_path / "counters") as store:
+        assert store.counter("a").value == 4000
@@ -0,0 +1,109 @@
+# type: ignore
+
+from enum import Enum
+from threading import Thread
+
+import pytest
+
+from atomato import AtomicCounter
+from atomato import AtomicInteger
+from atomato import AtomicObject
+from atomato import AtomicState
+from atomato import CancellationToken
+from atomato import LockBackend
+from atomato import PlainLockBackend
+from atomato import ProcessLockBackend
+from atomato import ReentrantLockBackend
+from atomato import SpinLock
+from atomato import SpinLockBackend
+
+
+BACKENDS = [
+    ReentrantLockBackend(),
+    PlainLockBackend(),
+    SpinLockBackend(spins=10),
+    ProcessLockBackend(),
+    ProcessLockBackend(reentrant=False),
+]
+
+
+@pytest.mark.parametrize("backend", BACKENDS, ids=repr)
+def test_lock_backend_atomic_object(backend):
+    a = AtomicObject(0, lock=backend)
+    assert a._lock_backend is backend
+    assert a.set(1) == 1
+    assert a.set_by(lambda v: None) == 1
+    assert a.wait_for(lambda v: v == 1) is True
+    assert a.wait_for(lambda v: v == 2, timeout=0.0001) is False
+
+    token = CancellationToken()
+    token.cancel()
+    assert a.wait_for(lambda v: v == 2, cancel=token) is False
+
+    with a:
+        pass
+
+
+@pytest.mark.parametrize("backend", BACKENDS, ids=repr)
+def test_lock_backend_counter_concurrency(backend):
+    ctr = AtomicCounter(lock=backend)
+
+    def worker():
+        for _ in range(500):
+            ctr.inc()
+
+    waiter = Thread(target=lambda: ctr.wait_equal(2000))
+    waiter.start()
+    threads = [Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    waiter.join(timeout=10)
+
+    assert ctr.value == 2000
+    assert not waiter.is_alive()
+
+
+def test_lock_backend_propagation():
+    backend = PlainLockBackend()
+
+    class State(int, Enum):
+        A = 0
+        B = 1
+
+    assert AtomicInteger(1, lock=backend)._ao._lock_backend is backend
+    s = AtomicState(State.A, lock=backend)
+    assert s._state._ao._lock_backend is backend
+    assert s.set(State.B) == State.B
+
+    # a keyword named `lock` is taken by AtomicObject, other keywords go to the class
+    class MyClass:
+        def __init__(self, v):
+            self.v = v
+
+    assert AtomicObject(MyClass, v=1, lock=backend).value.v == 1
+
+
+def test_lock_backend_repr_and_base():
+    assert repr(ReentrantLockBackend()) == "ReentrantLockBackend()"
+    assert repr(SpinLockBackend(spins=5)) == "SpinLockBackend(spins=5)"
+    assert repr(ProcessLockBackend()) == "ProcessLockBackend(reentrant=True)"
+
+    with pytest.raises(NotImplementedError):
+        LockBackend().lock()
+
+
+def test_spin_lock(monkeypatch):
+    yields = []
+    monkeypatch.setattr("_atomato.lock_backend.sleep", yields.append)
+    lock = SpinLock(spins=3)
+    assert lock.locked() is False
+    with lock:
+        assert lock.locked() is True
+        assert lock.acquire(blocking=False) is False
+        assert lock.acquire(timeout=0.0001) is False
+        # every failed spin yields to the holder
+        assert yields == [0, 0, 0]
+    assert lock.acquire(blocking=False) is True
+    lock.release()
@@ -0,0 +1,372 @@
+# type: ignore
+
+import gc
+import os
+import pickle
+import signal
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from threading import Condition
+from threading import Event
+from threading import Thread
+from threading import enumerate as threads
+from weakref import WeakValueDictionary
+
+import pytest
+
+import _atomato.after_fork
+from atomato import AtomicBitSet
+from atomato import AtomicCache
+from atomato import AtomicCounter
+from atomato import AtomicHistogram
+from atomato import AtomicInteger
+from atomato import AtomicLazy
+from atomato import AtomicMap
+from atomato import AtomicObject
+from atomato import AtomicRateMeter
+from atomato import AtomicRingBuffer
+from atomato import AtomicState
+from atomato import BufferedCounter
+from atomato import CancellationToken
+from atomato import CountDownLatch
+from atomato import CyclicBarrier
+from atomato import DurableCounterStore
+from atomato import PlainLockBackend
+from atomato import ProcessLockBackend
+from atomato import SpinLockBackend
+from atomato import dump_counters
+from atomato import load_counters
+
+
+class State(int, Enum):
+    IDLE = 0
+    RUNNING = 1
+
+
+def add(ctr, d):  # pragma: no cover - runs in the worker process
+    ctr.inc(d)
+    return ctr
+
+
+@pytest.mark.parametrize("lock", [None, PlainLockBackend(), SpinLockBackend(5)])
+def test_pickle_roundtrip(lock):
+    a = AtomicObject([1, 2], lock=lock)
+    a.set([1, 2, 3])
+    b = pickle.loads(pickle.dumps(a))
+    assert b.read_versioned() == ([1, 2, 3], 1)
+    assert b._lock is not a._lock
+    assert b.wait_for(lambda v: len(v) == 3, timeout=0.0001, priority=0)
+
+    ctr = AtomicCounter(5, allow_below_default=False, lock=lock)
+    copy = pickle.loads(pickle.dumps(ctr))
+    assert copy.dec(10) == 5
+    assert copy.inc() == 6
+    assert ctr.value == 5
+
+    assert pickle.loads(pickle.dumps(AtomicInteger(-3))) == -3
+    state = pickle.loads(pickle.dumps(AtomicState(State.RUNNING, lock=lock)))
+    assert state.state is State.RUNNING
+
+    bits = pickle.loads(pickle.dumps(AtomicBitSet(0b101, lock=lock)))
+    assert bits.value == 0b101
+    assert bits.wait_any_set(0b001, timeout=0.0001)
+
+
+def roundtrip(obj):
+    return pickle.loads(pickle.dumps(obj))
+
+
+def test_pickle_other_objects():
+    m = AtomicMap(stripes=4)
+    m.set("a", 1)
+    m.set(2, "b")
+    copy = roundtrip(m)
+    assert len(copy._stripes) == 4
+    assert dict(copy.items()) == {"a": 1, 2: "b"}
+    assert copy.wait_key("a", lambda v: v == 1, timeout=0.0001)
+
+    rb = AtomicRingBuffer(3)
+    rb.put_many([1, 2, 3])
+    rb.get()
+    rb.put(4)
+    copy = roundtrip(rb)
+    assert copy.capacity == 3
+    assert copy.get_many(3) == [2, 3, 4]
+    assert rb.get_many(3) == [2, 3, 4]
+
+    latch = CountDownLatch(2)
+    latch.count_down()
+    assert roundtrip(latch).count == 1
+
+    barrier = CyclicBarrier(2)
+    assert barrier.wait(timeout=0.0001) is False
+    copy = roundtrip(barrier)
+    assert copy.parties == 2 and copy.waiting == 0
+
+    token = CancellationToken()
+    assert roundtrip(token).cancelled is False
+    token.cancel()
+    assert roundtrip(token).cancelled is True
+
+    lazy = AtomicLazy(list)
+    assert roundtrip(lazy).loaded is False
+    lazy.value.append(1)
+    copy = roundtrip(lazy)
+    assert copy.loaded is True and copy.value == [1]
+
+    cache = AtomicCache(str, ttl=60)
+    assert cache.get(1) == "1"
+    copy = roundtrip(cache)
+    assert 1 in copy and copy.get(1) == "1"
+    assert copy.stats.misses == 1 and copy.stats.hits == 1
+
+    h = AtomicHistogram([1, 2], window=60, rotations=3)
+    h.observe_many([1, 2, 3])
+    copy = roundtrip(h)
+    assert copy.snapshot().counts == (1, 1, 1)
+    assert copy.window_snapshot().counts == (1, 1, 1)
+    copy.observe(1)
+    assert copy.snapshot().counts == (2, 1, 1)
+    assert roundtrip(AtomicHistogram([1])).snapshot().count == 0
+
+    meter = AtomicRateMeter()
+    meter.mark(3)
+    copy = roundtrip(meter)
+    assert copy.count == 3
+    assert copy.rates == meter.rates
+
+    before = set(threads())
+    ctr = BufferedCounter(flush_every=100, flush_interval=60)
+    ctr.inc(5)
+    copy = roundtrip(ctr)
+    assert ctr.value == 5
+    assert copy.value == 5
+    copy.inc()
+    assert copy.sync() == 6
+    # each copy flushes in the background on its own, until closed
+    assert len(set(threads()) - before) == 2
+    ctr.close()
+    copy = roundtrip(ctr)
+    assert copy._stop.is_set()
+
+
+def test_pickle_process_pool():
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        ctr = pool.submit(add, AtomicCounter(1), 2).result(timeout=60)
+    assert ctr.value == 3
+
+
+def test_pickle_durable_counter(tmp_path):
+    with DurableCounterStore(tmp_path / "counters") as store:
+        with pytest.raises(TypeError):
+            pickle.dumps(store.counter("a"))
+
+
+def test_dump_and_load_counters():
+    counters = [
+        AtomicCounter(2, allow_below_default=False),
+        AtomicCounter(-1),
+        AtomicInteger(7),
+    ]
+    counters[0].inc(40)
+    counters[1].dec(2**40)
+    data = dump_counters(counters)
+    assert len(data) == 10 + 17 * 3
+
+    loaded = load_counters(data, lock=PlainLockBackend())
+    assert [c.value for c in loaded] == [42, -1 - 2**40, 7]
+    assert [type(c) for c in loaded] == [AtomicCounter, AtomicCounter, AtomicInteger]
+    assert loaded[0].dec(100) == 2
+    assert loaded[1].reset() == -1
+    assert load_counters(dump_counters([])) == []
+
+    with pytest.raises(OverflowError):
+        dump_counters([AtomicCounter(2**63)])
+    for bad in [b"AC", b"XXXX" + data[4:], data[:-1]]:
+        with pytest.raises(ValueError, match="not serialized counters"):
+            load_counters(bad)
+    with pytest.raises(ValueError, match="version 2"):
+        load_counters(data[:4] + struct.pack("<H", 2) + data[6:])
+
+
+def test_after_fork_reinitializes_locks(monkeypatch):
+    a = AtomicObject(0)
+    bits = AtomicBitSet()
+    shared = AtomicObject(0, lock=ProcessLockBackend())
+    shared_bits = AtomicBitSet(lock=ProcessLockBackend())
+    tracked = WeakValueDictionary({id(o): o for o in [a, bits, shared, shared_bits]})
+    monkeypatch.setattr(_atomato.after_fork, "_tracked", tracked)
+
+    locks = [a._lock, bits._lock, shared._lock, shared_bits._lock]
+    a._queue.append("waiter of a thread that does not exist in the child")
+    shared._queue.append("waiter of a thread that does not exist in the child")
+    shared_bits._waiters.append("waiter of a thread that does not exist in the child")
+    shared._sequence = 1
+
+    _atomato.after_fork._reinit_tracked()
+    assert a._lock is not locks[0] and a._queue == []
+    assert bits._lock is not locks[1]
+    # process-shared locks stay shared with the parent
+    assert shared._lock is locks[2] and shared._queue == [] and shared._sequence == 2
+    assert shared_bits._lock is locks[3] and shared_bits._waiters == []
+
+
+def test_after_fork_reinitializes_other_objects(monkeypatch):
+    m = AtomicMap(stripes=1)
+    rb = AtomicRingBuffer(1)
+    latch = CountDownLatch(1)
+    barrier = CyclicBarrier(2)
+    token = CancellationToken()
+    lazy = AtomicLazy(list)
+    cache = AtomicCache(str)
+    h = AtomicHistogram([1])
+    meter = AtomicRateMeter()
+    running = BufferedCounter(flush_interval=60)
+    closed = BufferedCounter(flush_interval=60)
+    objects = [m, rb, latch, barrier, token, lazy, cache, h, meter, running, closed]
+    tracked = WeakValueDictionary({id(o): o for o in objects})
+    monkeypatch.setattr(_atomato.after_fork, "_tracked", tracked)
+
+    # state left behind by threads that do not exist in the child
+    m.set("a", 1)
+    m._stripes[0].waiters["a"] = (Condition(), 1)
+    rb.put(1)
+    rb._async_getters.append("waiter of a thread that does not exist in the child")
+    barrier._arrived = 1
+    token._conditions.append(Condition())
+    lazy._ao._object.loading = True
+    cache._loading["a"] = Condition()
+    cache._stale.add("a")
+    h.observe(1)
+    running.inc()
+    closed.close()
+    locks = [
+        m._stripes[0].lock,
+        rb._lock,
+        latch._condition,
+        barrier._condition,
+        token._lock,
+        cache._lock,
+        h._lock,
+        meter._lock,
+        running._lock,
+        running._buffers[0].lock,
+    ]
+    stops = [running._stop, closed._stop]
+    before = set(threads())
+
+    _atomato.after_fork._reinit_tracked()
+    after = [
+        m._stripes[0].lock,
+        rb._lock,
+        latch._condition,
+        barrier._condition,
+        token._lock,
+        cache._lock,
+        h._lock,
+        meter._lock,
+        running._lock,
+        running._buffers[0].lock,
+    ]
+    assert all(new is not old for new, old in zip(after, locks, strict=True))
+    assert m._stripes[0].waiters == {} and m.get("a") == 1
+    assert rb._async_getters == deque() and rb.get() == 1
+    assert barrier._arrived == 0
+    assert token._conditions == []
+    assert lazy.value == []
+    assert cache._loading == {} and cache._stale == set()
+    assert h.snapshot().count == 1
+    # the background flusher is restarted unless the counter was closed
+    assert running._stop is not stops[0] and not running._stop.is_set()
+    assert closed._stop is not stops[1] and closed._stop.is_set()
+    assert len(set(threads()) - before) == 1
+    assert running.sync() == 1
+
+
+def test_fork_safe_retirement(monkeypatch):
+    monkeypatch.setattr(_atomato.after_fork, "_tracked", WeakValueDictionary())
+    ctr = BufferedCounter(flush_every=100, flush_interval=None)
+    h = AtomicHistogram([1])
+
+    def work():
+        ctr.inc(2)
+        h.observe(1)
+
+    # a forked child retires the thread-local data of its parent's other threads before the
+    # fork handlers replaced their locks
+    monkeypatch.setattr(_atomato.after_fork, "_pid", -1)
+    t = Thread(target=work)
+    t.start()
+    t.join()
+    del t
+    gc.collect()
+    assert ctr.value == 0
+    assert len(h._shards) == 2
+    assert len(_atomato.after_fork._deferred) == 2
+
+    _atomato.after_fork._reinit_tracked()
+    assert _atomato.after_fork._pid == os.getpid()
+    assert _atomato.after_fork._deferred == []
+    assert ctr.value == 2
+    assert len(h._shards) == 1 and h.snapshot().count == 1
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_fork_while_another_thread_holds_the_lock():
+    ctr = AtomicCounter()
+    holding, release = Event(), Event()
+
+    def hold():
+        with ctr:
+            holding.set()
+            release.wait(timeout=10)
+
+    t = Thread(target=hold)
+    t.start()
+    assert holding.wait(timeout=10)
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        code = 1
+        try:
+            signal.alarm(5)  # a deadlocked child is killed instead of hanging the test
+            code = 0 if ctr.inc() == 1 else 1
+        finally:
+            os._exit(code)
+    release.set()
+    t.join()
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_fork_retires_thread_local_data_of_vanished_threads():
+    ctr = BufferedCounter(flush_every=100, flush_interval=None)
+    h = AtomicHistogram([1])
+    holding, release = Event(), Event()
+
+    def hold():
+        ctr.inc(3)
+        h.observe(1)
+        # the child retires this thread's buffer and shard, whose locks it holds at the fork
+        with ctr._buffers[0].lock, h._lock:
+            holding.set()
+            release.wait(timeout=10)
+
+    t = Thread(target=hold)
+    t.start()
+    assert holding.wait(timeout=10)
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        code = 1
+        try:
+            signal.alarm(5)  # a deadlocked child is killed instead of hanging the test
+            retired = ctr._buffers == [] and len(h._shards) == 1
+            code = 0 if retired and ctr.value == 3 and h.snapshot().count == 1 else 1
+        finally:
+            os._exit(code)
+    release.set()
+    t.join()
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
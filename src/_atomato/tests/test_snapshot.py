@@ -0,0 +1,105 @@
+# type: ignore
+
+from enum import Enum
+from threading import Event
+from threading import Thread
+
+import pytest
+
+from atomato import AtomicCounter
+from atomato import AtomicInteger
+from atomato import AtomicObject
+from atomato import AtomicState
+from atomato import CounterGroup
+from atomato import snapshot
+
+
+class State(int, Enum):
+    IDLE = 0
+    RUNNING = 1
+
+
+class RacingObject(AtomicObject):
+    """AtomicObject that sees one concurrent write during the first optimistic read."""
+
+    def __init__(self, value):
+        self.reads = 0
+        super().__init__(value)
+
+    @property
+    def _object(self):
+        self.reads += 1
+        if self.reads == 1:
+            self._sequence += 2
+        return self._value
+
+    @_object.setter
+    def _object(self, value):
+        self._value = value
+
+
+def test_snapshot_basics():
+    ctr = AtomicCounter(3)
+    i = AtomicInteger(-1)
+    state = AtomicState(State.RUNNING)
+    a = AtomicObject("x")
+    assert snapshot(ctr, i, state, a) == (3, -1, State.RUNNING, "x")
+    assert type(snapshot(state)[0]) is State
+    assert snapshot() == ()
+
+    with pytest.raises(TypeError):
+        snapshot(1)
+
+
+def test_snapshot_retries_and_falls_back():
+    racing = RacingObject(5)
+    assert snapshot(racing) == (5,)
+    assert racing.reads == 2
+
+    # a writer holding the lock mid-change keeps the sequence odd, so the read falls back to
+    # taking the locks, reentrantly here as the writer is this thread
+    a = AtomicObject(0)
+    with a:
+        a._sequence += 1
+        assert snapshot(a, a, retries=2) == (0, 0)
+        a._sequence += 1
+    assert snapshot(a, retries=0) == (0,)
+
+
+@pytest.mark.parametrize("retries", [16, 0])
+def test_snapshot_consistent(retries):
+    started = AtomicCounter()
+    finished = AtomicCounter()
+    stop = Event()
+
+    def work():
+        while not stop.is_set():
+            started.inc()
+            finished.inc()
+
+    t = Thread(target=work)
+    t.start()
+    try:
+        for _ in range(5000):
+            s, f = snapshot(started, finished, retries=retries)
+            # every instant has started the request before finishing it
+            assert 0 <= s - f <= 1
+    finally:
+        stop.set()
+        t.join()
+
+
+def test_counter_group():
+    inflight = AtomicCounter(2)
+    failed = AtomicCounter(1)
+    state = AtomicState(State.IDLE)
+    group = CounterGroup(inflight=inflight, failed=failed, state=state)
+
+    assert group.snapshot() == {"inflight": 2, "failed": 1, "state": State.IDLE}
+    assert group["failed"] is failed
+    assert list(group) == ["inflight", "failed", "state"]
+    assert len(group) == 3
+    assert repr(CounterGroup(retries=1, a=inflight)) == "CounterGroup({'a': 2})"
+
+    with pytest.raises(TypeError):
+        CounterGroup(bad=object())
@@ -0,0 +1,182 @@
+# type: ignore
+
+from enum import Enum
+
+import pytest
+
+from atomato import AtomicCounter
+from atomato import AtomicInteger
+from atomato import AtomicObject
+from atomato import AtomicState
+
+from .stress import Operation
+from .stress import check_linearizable
+from .stress import counter_step
+from .stress import run_stress
+
+
+WAIT_TIMEOUT = 0.0005
+
+
+def counter_choose(rng):
+    name = rng.choice(["inc", "dec", "read", "wait_equal", "wait_above", "wait_below"])
+    if name in ("inc", "dec"):
+        return name, rng.randint(1, 3)
+    if name == "read":
+        return name, None
+    return name, rng.randint(-3, 3)
+
+
+def counter_invoke(ctr):
+    def invoke(name, arg):
+        if name == "read":
+            return ctr.value
+        if name.startswith("wait_"):
+            return getattr(ctr, name)(arg, timeout=WAIT_TIMEOUT)
+        return getattr(ctr, name)(arg)
+
+    return invoke
+
+
+def test_checker_detects_lost_update():
+    # two overlapping increments that both observed 0 and returned 1
+    history = [
+        Operation(0, "inc", 1, 1, start=0, end=10),
+        Operation(1, "inc", 1, 1, start=1, end=11),
+    ]
+    assert check_linearizable(history, 0, counter_step()) is False
+
+    history[1] = Operation(1, "inc", 1, 2, start=1, end=11)
+    assert check_linearizable(history, 0, counter_step()) is True
+
+    # a read that completed before a write started cannot observe it
+    history = [
+        Operation(0, "read", None, 1, start=0, end=1),
+        Operation(1, "inc", 1, 1, start=2, end=3),
+    ]
+    assert check_linearizable(history, 0, counter_step()) is False
+
+    # both orders of the overlapping reads reach the same state, which is only searched once
+    history = [
+        Operation(0, "read", None, 0, start=0, end=10),
+        Operation(1, "read", None, 0, start=1, end=11),
+        Operation(0, "read", None, 1, start=12, end=13),
+    ]
+    assert check_linearizable(history, 0, counter_step()) is False
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("allow_below_default", [True, False])
+def test_stress_atomic_counter(seed, allow_below_default):
+    ctr = AtomicCounter(0, allow_below_default=allow_below_default)
+    report = run_stress(counter_invoke(ctr), counter_choose, seed=seed)
+
+    assert report.throughput > 0
+    assert check_linearizable(
+        report.history, 0, counter_step(0, allow_below_default)
+    )
+    if allow_below_default:
+        # final invariant: every increment and decrement is accounted for
+        deltas = {"inc": 1, "dec": -1}
+        assert ctr.value == sum(
+            deltas[op.name] * op.arg for op in report.history if op.name in deltas
+        )
+
+
+def test_stress_atomic_counter_no_lost_updates():
+    ctr = AtomicCounter()
+    report = run_stress(
+        counter_invoke(ctr), lambda rng: ("inc", 1), threads=8, ops_per_thread=2000
+    )
+    assert ctr.value == len(report.history) == 16000
+    assert sorted(op.result for op in report.history) == list(range(1, 16001))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_stress_atomic_integer(seed):
+    def choose(rng):
+        if rng.random() < 0.3:
+            return "set", rng.randint(-5, 5)
+        return counter_choose(rng)
+
+    i = AtomicInteger(0)
+    report = run_stress(counter_invoke(i), choose, seed=seed)
+    assert check_linearizable(report.history, 0, counter_step())
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_stress_atomic_state(seed):
+    class State(int, Enum):
+        A = 0
+        B = 1
+        C = 2
+
+    s = AtomicState(State.A)
+
+    def choose(rng):
+        return rng.choice(
+            [("set", rng.choice(list(State))), ("reset", None), ("read", None)]
+        )
+
+    def invoke(name, arg):
+        # `set` and `reset` return the state read back afterwards, which may already be a
+        # later state, so the history records the state that was written instead
+        if name == "set":
+            s.set(arg)
+            return int(arg)
+        if name == "reset":
+            s.reset()
+            return int(State.A)
+        return int(s.state)
+
+    report = run_stress(invoke, choose, seed=seed)
+    history = [
+        op._replace(arg=int(op.arg)) if op.name == "set" else op
+        for op in report.history
+    ]
+    assert check_linearizable(history, 0, counter_step())
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_stress_atomic_object(seed):
+    a = AtomicObject(0)
+
+    def choose(rng):
+        return rng.choice(
+            [
+                ("set", rng.randint(0, 3)),
+                ("read", None),
+                ("wait_equal", rng.randint(0, 3)),
+            ]
+        )
+
+    def invoke(name, arg):
+        if name == "set":
+            a.set(arg)
+            return arg
+        if name == "read":
+            return a.value
+        return a.wait_for(lambda v: v == arg, timeout=WAIT_TIMEOUT)
+
+    report = run_stress(invoke, choose, seed=seed)
+    assert check_linearizable(report.history, 0, counter_step())
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_stress_atomic_object_update(seed):
+    a = AtomicObject(0)
+
+    def choose(rng):
+        if rng.random() < 0.2:
+            return "read", None
+        return "inc", rng.randint(1, 3)
+
+    def invoke(name, arg):
+        if name == "read":
+            return a.value
+        # low max_retries so both the optimistic and the locked path are exercised
+        return a.update(lambda v: v + arg, max_retries=1)
+
+    report = run_stress(invoke, choose, seed=seed)
+    assert check_linearizable(report.history, 0, counter_step())
+    assert a.value == sum(op.arg for op in report.history if op.name == "inc")
@@ -1,14 +1,88 @@
 """Atomato package."""
 
+from _atomato import AtomicBitSet
+from _atomato import AtomicCache
 from _atomato import AtomicCounter
+from _atomato import AtomicHistogram
 from _atomato import AtomicInteger
+from _atomato import AtomicLazy
+from _atomato import AtomicMap
 from _atomato import AtomicObject
+from _atomato import AtomicRateMeter
+from _atomato import AtomicRingBuffer
 from _atomato import AtomicState
+from _atomato import BufferedCounter
+from _atomato import CacheStats
+from _atomato import CancellationToken
+from _atomato import CountDownLatch
+from _atomato import CounterBatch
+from _atomato import CounterGroup
+from _atomato import CyclicBarrier
+from _atomato import DiagnosticLockBackend
+from _atomato import DurableCounter
+from _atomato import DurableCounterStore
+from _atomato import HistogramSnapshot
+from _atomato import LockBackend
+from _atomato import LockOrderWarning
+from _atomato import LockWatchdog
+from _atomato import PlainLockBackend
+from _atomato import ProcessLockBackend
+from _atomato import ReentrantLockBackend
+from _atomato import SpinLock
+from _atomato import SpinLockBackend
+from _atomato import TrackedLock
+from _atomato import WaitCancelledError
+from _atomato import WaitOutcome
+from _atomato import WaitResult
+from _atomato import WaiterStats
+from _atomato import disable_lock_diagnostics
+from _atomato import dump_counters
+from _atomato import dump_lock_diagnostics
+from _atomato import enable_lock_diagnostics
+from _atomato import load_counters
+from _atomato import snapshot
 
 
 __all__ = [
     "AtomicObject",
+    "WaiterStats",
     "AtomicCounter",
+    "CounterBatch",
+    "BufferedCounter",
+    "AtomicHistogram",
+    "HistogramSnapshot",
+    "AtomicRateMeter",
     "AtomicInteger",
     "AtomicState",
+    "AtomicBitSet",
+    "DurableCounter",
+    "DurableCounterStore",
+    "AtomicRingBuffer",
+    "AtomicMap",
+    "AtomicLazy",
+    "AtomicCache",
+    "CacheStats",
+    "CounterGroup",
+    "snapshot",
+    "dump_counters",
+    "load_counters",
+    "CountDownLatch",
+    "CyclicBarrier",
+    "CancellationToken",
+    "WaitOutcome",
+    "WaitResult",
+    "WaitCancelledError",
+    "LockBackend",
+    "PlainLockBackend",
+    "ProcessLockBackend",
+    "ReentrantLockBackend",
+    "SpinLock",
+    "SpinLockBackend",
+    "DiagnosticLockBackend",
+    "TrackedLock",
+    "LockOrderWarning",
+    "LockWatchdog",
+    "enable_lock_diagnostics",
+    "disable_lock_diagnostics",
+    "dump_lock_diagnostics",
 ]